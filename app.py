@@ -1,6 +1,8 @@
 import streamlit as st
 import logging
 from database.connection import test_connection
+from database.profiler import current_page
+from database.patient_summary import get_patient_summary_refresher
 from auth.login import check_authentication
 from components.common import render_sidebar, render_navigation_menu, render_sidebar_stats
 from modules.dashboard_page import render_dashboard
@@ -37,11 +39,16 @@ def main():
         st.error(f"❌ 数据库连接异常: {e}")
         st.stop()
     
+    # 患者最新状态汇总表由后台线程刷新，页面只读取汇总表
+    if config.PATIENT_SUMMARY_IN_APP:
+        get_patient_summary_refresher().start()
+    
     # 渲染侧边栏（包含用户信息和退出按钮）
     render_sidebar()
     
     # 渲染导航菜单和统计信息
     menu = render_navigation_menu()
+    current_page.set(menu or "未知页面")
     render_sidebar_stats()
     
     # 根据选择渲染对应页面
@@ -0,0 +1,327 @@
+"""
+索引顾问：采集 run_query 下发的语句（查询剖析器 / 慢查询日志），对照表结构分析谓词与关联条件，
+生成推荐的覆盖索引迁移脚本（database/migrations/NNN_*.sql），并在本地替身库上给出建索引前后的基准对比。
+
+    python -m benchmarks.index_advisor --scale 1m
+    python -m benchmarks.index_advisor --slow-log logs/slow_query.jsonl --dry-run
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+from collections import OrderedDict
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DDL_PATH = os.path.join(ROOT, 'doc', 'cvsc_ddl.txt')
+MIGRATIONS_DIR = os.path.join(ROOT, 'database', 'migrations')
+
+# 宽列不作为键列或包含列，避免索引体积膨胀
+MAX_INCLUDE_COLUMNS = 6
+_KEYWORDS = {'where', 'on', 'left', 'right', 'inner', 'outer', 'join', 'group', 'order', 'with', 'as', 'cross', 'limit', 'union'}
+
+_CREATE_TABLE = re.compile(r"CREATE\s+TABLE\s+(?:[\w\[\]]+\.)*\[?(\w+)\]?\s*\((.*?)\n\);", re.IGNORECASE | re.DOTALL)
+_COLUMN = re.compile(r"^\s*(\w+)\s+(\w+)(?:\((\w+)(?:,\s*\d+)?\))?", re.IGNORECASE)
+_PRIMARY_KEY = re.compile(r"PRIMARY\s+KEY\s*\(([^)]*)\)", re.IGNORECASE)
+_UNIQUE = re.compile(r"CONSTRAINT\s+(\w+)\s+UNIQUE\s*\(([^)]*)\)", re.IGNORECASE)
+_CREATE_INDEX = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?(?:NONCLUSTERED\s+|CLUSTERED\s+)?INDEX\s+(\w+)\s+ON\s+(?:[\w\[\]]+\.)*\[?(\w+)\]?\s*\(([^)]*)\)"
+    r"(?:\s*INCLUDE\s*\(([^)]*)\))?", re.IGNORECASE
+)
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(?!\()(?:[\w\[\]]+\.)*\[?(\w+)\]?(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_PREDICATE = re.compile(
+    r"(?:(\w+)\.)?(\w+)\s*(=|>=|<=|<>|>|<|\bLIKE\b|\bBETWEEN\b)\s*(:\w+|'[^']*'|\d+(?:\.\d+)?|(?:\w+\.)?\w+)", re.IGNORECASE
+)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|\)|$)", re.IGNORECASE | re.DOTALL)
+_QUALIFIED = re.compile(r"\b(\w+)\.(\w+)\b")
+_CASE = re.compile(r"\bCASE\b.*?\bEND\b", re.IGNORECASE | re.DOTALL)
+
+def _split_columns(text):
+    """解析索引列列表，去掉 ASC/DESC"""
+    return [part.strip().split()[0].strip('[]').lower() for part in text.split(',') if part.strip()]
+
+def load_schema(ddl_path=DDL_PATH, migrations_dir=MIGRATIONS_DIR):
+    """从 DDL 文档与迁移脚本读取表的列定义和已有索引"""
+    sources = [ddl_path] + sorted(glob.glob(os.path.join(migrations_dir, '*.sql')))
+    tables = {}
+    for path in sources:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding='utf-8') as f:
+            sql = f.read()
+        for name, body in _CREATE_TABLE.findall(sql):
+            columns = OrderedDict()
+            for line in body.splitlines():
+                match = _COLUMN.match(line)
+                if match and match.group(1).upper() not in ('CONSTRAINT', 'PRIMARY', 'UNIQUE', 'FOREIGN'):
+                    columns[match.group(1).lower()] = {'type': match.group(2).lower(), 'max': (match.group(3) or '').upper() == 'MAX'}
+            table = tables.setdefault(name.lower(), {'columns': OrderedDict(), 'indexes': []})
+            table['columns'].update(columns)
+            pk = _PRIMARY_KEY.search(body)
+            if pk:
+                table['indexes'].append({'name': 'PK', 'keys': _split_columns(pk.group(1)), 'include': []})
+            for unique_name, keys in _UNIQUE.findall(body):
+                table['indexes'].append({'name': unique_name, 'keys': _split_columns(keys), 'include': []})
+        for name, table_name, keys, include in _CREATE_INDEX.findall(sql):
+            table = tables.setdefault(table_name.lower(), {'columns': OrderedDict(), 'indexes': []})
+            table['indexes'].append({'name': name, 'keys': _split_columns(keys), 'include': _split_columns(include or '')})
+    return tables
+
+def analyze_statement(sql, schema):
+    """分析一条语句：每个表的等值列、范围列、关联列、排序列和引用列"""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        table = table.lower()
+        if table not in schema:
+            continue
+        aliases[table] = table
+        if alias and alias.lower() not in _KEYWORDS:
+            aliases[alias.lower()] = table
+    tables = set(aliases.values())
+    if not tables:
+        return {}
+
+    usage = {table: {'equality': [], 'range': [], 'joins': [], 'order': [], 'referenced': set(), 'non_sargable': []} for table in tables}
+
+    def resolve(alias, column):
+        column = column.lower()
+        if alias:
+            table = aliases.get(alias.lower())
+            return (table, column) if table and column in schema[table]['columns'] else (None, None)
+        owners = [t for t in tables if column in schema[t]['columns']]
+        return (owners[0], column) if len(owners) == 1 else (None, None)
+
+    for alias, column in _QUALIFIED.findall(sql):
+        table, column = resolve(alias, column)
+        if table:
+            usage[table]['referenced'].add(column)
+
+    # CASE 表达式中的比较不是过滤条件
+    for alias, column, op, rhs in _PREDICATE.findall(_CASE.sub(" ", sql)):
+        table, column = resolve(alias or None, column)
+        if not table:
+            continue
+        usage[table]['referenced'].add(column)
+        op = op.upper()
+        rhs_is_column = not rhs.startswith((':', "'")) and not rhs[0].isdigit()
+        if rhs_is_column:
+            rhs_alias, _, rhs_column = rhs.rpartition('.')
+            rhs_table, rhs_column = resolve(rhs_alias or None, rhs_column)
+            if rhs_table and rhs_table != table and op == '=':
+                # 关联条件：记录对侧，任一侧已有索引即可走索引查找
+                usage[table]['joins'].append((column, rhs_table, rhs_column))
+                usage[rhs_table]['referenced'].add(rhs_column)
+            continue
+        if op == 'LIKE':
+            if rhs.startswith("'%") or rhs.startswith(':'):
+                usage[table]['non_sargable'].append(column)
+            continue
+        target = usage[table]['equality'] if op == '=' else usage[table]['range']
+        if column not in target:
+            target.append(column)
+
+    for match in _ORDER_BY.findall(sql):
+        for part in match.split(','):
+            ref = part.strip().split()[0] if part.strip() else ''
+            alias, _, column = ref.rpartition('.')
+            table, column = resolve(alias or None, column)
+            if table and column not in usage[table]['order']:
+                usage[table]['order'].append(column)
+    return usage
+
+def _covered(keys, indexes):
+    """已有索引的键列以推荐键列为前缀时视为已覆盖"""
+    return any(index['keys'][:len(keys)] == keys for index in indexes)
+
+def recommend(statements, schema):
+    """根据语句集合生成索引推荐，statements 为 [{'statement', 'calls', 'total_ms'}]"""
+    candidates = OrderedDict()
+    notes = []
+
+    def add(table, keys, include, stmt):
+        if not keys or _covered(keys, schema[table]['indexes']):
+            return
+        key = (table, tuple(keys))
+        entry = candidates.setdefault(key, {'table': table, 'keys': list(keys), 'include': set(), 'statements': [], 'weight_ms': 0.0})
+        entry['include'].update(include)
+        entry['statements'].append(stmt['statement'])
+        entry['weight_ms'] += stmt.get('total_ms', 0.0)
+
+    for stmt in statements:
+        usage = analyze_statement(stmt['statement'], schema)
+        for table, info in usage.items():
+            columns = schema[table]['columns']
+            pk = next((index['keys'] for index in schema[table]['indexes'] if index['name'] == 'PK'), [])
+            for column in info['non_sargable']:
+                notes.append(f"{table}.{column}: 前导通配符 LIKE 无法使用索引（已由内存索引 / 汇总表承担）")
+            # 过滤索引：等值列在前，范围列（或排序列）在后
+            keys = [c for c in info['equality'] if c not in pk]
+            trailing = info['range'][:1] or [c for c in info['order'][:1] if keys]
+            keys += [c for c in trailing if c not in keys and c not in pk]
+            include = [
+                c for c in sorted(info['referenced'])
+                if c not in keys and c not in pk and not columns.get(c, {}).get('max')
+            ][:MAX_INCLUDE_COLUMNS]
+            add(table, keys, include, stmt)
+            # 关联索引：两侧都没有以关联列开头的索引时，为两侧分别推荐
+            for column, other_table, other_column in info['joins']:
+                if _covered([other_column], schema[other_table]['indexes']) or _covered([column], schema[table]['indexes']):
+                    continue
+                add(table, [column], [], stmt)
+                add(other_table, [other_column], [], stmt)
+
+    # 合并：键列是另一推荐前缀的，并入更长的推荐
+    merged = sorted(candidates.values(), key=lambda c: -len(c['keys']))
+    result = []
+    for entry in merged:
+        target = next((r for r in result if r['table'] == entry['table'] and r['keys'][:len(entry['keys'])] == entry['keys']), None)
+        if target:
+            target['include'].update(entry['include'])
+            target['statements'].extend(entry['statements'])
+            target['weight_ms'] += entry['weight_ms']
+        else:
+            result.append(entry)
+    for entry in result:
+        entry['include'] = sorted(entry['include'] - set(entry['keys']))
+        entry['name'] = f"IX_{entry['table']}_{'_'.join(entry['keys'])}"
+        entry['redundant'] = [
+            index['name'] for index in schema[entry['table']]['indexes']
+            if index['name'] != 'PK' and entry['keys'][:len(index['keys'])] == index['keys'] and len(index['keys']) < len(entry['keys'])
+        ]
+    return sorted(result, key=lambda r: -r['weight_ms']), sorted(set(notes))
+
+def load_slow_log(path):
+    """读取慢查询日志（JSON 行）并按语句聚合"""
+    stats = OrderedDict()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            stat = stats.setdefault(entry['statement'], {'statement': entry['statement'], 'calls': 0, 'total_ms': 0.0})
+            stat['calls'] += 1
+            stat['total_ms'] += entry.get('elapsed_ms', 0.0)
+    return list(stats.values())
+
+def index_ddl(rec, dialect='mssql', online=False):
+    """生成建索引语句；SQLite 无 INCLUDE，包含列追加到键列之后；online 仅 SQL Server Enterprise/Developer 版支持"""
+    if dialect == 'sqlite':
+        columns = rec['keys'] + rec['include']
+        return f"CREATE INDEX IF NOT EXISTS {rec['name']} ON {rec['table']} ({', '.join(columns)});"
+    include = f"\n\tINCLUDE ({', '.join(rec['include'])})" if rec['include'] else ''
+    options = "\n\tWITH (ONLINE = ON)" if online else ''
+    return f"CREATE NONCLUSTERED INDEX {rec['name']} ON UNIONDEV.dbo.{rec['table']} ({', '.join(rec['keys'])}){include}{options};"
+
+def next_migration_path(slug, migrations_dir=MIGRATIONS_DIR):
+    """下一个迁移脚本编号"""
+    numbers = [int(os.path.basename(p)[:3]) for p in glob.glob(os.path.join(migrations_dir, '[0-9][0-9][0-9]_*.sql'))]
+    return os.path.join(migrations_dir, f"{max(numbers, default=0) + 1:03d}_{slug}.sql")
+
+def render_migration(recommendations, notes, before=None, after=None, dataset=None, online=False):
+    """渲染迁移脚本文本"""
+    lines = [
+        f"-- 索引顾问生成于 {datetime.now():%Y-%m-%d %H:%M}（python -m benchmarks.index_advisor{' --online' if online else ''}）",
+        "--",
+        "-- 依据 run_query 采集到的语句分析谓词与关联条件，推荐以下覆盖索引。",
+    ]
+    if online:
+        lines.append("-- 使用 WITH (ONLINE = ON) 在线建索引：仅 SQL Server Enterprise/Developer 版支持，Standard 版执行会失败。")
+    else:
+        lines.append("-- 离线建索引，建索引期间会阻塞表上的写入，请在低峰期执行；Enterprise/Developer 版可加 --online 生成在线建索引脚本。")
+    if before and after:
+        lines += ["--", f"-- 本地替身库基准（{dataset}）：建索引前 -> 建索引后", f"-- {'查询':<36}{'p50(ms)':>20}{'p95(ms)':>20}"]
+        for name, stat in before.items():
+            if name in after:
+                lines.append(
+                    f"-- {name:<36}{stat['p50_ms']:>9.2f} -> {after[name]['p50_ms']:<8.2f}{stat['p95_ms']:>9.2f} -> {after[name]['p95_ms']:<8.2f}"
+                )
+    if notes:
+        lines += ["--", "-- 说明："] + [f"--   {note}" for note in notes]
+    lines.append("")
+    for rec in recommendations:
+        lines.append(f"-- {rec['table']}：{len(rec['statements'])} 条语句受益，累计耗时 {rec['weight_ms']:.0f} ms")
+        for stmt in sorted(set(rec['statements']))[:3]:
+            lines.append(f"--   {stmt[:150]}")
+        if rec['redundant']:
+            lines.append(f"--   创建后 {', '.join(rec['redundant'])} 成为冗余索引，可在确认无其他依赖后删除")
+        lines.append(index_ddl(rec, online=online))
+        lines.append("")
+    return "\n".join(lines)
+
+def capture_workload_statements(scale, data_dir, iterations, seed):
+    """在本地替身库上运行基准查询，返回剖析器采集到的语句与基准结果"""
+    from benchmarks.query_benchmark import ensure_dataset, use_dataset, build_workloads, run_workload
+    from database.profiler import profiler
+
+    path, meta = ensure_dataset(scale, data_dir, seed)
+    use_dataset(path)
+    profiler.reset()
+    workloads = build_workloads(path, meta, random.Random(seed))
+    results = {name: run_workload(func, iterations, 1) for name, func in workloads.items()}
+    return profiler.top_statements(limit=1000), results, path, meta
+
+def benchmark_with_indexes(path, meta, recommendations, iterations, seed):
+    """复制数据集并创建推荐索引后重新运行基准"""
+    import sqlite3
+    from benchmarks.query_benchmark import use_dataset, build_workloads, run_workload
+
+    work_dir = tempfile.mkdtemp(prefix='cvsc_index_advisor_')
+    copy_path = os.path.join(work_dir, os.path.basename(path))
+    shutil.copyfile(path, copy_path)
+    try:
+        conn = sqlite3.connect(copy_path)
+        try:
+            for rec in recommendations:
+                conn.execute(index_ddl(rec, dialect='sqlite'))
+            conn.execute("ANALYZE")
+            conn.commit()
+        finally:
+            conn.close()
+        use_dataset(copy_path)
+        workloads = build_workloads(copy_path, meta, random.Random(seed))
+        return {name: run_workload(func, iterations, 1) for name, func in workloads.items()}
+    finally:
+        use_dataset(path)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="索引顾问：根据采集的语句生成索引迁移脚本")
+    parser.add_argument("--scale", default='1m', help="本地替身库数据集档位（见 benchmarks.query_benchmark）")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--slow-log", help="额外分析的慢查询日志（SLOW_QUERY_LOG_PATH 输出）")
+    parser.add_argument("--slug", default="advisor_indexes", help="迁移脚本文件名后缀")
+    parser.add_argument("--dry-run", action="store_true", help="只打印，不写迁移脚本")
+    parser.add_argument("--online", action="store_true", help="生成 WITH (ONLINE = ON)（仅 SQL Server Enterprise/Developer 版支持）")
+    args = parser.parse_args()
+
+    schema = load_schema()
+    statements, before, path, meta = capture_workload_statements(args.scale, args.data_dir, args.iterations, args.seed)
+    if args.slow_log:
+        statements += load_slow_log(args.slow_log)
+
+    recommendations, notes = recommend(statements, schema)
+    if not recommendations:
+        print("现有索引已覆盖采集到的语句，无需新增索引")
+        return
+
+    after = benchmark_with_indexes(path, meta, recommendations, args.iterations, args.seed)
+    dataset = f"{args.scale}，{meta['counts']['detail_rows']} 条明细"
+    script = render_migration(recommendations, notes, before, after, dataset, online=args.online)
+    if args.dry_run:
+        print(script)
+        return
+    output = next_migration_path(args.slug)
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(script)
+    print(script)
+    print(f"迁移脚本已写入：{output}")
+
+if __name__ == "__main__":
+    main()
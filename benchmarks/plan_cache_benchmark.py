@@ -0,0 +1,117 @@
+"""
+执行计划缓存基准测试：统计旧版字面量时间筛选与新版参数化查询下发到 SQL Server 的语句编译次数
+
+SQL Server 按 (语句文本, 参数声明) 缓存执行计划，本脚本不连接数据库，
+而是截获查询层下发的语句，按 mssql+pyodbc 方言编译后统计不同缓存键的数量。
+
+运行方式：
+    python -m benchmarks.plan_cache_benchmark --views 500
+"""
+import argparse
+import random
+import pandas as pd
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from sqlalchemy.dialects.mssql import pyodbc as mssql_pyodbc
+
+import database.queries as queries
+from database.statements import get_statement_stats, clear_statements
+
+DIALECT = mssql_pyodbc.dialect()
+TIME_RANGES = [timedelta(hours=12), timedelta(hours=24), timedelta(days=3), timedelta(days=7)]
+
+def legacy_time_filter_sql(start_time, end_time):
+    """旧版实现：时间字面量直接拼入SQL"""
+    return f"AND m.collection_time BETWEEN '{start_time.strftime('%Y-%m-%d %H:%M:%S')}' AND '{end_time.strftime('%Y-%m-%d %H:%M:%S')}'"
+
+def legacy_query_vital_signs(patient_id, start_time, end_time):
+    """旧版实现：每次构建新的语句文本"""
+    sql = f"""
+    SELECT m.collection_time, d.standard_field_id, d.standard_field_value
+    FROM cvsc_sign_main m
+    JOIN cvsc_sign_detail d ON m.id = d.vital_sign_data_id
+    WHERE m.patient_id = :pid
+    {legacy_time_filter_sql(start_time, end_time)}
+    ORDER BY m.collection_time DESC, d.standard_field_id
+    """
+    return queries.run_query(sql, {"pid": patient_id})
+
+def legacy_search_patients(keyword):
+    """旧版实现：检索语句不带参数类型声明"""
+    sql = """
+        SELECT TOP 100
+            m.patient_id, m.patient_name, m.sex, m.age,
+            m.bed_no, m.collection_location, m.patient_type,
+            MAX(m.collection_time) as last_time
+        FROM cvsc_sign_main m
+        WHERE 1=1 AND m.patient_id LIKE :pid AND (m.patient_name LIKE :name OR m.patient_id LIKE :name)
+        GROUP BY m.patient_id, m.patient_name, m.sex, m.age, m.bed_no, m.collection_location, m.patient_type ORDER BY last_time DESC
+    """
+    return queries.run_query(sql, {'pid': f"%{keyword}%", 'name': f"%{keyword}%"})
+
+def plan_cache_key(stmt, params):
+    """计算 SQL Server 计划缓存键：编译后的语句文本 + 参数声明"""
+    if isinstance(stmt, str):
+        stmt = text(stmt)
+    compiled = stmt.compile(dialect=DIALECT)
+    declared = []
+    for key in sorted(params):
+        bind = compiled.binds.get(key)
+        if bind is not None and not bind.type._isnull:
+            declared.append((key, repr(bind.type)))
+        else:
+            # 未声明类型的字符串参数由驱动按实际长度声明，例如 nvarchar(5)
+            declared.append((key, f"untyped:{type(params[key]).__name__}:{len(str(params[key]))}"))
+    return str(compiled), tuple(declared)
+
+def simulate(views, legacy, seed=42):
+    """模拟多次患者详情查看与检索，返回 (执行次数, 编译次数)"""
+    rng = random.Random(seed)
+    captured = []
+
+    def capture(query, params=None):
+        captured.append((query, dict(params or {})))
+        return pd.DataFrame()
+
+    original_run_query = queries.run_query
+    queries.run_query = capture
+    try:
+        now = datetime(2025, 12, 1, 8, 0, 0)
+        for _ in range(views):
+            now += timedelta(seconds=rng.randint(1, 30))
+            pid = f"P{rng.randint(1, 200):05d}"
+            start_t = now - rng.choice(TIME_RANGES)
+            keyword = str(rng.randint(1, 10 ** rng.randint(1, 6)))
+            if legacy:
+                legacy_query_vital_signs(pid, start_t, now)
+                legacy_search_patients(keyword)
+            else:
+                queries.query_vital_signs_paginated(pid, start_t, now)
+                queries.query_vital_signs_page(pid, start_t, now)
+                queries.search_patients(name=keyword, pid=keyword)
+    finally:
+        queries.run_query = original_run_query
+    keys = {plan_cache_key(stmt, params) for stmt, params in captured}
+    return len(captured), len(keys)
+
+def main():
+    parser = argparse.ArgumentParser(description="执行计划缓存编译次数对比")
+    parser.add_argument("--views", type=int, default=500, help="模拟的页面查看次数")
+    args = parser.parse_args()
+
+    clear_statements()
+    legacy_exec, legacy_compiles = simulate(args.views, legacy=True)
+    clear_statements()
+    new_exec, new_compiles = simulate(args.views, legacy=False)
+
+    print(f"{'方案':<12}{'执行次数':>10}{'编译次数':>10}{'计划复用率':>12}")
+    for label, executed, compiles in [("旧版字面量", legacy_exec, legacy_compiles), ("参数化+注册表", new_exec, new_compiles)]:
+        reuse = (1 - compiles / executed) * 100 if executed else 0
+        print(f"{label:<12}{executed:>10}{compiles:>10}{reuse:>11.1f}%")
+
+    print("\n语句注册表复用次数：")
+    for name, uses in sorted(get_statement_stats().items()):
+        print(f"  {name:<40}{uses:>8}")
+
+if __name__ == "__main__":
+    main()
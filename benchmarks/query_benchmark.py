@@ -0,0 +1,273 @@
+"""
+查询层基准测试：在合成数据集（本地 SQLite 替身库）上运行 database/queries.py 的主要查询，
+统计 p50/p95 延迟、行吞吐、峰值 RSS 和结果 DataFrame 内存，并保存 JSON 结果便于版本间对比。
+时间相关的查询以数据集生成时间为"当前时间"，体征查询只抽取在对应时间窗口内有采集记录的患者。
+峰值 RSS 按查询分别统计：Linux 下每个查询开始前重置进程峰值（/proc/self/clear_refs），其他平台记录进程峰值的增量。
+
+数据集按明细行数分档（1m / 10m / 50m），首次运行时生成并缓存在 data/ 目录下：
+    python -m benchmarks.query_benchmark --scale 1m
+    python -m benchmarks.query_benchmark --scale 10m --iterations 50 --baseline benchmarks/results/xxx.json
+"""
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from config import config
+from benchmarks.synthetic_dataset import generate, SCHEMA_SQL, TIME_FORMAT
+
+try:
+    import resource
+except ImportError:  # Windows 无 resource 模块，不统计 RSS
+    resource = None
+
+# 明细行数分档；按实测 30 天数据集每患者每天约 14 条明细（默认病区构成、住院期最长 14 天）推算患者数
+SCALES = {
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+    '50m': 50_000_000,
+}
+DETAIL_ROWS_PER_PATIENT_DAY = 14
+DATASET_DAYS = 30
+PATIENTS_PER_DEVICE = 4
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+def dataset_params(detail_rows, days=DATASET_DAYS):
+    """按目标明细行数推算生成参数"""
+    patients = max(10, int(detail_rows / (DETAIL_ROWS_PER_PATIENT_DAY * days)))
+    return {'patients': patients, 'devices': max(7, patients // PATIENTS_PER_DEVICE), 'days': days}
+
+def ensure_dataset(scale, data_dir, seed=42):
+    """返回数据集路径与元数据，不存在或参数不一致时重新生成"""
+    params = dataset_params(SCALES[scale])
+    # 表结构变化（新增列、新表）时重新生成
+    schema = hashlib.sha1(SCHEMA_SQL.encode('utf-8')).hexdigest()[:12]
+    path = os.path.join(data_dir, f"bench_{scale}.db")
+    meta_path = path + '.json'
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('params') == params and meta.get('seed') == seed and meta.get('schema') == schema:
+            return path, meta
+
+    print(f"生成数据集 {path}：{params} ...")
+    started = time.perf_counter()
+    counts = generate(path, seed=seed, **params)
+    meta = {
+        'params': params, 'seed': seed, 'schema': schema, 'counts': counts,
+        'generated_at': datetime.now().replace(second=0, microsecond=0).isoformat(),
+        'generate_seconds': round(time.perf_counter() - started, 1),
+    }
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return path, meta
+
+def use_dataset(path):
+    """将查询层切换到指定的 SQLite 数据集"""
+    config.DB_BACKEND = 'sqlite'
+    config.SQLITE_PATH = path
+    from database.connection import get_db_engine
+    from database.dialect import adapt_sql
+    from database.statements import clear_statements
+    get_db_engine.clear()
+    adapt_sql.cache_clear()
+    clear_statements()
+
+def process_peak_rss_mb():
+    """进程生命周期内的峰值 RSS（MB），只增不减"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def reset_peak_rss():
+    """重置进程峰值 RSS（Linux 写入 /proc/self/clear_refs），不支持时返回 False"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def current_peak_rss_mb():
+    """上次重置以来的峰值 RSS（MB），读取 /proc/self/status 的 VmHWM"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def frame_rows_and_bytes(result):
+    """统计查询结果的行数和 DataFrame 内存"""
+    if isinstance(result, tuple):
+        result = result[0]
+    if isinstance(result, pd.DataFrame):
+        return len(result), int(result.memory_usage(index=True, deep=True).sum())
+    return 1 if result else 0, 0
+
+def build_workloads(path, meta, rng):
+    """构建各查询的调用函数，参数从数据集中随机抽样"""
+    import database.queries as queries
+
+    now = datetime.fromisoformat(meta['generated_at'])
+    conn = sqlite3.connect(path)
+    try:
+        patients = [row[0] for row in conn.execute("SELECT patient_id FROM cvsc_patient_latest")]
+        locations = [row[0] for row in conn.execute("SELECT DISTINCT collection_location FROM cvsc_patient_latest")]
+
+        def active_patients(window):
+            """窗口内有采集记录的患者，偏向采集密集的 ICU 患者，更接近线上慢查询"""
+            sql = "SELECT DISTINCT patient_id FROM cvsc_sign_main WHERE collection_time >= ? AND collection_time <= ? AND patient_id IS NOT NULL"
+            params = ((now - window).strftime(TIME_FORMAT), now.strftime(TIME_FORMAT))
+            icu = sorted(row[0] for row in conn.execute(sql + " AND collection_location = 'ICU'", params))
+            return icu or sorted(row[0] for row in conn.execute(sql, params))
+
+        # 抽样池按窗口分别构建，避免测量空结果查询
+        vitals_24h = active_patients(timedelta(hours=24))
+        vitals_7d = active_patients(timedelta(days=7))
+    finally:
+        conn.close()
+    if not vitals_24h or not vitals_7d:
+        raise RuntimeError("数据集在生成时间之前的 24 小时或 7 天内没有采集记录，无法构建体征查询负载")
+
+    def keyword_search():
+        keyword = rng.choice(patients)[-4:]
+        return queries.search_patients(name=keyword, pid=keyword)
+
+    def uncached(func, **kwargs):
+        """绕过 st.cache_data，测量真实查询耗时"""
+        def call():
+            func.clear()
+            return func(**kwargs)
+        return call
+
+    return {
+        'search_patients:keyword': keyword_search,
+        'search_patients:location': lambda: queries.search_patients(location=rng.choice(locations)),
+        'query_vital_signs_paginated:24h': lambda: queries.query_vital_signs_paginated(rng.choice(vitals_24h), now - timedelta(hours=24), now),
+        'query_vital_signs_paginated:7d': lambda: queries.query_vital_signs_paginated(rng.choice(vitals_7d), now - timedelta(days=7), now),
+        'query_vital_signs_page:7d': lambda: queries.query_vital_signs_page(rng.choice(vitals_7d), now - timedelta(days=7), now),
+        'get_patient_basic_info': lambda: queries.get_patient_basic_info(rng.choice(patients)),
+        'get_overview_stats': uncached(queries.get_overview_stats, now=now),
+        'get_location_stats': uncached(queries.get_location_stats, now=now),
+        'get_field_mappings': queries.get_field_mappings,
+        'get_standard_fields': uncached(queries.get_standard_fields),
+        'get_device_models': uncached(queries.get_device_models),
+        'get_mapping_stats': queries.get_mapping_stats,
+    }
+
+def run_workload(func, iterations, warmup):
+    """执行一个查询若干次，返回统计结果"""
+    for _ in range(warmup):
+        func()
+    gc.collect()
+    # 峰值 RSS 只统计本查询：能重置时取重置后的峰值，否则取进程峰值的增量
+    resettable = reset_peak_rss()
+    process_peak = process_peak_rss_mb()
+    latencies, rows, nbytes = [], 0, []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = func()
+        latencies.append((time.perf_counter() - started) * 1000)
+        n, b = frame_rows_and_bytes(result)
+        rows += n
+        nbytes.append(b)
+    latencies = np.array(latencies)
+    total_seconds = latencies.sum() / 1000
+    return {
+        'iterations': iterations,
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'max_ms': round(float(latencies.max()), 3),
+        'rows_per_call': round(rows / iterations, 1),
+        'rows_per_sec': round(rows / total_seconds, 1) if total_seconds else None,
+        'frame_bytes_mean': int(np.mean(nbytes)),
+        'frame_bytes_max': int(np.max(nbytes)),
+        'peak_rss_mb': current_peak_rss_mb() if resettable else None,
+        'peak_rss_growth_mb': round(process_peak_rss_mb() - process_peak, 1) if process_peak is not None else None,
+    }
+
+def git_revision():
+    """当前代码版本"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, dataset):
+    """与基线结果对比，打印 p50/p95 变化"""
+    print(f"\n与基线 {baseline.get('revision')} 对比：")
+    if baseline.get('dataset', {}).get('params') != dataset.get('params'):
+        print("注意：基线使用的数据集参数不同，结果仅供参考")
+    print(f"{'查询':<36}{'p50 变化':>12}{'p95 变化':>12}")
+    for name, stat in results.items():
+        base = baseline.get('workloads', {}).get(name)
+        if not base:
+            continue
+        delta = lambda key: (stat[key] - base[key]) / base[key] * 100 if base[key] else 0.0
+        print(f"{name:<36}{delta('p50_ms'):>+11.1f}%{delta('p95_ms'):>+11.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="查询层基准测试")
+    parser.add_argument("--scale", choices=sorted(SCALES), default='1m', help="数据集明细行数档位")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--only", nargs='*', help="只运行指定的查询")
+    parser.add_argument("--data-dir", default=os.path.join("data"))
+    parser.add_argument("--output", help="结果 JSON 路径（默认 benchmarks/results/）")
+    parser.add_argument("--baseline", help="用于对比的历史结果 JSON")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    path, meta = ensure_dataset(args.scale, args.data_dir, args.seed)
+    use_dataset(path)
+    workloads = build_workloads(path, meta, random.Random(args.seed))
+    if args.only:
+        workloads = {name: func for name, func in workloads.items() if name in args.only}
+
+    print(f"数据集 {path}：{meta['counts']['main_rows']} 条主记录，{meta['counts']['detail_rows']} 条明细")
+    print(f"{'查询':<36}{'p50(ms)':>10}{'p95(ms)':>10}{'行/秒':>12}{'结果内存(KB)':>14}{'峰值RSS(MB)':>13}{'峰值增长(MB)':>14}")
+    results = {}
+    for name, func in workloads.items():
+        stat = run_workload(func, args.iterations, args.warmup)
+        results[name] = stat
+        print(f"{name:<36}{stat['p50_ms']:>10.2f}{stat['p95_ms']:>10.2f}{stat['rows_per_sec'] or 0:>12.0f}"
+              f"{stat['frame_bytes_max'] / 1024:>14.1f}{stat['peak_rss_mb'] or 0:>13.1f}{stat['peak_rss_growth_mb'] or 0:>14.1f}")
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'scale': args.scale,
+        'dataset': meta,
+        'environment': {'python': platform.python_version(), 'pandas': pd.__version__, 'platform': platform.platform()},
+        'iterations': args.iterations,
+        'workloads': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"query_benchmark_{args.scale}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存：{output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare(results, json.load(f), meta)
+
+if __name__ == "__main__":
+    main()
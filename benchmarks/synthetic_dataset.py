@@ -0,0 +1,441 @@
+"""
+CVSC 合成数据集生成器：在本地 SQLite 文件中创建完整表结构（对应 doc/cvsc_ddl.txt 与 database/migrations）
+并按 N 位患者、M 台设备、K 天生成采集数据，采样频率按病区区分（ICU 15 分钟一次，普通病房 4 小时一次等）。
+
+生成后以本地替身库运行应用：
+    python -m benchmarks.synthetic_dataset --patients 500 --devices 60 --days 7 --out data/cvsc_local.db
+    DB_BACKEND=sqlite SQLITE_PATH=data/cvsc_local.db streamlit run app.py
+"""
+import argparse
+import os
+import sqlite3
+import time
+import numpy as np
+from datetime import datetime, timedelta
+
+# 与 SQLAlchemy SQLite DateTime 类型的存储格式一致，保证类型化参数按文本比较时顺序正确
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+SCHEMA_SQL = """
+CREATE TABLE cvsc_device_model_config (
+    id INTEGER PRIMARY KEY,
+    model_name NVARCHAR(100) NOT NULL UNIQUE,
+    manufacturer NVARCHAR(100) NOT NULL
+);
+CREATE TABLE cvsc_standard_sign_config (
+    id INTEGER PRIMARY KEY,
+    field_name NVARCHAR(50) NOT NULL UNIQUE,
+    description NVARCHAR(200),
+    unit NVARCHAR(20),
+    data_type NVARCHAR(20) NOT NULL,
+    normal_range_low FLOAT,
+    normal_range_high FLOAT,
+    warning_threshold FLOAT,
+    category_code VARCHAR(20),
+    category_name NVARCHAR(50)
+);
+CREATE TABLE cvsc_device_field_rel (
+    id INTEGER PRIMARY KEY,
+    model_id INT NOT NULL REFERENCES cvsc_device_model_config(id),
+    standard_field_id INT NOT NULL REFERENCES cvsc_standard_sign_config(id),
+    device_field_name NVARCHAR(50) NOT NULL,
+    conversion_formula NVARCHAR(200),
+    UNIQUE (model_id, standard_field_id)
+);
+CREATE TABLE cvsc_sign_main (
+    id INTEGER PRIMARY KEY,
+    id_type NVARCHAR(20),
+    id_number NVARCHAR(50),
+    patient_type NVARCHAR(20),
+    patient_id NVARCHAR(50),
+    patient_name NVARCHAR(50),
+    sex NVARCHAR(5),
+    age NVARCHAR(5),
+    phone NVARCHAR(20),
+    hospital_id NVARCHAR(20),
+    endemic_area NVARCHAR(20),
+    device_id INT NOT NULL,
+    collection_time DATETIME NOT NULL,
+    collection_location NVARCHAR(50),
+    collector NVARCHAR(50),
+    data_status NVARCHAR(20),
+    data_quality TINYINT,
+    remarks NVARCHAR(200),
+    pdf_url NVARCHAR(500),
+    create_time DATETIME NOT NULL,
+    bed_no NVARCHAR(50),
+    visit_identifier NVARCHAR(50)
+);
+CREATE TABLE cvsc_sign_detail (
+    id INTEGER PRIMARY KEY,
+    vital_sign_data_id INT NOT NULL REFERENCES cvsc_sign_main(id),
+    standard_field_id INT NOT NULL REFERENCES cvsc_standard_sign_config(id),
+    standard_field_value NVARCHAR,
+    original_device_value NVARCHAR,
+    detail_collection_time DATETIME,
+    standard_field_num REAL
+);
+CREATE TABLE mr_monitor_info (
+    id INTEGER PRIMARY KEY,
+    monitor_name VARCHAR(255),
+    monitor_code VARCHAR(255),
+    frequency VARCHAR(255),
+    operator VARCHAR(255),
+    operate_time DATETIME,
+    ward_code VARCHAR(50),
+    ward_name VARCHAR(255),
+    hosp_code VARCHAR(50),
+    hosp_name VARCHAR(255),
+    monitor_status VARCHAR(50),
+    update_time DATETIME,
+    update_by VARCHAR(255),
+    monitor_ip VARCHAR(20),
+    dagnq_ward_code VARCHAR(50),
+    dagnq_ward_name VARCHAR(255),
+    remark VARCHAR(500),
+    mac VARCHAR(50),
+    modelID INT,
+    use_status VARCHAR(20)
+);
+CREATE TABLE mr_monitor_bind_records (
+    id INTEGER PRIMARY KEY,
+    monitor_id INT,
+    monitor_name VARCHAR(255),
+    monitor_code VARCHAR(255),
+    frequency VARCHAR(255),
+    ward_code VARCHAR(255),
+    ward_name VARCHAR(255),
+    hosp_code VARCHAR(255),
+    hosp_name VARCHAR(255),
+    bed_number VARCHAR(10),
+    pat_name VARCHAR(255),
+    inhosp_no VARCHAR(255),
+    inhosp_status VARCHAR(10),
+    device_status VARCHAR(10),
+    start_time DATETIME,
+    start_by VARCHAR(255),
+    end_time DATETIME,
+    end_by VARCHAR(255),
+    inhosp_serial_no VARCHAR(50)
+);
+CREATE TABLE cvsc_patient_latest (
+    patient_id NVARCHAR(50) NOT NULL PRIMARY KEY,
+    patient_name NVARCHAR(50),
+    sex NVARCHAR(5),
+    age NVARCHAR(5),
+    hospital_id NVARCHAR(20),
+    bed_no NVARCHAR(50),
+    collection_location NVARCHAR(50),
+    patient_type NVARCHAR(20),
+    last_main_id INT NOT NULL,
+    last_time DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL
+);
+CREATE TABLE cvsc_sign_range_band (
+    id INTEGER PRIMARY KEY,
+    standard_field_id INT NOT NULL REFERENCES cvsc_standard_sign_config(id),
+    sex NVARCHAR(5),
+    age_min INT,
+    age_max INT,
+    normal_range_low FLOAT,
+    normal_range_high FLOAT,
+    warning_threshold FLOAT,
+    remarks NVARCHAR(200),
+    updated_at DATETIME
+);
+CREATE TABLE cvsc_summary_watermark (
+    name NVARCHAR(50) NOT NULL PRIMARY KEY,
+    last_id INT NOT NULL,
+    updated_at DATETIME NOT NULL
+);
+CREATE TABLE cvsc_renormalize_job (
+    id INTEGER PRIMARY KEY,
+    mapping_id INT NOT NULL,
+    model_id INT NOT NULL,
+    standard_field_id INT NOT NULL,
+    conversion_formula NVARCHAR(200),
+    status NVARCHAR(20) NOT NULL,
+    last_id INT NOT NULL DEFAULT 0,
+    max_id INT NOT NULL,
+    rows_scanned INT NOT NULL DEFAULT 0,
+    rows_updated INT NOT NULL DEFAULT 0,
+    error NVARCHAR(500),
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL
+);
+"""
+
+# 与生产库一致的二级索引（含 migrations/001 新增的明细外键索引、005 新增的明细字段索引）
+INDEX_SQL = """
+CREATE INDEX IX_cvsc_sign_main_collection_time ON cvsc_sign_main (collection_time);
+CREATE INDEX IX_cvsc_sign_main_device_id ON cvsc_sign_main (device_id);
+CREATE INDEX IX_cvsc_sign_main_device_id_collection_time ON cvsc_sign_main (device_id, collection_time);
+CREATE INDEX IX_cvsc_sign_main_id_number ON cvsc_sign_main (id_number);
+CREATE INDEX IX_cvsc_sign_main_patient_id ON cvsc_sign_main (patient_id);
+CREATE INDEX IX_cvsc_sign_main_patient_type ON cvsc_sign_main (patient_type);
+CREATE INDEX IX_cvsc_sign_detail_vital_sign_data_id ON cvsc_sign_detail (vital_sign_data_id, standard_field_id);
+CREATE INDEX IX_cvsc_sign_detail_standard_field_id ON cvsc_sign_detail (standard_field_id, id, vital_sign_data_id);
+CREATE INDEX IX_cvsc_patient_latest_last_time ON cvsc_patient_latest (last_time DESC);
+CREATE INDEX IX_cvsc_patient_latest_location ON cvsc_patient_latest (collection_location, last_time DESC);
+"""
+
+SUMMARY_SQL = """
+INSERT INTO cvsc_patient_latest
+    (patient_id, patient_name, sex, age, hospital_id, bed_no, collection_location, patient_type, last_main_id, last_time, updated_at)
+SELECT patient_id, patient_name, sex, age, hospital_id, bed_no, collection_location, patient_type, id, collection_time, :now
+FROM (
+    SELECT m.*, ROW_NUMBER() OVER (PARTITION BY m.patient_id ORDER BY m.collection_time DESC, m.id DESC) AS rn
+    FROM cvsc_sign_main m
+    WHERE m.patient_id IS NOT NULL
+) t
+WHERE rn = 1;
+"""
+
+# (字段名, 描述, 单位, 正常下限, 正常上限, 危急阈值, 均值, 标准差, 小数位)
+STANDARD_FIELDS = [
+    ('temperature', '体温', '℃', 36.0, 37.3, 39.0, 36.8, 0.35, 1),
+    ('heart_rate', '心率', '次/分', 60, 100, 130, 80, 11, 0),
+    ('respiratory_rate', '呼吸', '次/分', 12, 20, 30, 17, 2.5, 0),
+    ('systolic_bp', '收缩压', 'mmHg', 90, 140, 180, 122, 14, 0),
+    ('diastolic_bp', '舒张压', 'mmHg', 60, 90, 110, 77, 9, 0),
+    ('spo2', '血氧饱和度', '%', 95, 100, None, 97.6, 1.4, 0),
+]
+
+# 与 migrations/004 一致的初始分段：(字段名, 性别, 年龄下限, 年龄上限, 正常下限, 正常上限, 危急阈值, 说明)
+RANGE_BANDS = [
+    ('heart_rate', None, 0, 1, 100, 160, 180, '婴儿心率'),
+    ('heart_rate', None, 1, 12, 70, 120, 160, '儿童心率'),
+    ('respiratory_rate', None, 0, 1, 30, 60, 70, '婴儿呼吸'),
+    ('respiratory_rate', None, 1, 12, 18, 30, 40, '儿童呼吸'),
+    ('systolic_bp', None, 65, None, 90, 150, 180, '老年收缩压'),
+]
+
+# (型号, 厂商, 各标准字段对应的设备字段名, 体温是否以华氏度上报)
+DEVICE_MODELS = [
+    ('BeneVision N12', '迈瑞', ['TEMP', 'HR', 'RR', 'NIBP_S', 'NIBP_D', 'SpO2'], False),
+    ('IntelliVue MX450', '飞利浦', ['Temp', 'Pulse', 'Resp', 'NBPs', 'NBPd', 'SpO2'], True),
+    ('iM50', '理邦', ['T1', 'HR', 'RESP', 'SYS', 'DIA', 'SPO2'], False),
+]
+
+# (病区, 就诊类型, 采样间隔分钟, 患者占比)
+WARDS = [
+    ('ICU', '住院', 15, 0.08),
+    ('内科', '住院', 240, 0.22),
+    ('外科', '住院', 240, 0.20),
+    ('儿科', '住院', 240, 0.12),
+    ('妇产科', '住院', 360, 0.10),
+    ('急诊科', '急诊', 60, 0.15),
+    ('门诊', '门诊', 0, 0.13),
+]
+
+SURNAMES = list("王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘蒋蔡余杜叶程苏魏吕丁任沈")
+GIVEN = list("伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀兰霞平刚桂英华玉萍红娥玲芬燕彬斌宇浩凯健俊帆鹏辉")
+
+def create_schema(conn):
+    """创建表结构"""
+    conn.executescript(SCHEMA_SQL)
+
+def create_indexes(conn):
+    """创建二级索引（数据加载完成后创建更快）"""
+    conn.executescript(INDEX_SQL)
+
+def _fmt(ts):
+    return ts.strftime(TIME_FORMAT)
+
+def _insert_reference_data(conn, rng, devices, now):
+    """写入标准字段、设备型号、字段映射与监护设备"""
+    conn.executemany(
+        "INSERT INTO cvsc_standard_sign_config (id, field_name, description, unit, data_type, normal_range_low, normal_range_high, warning_threshold, category_code, category_name) VALUES (?,?,?,?,?,?,?,?,?,?)",
+        [(i + 1, f[0], f[1], f[2], 'float', f[3], f[4], f[5], 'VITAL', '生命体征') for i, f in enumerate(STANDARD_FIELDS)]
+    )
+    field_ids = {f[0]: i + 1 for i, f in enumerate(STANDARD_FIELDS)}
+    conn.executemany(
+        "INSERT INTO cvsc_sign_range_band (standard_field_id, sex, age_min, age_max, normal_range_low, normal_range_high, warning_threshold, remarks, updated_at) VALUES (?,?,?,?,?,?,?,?,?)",
+        [(field_ids[b[0]],) + b[1:] + (_fmt(now),) for b in RANGE_BANDS]
+    )
+    conn.executemany(
+        "INSERT INTO cvsc_device_model_config (id, model_name, manufacturer) VALUES (?,?,?)",
+        [(i + 1, m[0], m[1]) for i, m in enumerate(DEVICE_MODELS)]
+    )
+    rel_rows = []
+    for model_idx, (_, _, names, fahrenheit) in enumerate(DEVICE_MODELS):
+        for field_idx, device_field in enumerate(names):
+            formula = "(x-32)*5/9" if fahrenheit and field_idx == 0 else "x*1.0"
+            rel_rows.append((len(rel_rows) + 1, model_idx + 1, field_idx + 1, device_field, formula))
+    conn.executemany(
+        "INSERT INTO cvsc_device_field_rel (id, model_id, standard_field_id, device_field_name, conversion_formula) VALUES (?,?,?,?,?)",
+        rel_rows
+    )
+
+    ward_names = [w[0] for w in WARDS]
+    weights = np.array([w[3] for w in WARDS])
+    device_ward = rng.choice(len(WARDS), size=devices, p=weights / weights.sum())
+    device_ward[:min(devices, len(WARDS))] = np.arange(min(devices, len(WARDS)))  # 每个病区至少一台
+    device_model = rng.integers(0, len(DEVICE_MODELS), size=devices)
+    monitor_rows = []
+    for i in range(devices):
+        ward = ward_names[device_ward[i]]
+        monitor_rows.append((
+            i + 1, f"{ward}监护仪{i + 1:03d}", f"MON{i + 1:05d}", str(WARDS[device_ward[i]][2] or 60), '系统',
+            _fmt(now - timedelta(days=int(rng.integers(0, 120)))), f"W{device_ward[i] + 1:02d}", ward, 'H001', '中心医院',
+            str(rng.choice(['在线', '在线', '在线', '在线', '离线'])), _fmt(now), '系统', f"10.52.{device_ward[i] + 1}.{i % 250 + 1}",
+            None, None, None, ':'.join(f"{b:02X}" for b in rng.integers(0, 256, size=6)), int(device_model[i] + 1),
+            str(rng.choice(['使用中', '使用中', '空闲', '维护中'])),
+        ))
+    conn.executemany(f"INSERT INTO mr_monitor_info VALUES ({','.join('?' * 20)})", monitor_rows)
+    return device_ward, device_model
+
+def _build_patients(rng, patients, devices, device_ward, days, now):
+    """生成患者及其采集时间点（numpy 数组，按时间排序）"""
+    weights = np.array([w[3] for w in WARDS])
+    ward_of = rng.choice(len(WARDS), size=patients, p=weights / weights.sum())
+    window_start = now - timedelta(days=days)
+    window_minutes = days * 24 * 60
+
+    info, event_patient, event_minute = [], [], []
+    for p in range(patients):
+        ward_idx = ward_of[p]
+        ward, p_type, interval, _ = WARDS[ward_idx]
+        candidates = np.flatnonzero(device_ward == ward_idx)
+        device = int(rng.choice(candidates) if len(candidates) else rng.integers(0, devices))
+        prefix = {'住院': 'ZY', '急诊': 'JZ', '门诊': 'MZ'}[p_type]
+        info.append({
+            'patient_id': f"{prefix}{p + 1:07d}",
+            'patient_name': str(rng.choice(SURNAMES)) + ''.join(rng.choice(GIVEN, size=int(rng.integers(1, 3)))),
+            'sex': str(rng.choice(['男', '女'])),
+            'age': str(int(rng.integers(1, 12)) if ward == '儿科' else int(rng.integers(18, 92))),
+            'ward': ward,
+            'patient_type': p_type,
+            'bed_no': str(int(rng.integers(1, 60))) if p_type == '住院' else None,
+            'device': device,
+            'abnormal': rng.random() < 0.08,
+        })
+        if interval == 0:
+            # 门诊：一次就诊 1~2 次测量
+            minutes = rng.uniform(0, window_minutes, size=1)
+            minutes = np.concatenate([minutes, minutes + rng.uniform(5, 30, size=int(rng.integers(0, 2)))])
+        else:
+            # 住院/急诊：在窗口内的一段住院期间按固定间隔采集（带 ±10% 抖动）
+            stay = rng.uniform(0.5, 14) * 24 * 60 if p_type == '住院' else rng.uniform(2, 24) * 60
+            admit = rng.uniform(-stay * 0.5, window_minutes)
+            end = min(float(window_minutes), admit + stay)
+            minutes = admit + np.arange(int(stay // interval) + 1) * interval
+            minutes = minutes[(minutes >= 0) & (minutes <= end)]
+            minutes = minutes + rng.uniform(-0.1, 0.1, size=len(minutes)) * interval
+        minutes = np.clip(minutes, 0, window_minutes)
+        event_patient.append(np.full(len(minutes), p, dtype=np.int32))
+        event_minute.append(minutes)
+
+    event_patient = np.concatenate(event_patient)
+    event_minute = np.concatenate(event_minute)
+    order = np.argsort(event_minute, kind='stable')
+    return info, window_start, event_patient[order], event_minute[order]
+
+def _insert_events(conn, rng, info, device_model, window_start, event_patient, event_minute, chunk_size):
+    """按时间顺序分块写入主表与明细表，主表ID随采集时间递增"""
+    nfields = len(STANDARD_FIELDS)
+    means = np.array([f[6] for f in STANDARD_FIELDS])
+    sds = np.array([f[7] for f in STANDARD_FIELDS])
+    decimals = [f[8] for f in STANDARD_FIELDS]
+    # 异常患者：发热、心动过速、低氧等整体偏移
+    abnormal_shift = np.array([1.6, 32, 8, 30, 14, -6])
+    patient_bias = rng.normal(0, 0.3, size=(len(info), nfields)) * sds
+    patient_bias[[p['abnormal'] for p in info]] += abnormal_shift
+
+    fahrenheit = np.array([DEVICE_MODELS[m][3] for m in device_model])
+    total_main, detail_id = 0, 0
+    for start in range(0, len(event_patient), chunk_size):
+        patients = event_patient[start:start + chunk_size]
+        minutes = event_minute[start:start + chunk_size]
+        main_rows, detail_rows = [], []
+        values = means + patient_bias[patients] + rng.normal(0, 1, size=(len(patients), nfields)) * sds
+        values[:, 5] = np.minimum(values[:, 5], 100)
+        for i, (p, minute) in enumerate(zip(patients, minutes)):
+            total_main += 1
+            patient = info[p]
+            ts = window_start + timedelta(minutes=float(minute))
+            collection_time = _fmt(ts)
+            main_rows.append((
+                total_main, '住院号' if patient['patient_type'] == '住院' else '就诊卡号', patient['patient_id'], patient['patient_type'],
+                patient['patient_id'], patient['patient_name'], patient['sex'], patient['age'], None, 'H001', patient['ward'],
+                patient['device'] + 1, collection_time, patient['ward'], '自动采集', '已入库', 100, None, None,
+                _fmt(ts + timedelta(seconds=3)), patient['bed_no'], f"V{patient['patient_id']}",
+            ))
+            is_f = fahrenheit[patient['device']]
+            for f in range(nfields):
+                value = round(float(values[i, f]), decimals[f])
+                standard = f"{value:.{decimals[f]}f}"
+                original = f"{value * 9 / 5 + 32:.1f}" if f == 0 and is_f else standard
+                detail_id += 1
+                detail_rows.append((detail_id, total_main, f + 1, standard, original, collection_time, value))
+        conn.executemany(f"INSERT INTO cvsc_sign_main VALUES ({','.join('?' * 22)})", main_rows)
+        conn.executemany("INSERT INTO cvsc_sign_detail VALUES (?,?,?,?,?,?,?)", detail_rows)
+    return total_main, detail_id
+
+def _insert_bind_records(conn, info, event_patient, event_minute, window_start, now):
+    """每位患者一条设备绑定记录，起止时间取首末次采集"""
+    first = {}
+    last = {}
+    for p, minute in zip(event_patient.tolist(), event_minute.tolist()):
+        first.setdefault(p, minute)
+        last[p] = minute
+    rows = []
+    for p, patient in enumerate(info):
+        if p not in first:
+            continue
+        end = window_start + timedelta(minutes=last[p])
+        active = now - end < timedelta(hours=6)
+        rows.append((
+            len(rows) + 1, patient['device'] + 1, f"{patient['ward']}监护仪{patient['device'] + 1:03d}", f"MON{patient['device'] + 1:05d}",
+            None, None, patient['ward'], 'H001', '中心医院', patient['bed_no'], patient['patient_name'], patient['patient_id'],
+            '在院' if active else '出院', '绑定' if active else '解绑', _fmt(window_start + timedelta(minutes=first[p])), '系统',
+            None if active else _fmt(end), None if active else '系统', f"V{patient['patient_id']}",
+        ))
+    conn.executemany(f"INSERT INTO mr_monitor_bind_records VALUES ({','.join('?' * 19)})", rows)
+
+def generate(path, patients=200, devices=40, days=7, seed=42, chunk_size=20000, now=None):
+    """生成合成数据集，返回各表行数"""
+    now = (now or datetime.now()).replace(second=0, microsecond=0)
+    rng = np.random.default_rng(seed)
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        create_schema(conn)
+        device_ward, device_model = _insert_reference_data(conn, rng, devices, now)
+        info, window_start, event_patient, event_minute = _build_patients(rng, patients, devices, device_ward, days, now)
+        main_rows, detail_rows = _insert_events(conn, rng, info, device_model, window_start, event_patient, event_minute, chunk_size)
+        _insert_bind_records(conn, info, event_patient, event_minute, window_start, now)
+        create_indexes(conn)
+        conn.execute(SUMMARY_SQL, {'now': _fmt(now)})
+        conn.execute("INSERT INTO cvsc_summary_watermark VALUES ('patient_latest', ?, ?)", (main_rows, _fmt(now)))
+        # 数值列在写入时已填充，回填水位线直接置为最大明细ID
+        conn.execute("INSERT INTO cvsc_summary_watermark VALUES ('detail_numeric', ?, ?)", (detail_rows, _fmt(now)))
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return {'patients': patients, 'devices': devices, 'days': days, 'main_rows': main_rows, 'detail_rows': detail_rows}
+
+def main():
+    parser = argparse.ArgumentParser(description="生成 CVSC 合成数据集（SQLite）")
+    parser.add_argument("--patients", type=int, default=200, help="患者数 N")
+    parser.add_argument("--devices", type=int, default=40, help="设备数 M")
+    parser.add_argument("--days", type=int, default=7, help="天数 K")
+    parser.add_argument("--out", default=os.path.join("data", "cvsc_local.db"), help="输出 SQLite 文件")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk", type=int, default=20000, help="每批写入的主表记录数")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate(args.out, args.patients, args.devices, args.days, args.seed, args.chunk)
+    elapsed = time.perf_counter() - started
+    print(f"已生成 {args.out}：{counts['main_rows']} 条主记录，{counts['detail_rows']} 条明细，耗时 {elapsed:.1f}s")
+    print(f"以本地替身库运行：DB_BACKEND=sqlite SQLITE_PATH={args.out} streamlit run app.py")
+
+if __name__ == "__main__":
+    main()
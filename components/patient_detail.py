@@ -3,8 +3,11 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from database.queries import get_patient_basic_info, query_vital_signs_paginated
-from utils.helpers import get_status_color, highlight_status_row, calculate_time_range
+from database.queries import get_patient_basic_info, query_vital_signs_window, query_vital_signs_page, iter_vital_signs_pages
+from database.normal_ranges import get_normal_range_registry
+from utils.helpers import classify_status, status_labels, status_row_styles, relative_window, frames_to_csv_file
+
+DETAIL_DISPLAY_COLS = ['collection_time', 'display_name', 'standard_field_value', 'unit', 'status_label', 'normal_range_low', 'normal_range_high']
 
 def render_patient_detail(patient_id):
     """渲染患者详情页组件"""
@@ -31,25 +34,17 @@ def render_patient_detail(patient_id):
     with c_filter1:
         time_range = st.radio("时间范围", ["最近12小时", "最近24小时", "最近3天", "最近7天"], horizontal=True, label_visibility="collapsed")
     
-    # 计算时间
-    start_t = calculate_time_range(time_range)
-    now = datetime.now()
+    # 计算时间：起点对齐到固定粒度，历史段可被缓存复用
+    window = relative_window(time_range)
+    start_t, now = window.start, window.end
     
     # 查询数据
     with st.spinner("正在分析体征数据..."):
-        df_vital = query_vital_signs_paginated(patient_id, start_t, now)
+        df_vital = query_vital_signs_window(patient_id, window)
     
     if not df_vital.empty:
         # 数据清洗与预处理
-        df_vital['standard_field_value'] = pd.to_numeric(df_vital['standard_field_value'], errors='coerce')
-        df_vital = df_vital.dropna(subset=['standard_field_value'])
-        df_vital['display_name'] = df_vital.apply(lambda x: x['description'] if x['description'] else x['field_name'], axis=1)
-        
-        # 定义状态判断函数
-        df_vital['status_label'] = df_vital.apply(
-            lambda row: get_status_color(row['standard_field_value'], row['normal_range_low'], row['normal_range_high']), 
-            axis=1
-        )
+        df_vital = prepare_vital_frame(df_vital, patient_info['sex'], patient_info['age'])
 
         # Tab 分页展示
         tab_chart, tab_data = st.tabs(["📈 趋势分析", "📋 详细记录"])
@@ -78,20 +73,79 @@ def render_patient_detail(patient_id):
                     st.info("无数据")
 
         with tab_data:
-            display_cols = ['collection_time', 'display_name', 'standard_field_value', 'unit', 'status_label', 'normal_range_low', 'normal_range_high']
-            st.dataframe(
-                df_vital[display_cols].style.apply(highlight_status_row, axis=1),
-                column_config={
-                    "collection_time": st.column_config.DatetimeColumn("采集时间", format="MM-DD HH:mm"),
-                    "display_name": "体征项目",
-                    "standard_field_value": "数值",
-                    "unit": "单位",
-                    "status_label": "状态评价",
-                    "normal_range_low": "参考下限",
-                    "normal_range_high": "参考上限"
-                },
-                use_container_width=True,
-                height=500
-            )
+            render_vital_detail_table(patient_id, time_range, start_t, now, patient_info['sex'], patient_info['age'])
     else:
-        st.warning("📭 该时间段内无体征数据记录")
\ No newline at end of file
+        st.warning("📭 该时间段内无体征数据记录")
+
+def prepare_vital_frame(df_vital, sex=None, age=None):
+    """体征数据清洗：去除空值、显示名称与状态评价（整列向量化计算，数值列由查询层返回 float32）"""
+    df_vital = df_vital.dropna(subset=['standard_field_value']).reset_index(drop=True)
+    
+    # 参考范围按患者性别、年龄从正常范围注册表对齐
+    low, high, _ = get_normal_range_registry().evaluate(df_vital, sex, age)
+    df_vital['normal_range_low'] = low.astype('float32')
+    df_vital['normal_range_high'] = high.astype('float32')
+    description = df_vital['description'].astype(object)
+    display_name = description.where(description.notna() & (description != ''), df_vital['field_name'].astype(object))
+    df_vital['display_name'] = display_name.astype('category')
+    
+    # 状态码供表格样式使用，状态标签用于展示和导出
+    codes = classify_status(df_vital['standard_field_value'], df_vital['normal_range_low'], df_vital['normal_range_high'])
+    df_vital['status_code'] = codes
+    df_vital['status_label'] = status_labels(codes)
+    return df_vital
+
+def render_vital_detail_table(patient_id, time_range, start_t, end_t, sex=None, age=None):
+    """按键集游标分页渲染详细记录表，并流式导出CSV"""
+    # 游标栈：第 i 个元素为第 i 页的起始游标，首页为 None
+    state_key = f"vital_cursors_{patient_id}_{time_range}"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = [None]
+    cursors = st.session_state[state_key]
+    
+    df_page, next_cursor = query_vital_signs_page(patient_id, start_t, end_t, cursor=cursors[-1])
+    if not df_page.empty:
+        df_page = prepare_vital_frame(df_page, sex, age)
+    
+    c_prev, c_page, c_next, c_export = st.columns([1, 2, 1, 2])
+    with c_prev:
+        if st.button("⬅️ 上一页", disabled=len(cursors) <= 1, use_container_width=True, key=f"{state_key}_prev"):
+            cursors.pop()
+            st.rerun()
+    with c_page:
+        st.caption(f"第 {len(cursors)} 页")
+    with c_next:
+        if st.button("下一页 ➡️", disabled=next_cursor is None, use_container_width=True, key=f"{state_key}_next"):
+            cursors.append(next_cursor)
+            st.rerun()
+    with c_export:
+        if st.button("📥 导出CSV", use_container_width=True, key=f"{state_key}_export"):
+            with st.spinner("正在分页导出体征数据..."):
+                pages = (prepare_vital_frame(page, sex, age) for page in iter_vital_signs_pages(patient_id, start_t, end_t))
+                csv_file = frames_to_csv_file(pages, columns=DETAIL_DISPLAY_COLS)
+            with csv_file:
+                st.download_button(
+                    label="下载CSV文件",
+                    data=csv_file,
+                    file_name=f"vital_signs_{patient_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    mime='text/csv'
+                )
+    
+    if df_page.empty:
+        st.info("无数据")
+        return
+    
+    st.dataframe(
+        df_page[DETAIL_DISPLAY_COLS].style.apply(status_row_styles, codes=df_page['status_code'].to_numpy(), axis=None),
+        column_config={
+            "collection_time": st.column_config.DatetimeColumn("采集时间", format="MM-DD HH:mm"),
+            "display_name": "体征项目",
+            "standard_field_value": st.column_config.NumberColumn("数值", format="%.1f"),
+            "unit": "单位",
+            "status_label": "状态评价",
+            "normal_range_low": st.column_config.NumberColumn("参考下限", format="%.1f"),
+            "normal_range_high": st.column_config.NumberColumn("参考上限", format="%.1f")
+        },
+        use_container_width=True,
+        height=500
+    )
\ No newline at end of file
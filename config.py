@@ -8,9 +8,17 @@ class Config:
     DB_PASSWORD = os.getenv('DB_PASSWORD', 'hayymoni2018')
     DB_HOST = os.getenv('DB_HOST', '10.52.197.73')
     DB_NAME = os.getenv('DB_NAME', 'UNIONDEV')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+    
+    # 数据库类型：mssql（生产 SQL Server）或 sqlite（本地替身库，见 benchmarks/synthetic_dataset.py）
+    DB_BACKEND = os.getenv('DB_BACKEND', 'mssql')
+    SQLITE_PATH = os.getenv('SQLITE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cvsc_local.db'))
     
     @property
     def DB_CONNECTION_STR(self):
+        if self.DB_BACKEND == 'sqlite':
+            return f"sqlite:///{self.SQLITE_PATH}"
         return f"mssql+pyodbc://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}/{self.DB_NAME}?driver=ODBC+Driver+17+for+SQL+Server"
     
     # Streamlit 配置
@@ -28,6 +36,97 @@ class Config:
     # 缓存配置
     QUERY_CACHE_TTL = 600  # 10分钟
     FILTER_CACHE_TTL = 300  # 5分钟
+    STATS_CACHE_TTL = 30  # 30秒，统计指标共用一个缓存条目
+
+    # 主表ID水位线：自增ID在分配时确定、在提交时才可见，并发写入时较小的ID可能晚于较大的ID提交。
+    # 按水位线增量读取的组件每次从水位线之前这么多个ID处重新读取，避免永久漏掉晚提交的记录
+    MAIN_ID_RESCAN_WINDOW = 5000
+
+    # 体征历史增量缓存配置
+    HISTORY_CACHE_MAX_PATIENTS = 64
+    HISTORY_CACHE_MEMORY_MB = 256
+
+    # 分页配置
+    VITALS_PAGE_SIZE = 200  # 每页采集记录数（按主表记录计）
+
+    # 看板并发加载配置
+    PANEL_LOADER_WORKERS = 8
+    PANEL_TIMEOUT_SECONDS = 5  # 单个面板超时时间
+
+    # 查询剖析配置
+    QUERY_PROFILING = True
+    # 统计对象列的实际内存占用：需逐个对象计算，开销与行数成正比，默认只统计数组本身
+    PROFILE_DEEP_BYTES = os.getenv('PROFILE_DEEP_BYTES', '0') == '1'
+    PROFILER_SLOWEST_SIZE = 50  # 保留耗时最长的语句条数
+    PROFILER_RECENT_SIZE = 1000  # 保留最近执行的语句条数
+    SLOW_QUERY_THRESHOLD_MS = 500
+    SLOW_QUERY_LOG_PATH = os.getenv('SLOW_QUERY_LOG_PATH')  # 为空时不写磁盘
+
+    # 查询时间窗口对齐粒度
+    TIME_BUCKET_SECONDS = 60  # 1分钟
+    # 相对时间范围的历史段对齐粒度（秒），实时尾段最长为一个粒度
+    TIME_WINDOW_BUCKETS = {
+        "最近12小时": 600,
+        "最近24小时": 600,
+        "最近3天": 3600,
+        "最近7天": 3600,
+    }
+    DEFAULT_TIME_WINDOW_BUCKET = 600
+    VITALS_WINDOW_CACHE_TTL = 3600  # 已对齐历史段的缓存时间
+    VITALS_WINDOW_CACHE_ENTRIES = 256
+
+    # 患者检索索引
+    PATIENT_INDEX_REFRESH_SECONDS = 30  # 增量刷新间隔
+    PATIENT_INDEX_NGRAM = 3  # n-gram 最大长度
+    PATIENT_INDEX_DELTA_PAGE_SIZE = 5000  # 增量刷新每页读取的主表记录数
+    PATIENT_INDEX_DELTA_MAX_PAGES = 20  # 单次刷新最多读取的页数，积压更多时从汇总表重建
+    SEARCH_RESULT_LIMIT = 100
+
+    # 患者最新状态汇总表
+    PATIENT_SUMMARY_REFRESH_SECONDS = 30  # 刷新间隔
+    PATIENT_SUMMARY_BATCH_SIZE = 50000  # 每批合并的主表ID跨度
+    # 是否在应用进程内启动后台刷新线程；部署了独立刷新任务（python -m database.patient_summary）时设为 0
+    PATIENT_SUMMARY_IN_APP = os.getenv('PATIENT_SUMMARY_IN_APP', '1') == '1'
+
+    # 筛选维度注册表
+    DIMENSION_REFRESH_SECONDS = 60  # 增量检查间隔
+    DIMENSION_CACHE_PATH = os.getenv('DIMENSION_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'dimensions.json'))  # 多进程共享快照
+
+    # 标准体征配置快照
+    SIGN_CONFIG_REFRESH_SECONDS = 300  # 重新加载配置表的间隔，内容变化时版本号递增
+
+    # 正常范围注册表
+    NORMAL_RANGE_REFRESH_SECONDS = 60  # 检查配置与分段表变化的间隔
+
+    # 明细数值列回填
+    DETAIL_NUMERIC_BATCH_SIZE = 20000  # 每批更新的明细ID跨度
+    DETAIL_NUMERIC_BATCH_PAUSE = 0.5  # 批间休眠（秒），降低对生产库的压力
+    DETAIL_NUMERIC_INTERVAL = 60  # 追平后检查新写入明细的间隔（秒）
+
+    # 映射批量验证
+    MAPPING_VALIDATION_WORKERS = min(4, os.cpu_count() or 1)  # 进程池大小
+    MAPPING_VALIDATION_CHUNK_SIZE = 100000  # 每次读取并交给一个进程的明细行数
+    MAPPING_VALIDATION_MAX_ROWS = 5000000  # 单次验证最多抽取的明细行数
+    MAPPING_VALIDATION_TOLERANCE = 0.1  # 转换值与已存标准值的允许误差
+
+    # 映射公式变更后的明细重算
+    RENORMALIZE_CHUNK_SIZE = 5000  # 每块读取并更新的明细行数（单个事务）
+    RENORMALIZE_PAUSE = 0.5  # 块间休眠（秒），降低对生产库的压力
+    RENORMALIZE_INTERVAL = 30  # 独立任务检查新登记任务的间隔（秒）
+    RENORMALIZE_DELAY_SECONDS = 90  # 登记后延迟开始，需大于映射表刷新间隔加写入确认超时
+    DETAIL_VERSION_REFRESH_SECONDS = 10  # 体征缓存检查重算任务是否改写了明细的间隔
+
+    # 体征采集写入服务
+    INGEST_HOST = os.getenv('INGEST_HOST', '127.0.0.1')
+    INGEST_PORT = int(os.getenv('INGEST_PORT', '8765'))
+    INGEST_BATCH_SIZE = 2000  # 攒满多少条体征明细立即写入
+    INGEST_FLUSH_SECONDS = 0.05  # 最早一条数据等待超过该时间即写入（也是单条请求的额外延迟上限）
+    INGEST_ACK_TIMEOUT = 10  # 请求等待写入确认的最长时间（秒）
+    INGEST_MAX_BODY_BYTES = 10 * 1024 * 1024
+    INGEST_DIRECTORY_REFRESH_SECONDS = 60  # 设备目录的刷新间隔，未知设备时提前刷新
+
+    # 设备字段映射查找表
+    MAPPING_TABLE_REFRESH_SECONDS = 30  # 后台检查映射变化的间隔，内容变化时整体替换
 
 # 全局配置实例
 config = Config()
\ No newline at end of file
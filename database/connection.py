@@ -1,7 +1,9 @@
 import streamlit as st
 import logging
-from sqlalchemy import create_engine, text, exc
+from sqlalchemy import create_engine, text, exc, event
 from config import config
+from .pool_metrics import InstrumentedQueuePool, register_pool_listeners, get_pool_status
+from .dialect import is_sqlite, register_sqlite_functions
 
 logger = logging.getLogger(__name__)
 
@@ -9,13 +11,23 @@ logger = logging.getLogger(__name__)
 def get_db_engine():
     """创建数据库连接引擎"""
     try:
+        # 本地 SQLite 替身库需要允许跨线程使用连接（看板面板并发加载）
+        connect_args = {'check_same_thread': False} if is_sqlite() else {}
+        # SQL Server 批量写入（executemany）使用 pyodbc 的 fast_executemany 按参数数组一次下发
+        engine_args = {} if is_sqlite() else {'fast_executemany': True}
         engine = create_engine(
             config.DB_CONNECTION_STR,
-            pool_size=10,
-            max_overflow=20,
+            poolclass=InstrumentedQueuePool,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
             pool_pre_ping=True,
-            echo=False
+            connect_args=connect_args,
+            echo=False,
+            **engine_args
         )
+        register_pool_listeners(engine)
+        if is_sqlite():
+            event.listen(engine, "connect", register_sqlite_functions)
         # 测试连接
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
@@ -34,4 +46,12 @@ def test_connection():
         return result[0] == 1
     except Exception as e:
         logger.error(f"数据库连接测试失败: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def get_pool_metrics():
+    """获取数据库连接池运行指标"""
+    try:
+        return get_pool_status(get_db_engine())
+    except Exception as e:
+        logger.error(f"获取连接池指标失败: {e}")
+        return {}
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+明细数值列（cvsc_sign_detail.standard_field_num）回填任务
+
+建列见 database/migrations/003_add_detail_numeric_value.sql。按明细ID区间分批更新，每批提交后推进水位线，
+中断后从水位线继续；批间休眠 DETAIL_NUMERIC_BATCH_PAUSE 秒以控制对生产库的压力：
+    python -m database.detail_numeric --once
+    python -m database.detail_numeric --interval 60
+"""
+import argparse
+import logging
+import time
+from .queries import run_query, run_update
+from .patient_summary import WATERMARK_SQL, ADVANCE_WATERMARK_SQL, _scalar
+from config import config
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = 'detail_numeric'
+
+MAX_ID_SQL = "SELECT MAX(id) AS max_id FROM cvsc_sign_detail"
+
+# 只处理 (after_id, cur_id] 区间（主键范围扫描），已填充的行不再改写，重复执行同一区间结果不变
+BACKFILL_SQL = """
+    UPDATE cvsc_sign_detail
+    SET standard_field_num = TRY_CAST(standard_field_value AS float)
+    WHERE id > :after_id AND id <= :cur_id
+    AND standard_field_num IS NULL AND standard_field_value IS NOT NULL
+"""
+
+def get_backfill_watermark():
+    """数值列已回填到的明细ID"""
+    return _scalar(run_query(WATERMARK_SQL, {'name': WATERMARK_NAME}), 'last_id')
+
+def backfill_detail_numeric(batch_size=None, max_batches=None, pause=None):
+    """将水位线之后的明细分批回填数值列，返回本次处理到的明细ID"""
+    batch_size = batch_size or config.DETAIL_NUMERIC_BATCH_SIZE
+    pause = config.DETAIL_NUMERIC_BATCH_PAUSE if pause is None else pause
+    after_id = get_backfill_watermark()
+    max_id = _scalar(run_query(MAX_ID_SQL), 'max_id')
+    if after_id is None or max_id is None:
+        logger.warning("数值列回填未初始化，请先执行 database/migrations/003_add_detail_numeric_value.sql")
+        return after_id
+
+    batches = 0
+    while after_id < max_id and (max_batches is None or batches < max_batches):
+        cur_id = min(max_id, after_id + batch_size)
+        if not run_update(BACKFILL_SQL, {'after_id': after_id, 'cur_id': cur_id}):
+            break
+        run_update(ADVANCE_WATERMARK_SQL, {'cur_id': cur_id, 'name': WATERMARK_NAME})
+        after_id = cur_id
+        batches += 1
+        if pause and after_id < max_id:
+            time.sleep(pause)
+    if batches:
+        logger.info(f"明细数值列回填 {batches} 批，水位线 {after_id}/{max_id}")
+    return after_id
+
+def main():
+    parser = argparse.ArgumentParser(description="明细数值列回填任务")
+    parser.add_argument("--batch-size", type=int, default=config.DETAIL_NUMERIC_BATCH_SIZE, help="每批明细ID跨度")
+    parser.add_argument("--pause", type=float, default=config.DETAIL_NUMERIC_BATCH_PAUSE, help="批间休眠（秒）")
+    parser.add_argument("--interval", type=int, default=config.DETAIL_NUMERIC_INTERVAL, help="追平后的检查间隔（秒）")
+    parser.add_argument("--once", action="store_true", help="追平当前积压后退出")
+    args = parser.parse_args()
+
+    while True:
+        backfill_detail_numeric(args.batch_size, pause=args.pause)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+查询层方言适配：语句按 SQL Server（T-SQL）编写，使用本地 SQLite 替身库时在下发前改写
+
+支持的改写：
+    SELECT TOP n / TOP (:x)   ->  同一 SELECT 末尾追加 LIMIT
+    GETDATE()                 ->  datetime('now', 'localtime')
+    TRY_CAST(expr AS float)   ->  try_float(expr)（连接时注册的自定义函数）
+    DATEDIFF(second, a, b)    ->  (julianday(b) - julianday(a)) * 86400
+    WITH (HOLDLOCK) 等表提示   ->  移除
+"""
+import re
+import pandas as pd
+from functools import lru_cache
+from config import config
+
+_TOP = re.compile(r"\bSELECT\s+TOP\s*(\(\s*:?\w+\s*\)|\d+)\s+", re.IGNORECASE)
+_GETDATE = re.compile(r"\bGETDATE\(\)", re.IGNORECASE)
+_TRY_CAST_FLOAT = re.compile(r"\bTRY_CAST\(\s*([^()]+?)\s+AS\s+float\s*\)", re.IGNORECASE)
+_DATEDIFF_SECOND = re.compile(r"\bDATEDIFF\(\s*second\s*,\s*([^(),]+?)\s*,\s*([^(),]+?)\s*\)", re.IGNORECASE)
+_TABLE_HINT = re.compile(r"\bWITH\s*\(\s*(HOLDLOCK|NOLOCK|UPDLOCK|ROWLOCK|READPAST)\s*\)", re.IGNORECASE)
+
+# SQLite 以文本存储时间，读取后需要转换的时间列
+DATETIME_COLUMNS = {
+    'collection_time', 'last_time', 'create_time', 'detail_collection_time',
+    'operate_time', 'update_time', 'start_time', 'end_time', 'updated_at',
+}
+
+def is_sqlite():
+    """当前是否使用本地 SQLite 替身库"""
+    return config.DB_BACKEND == 'sqlite'
+
+def _rewrite_top(sql):
+    """将 TOP 改写为 LIMIT，LIMIT 追加在 TOP 所在 SELECT 的末尾（同层右括号之前或语句末尾）"""
+    while True:
+        match = _TOP.search(sql)
+        if match is None:
+            return sql
+        limit = match.group(1).strip("() ")
+        depth, end = 0, len(sql)
+        for i in range(match.end(), len(sql)):
+            if sql[i] == '(':
+                depth += 1
+            elif sql[i] == ')':
+                if depth == 0:
+                    end = i
+                    break
+                depth -= 1
+        body = sql[match.end():end].rstrip().rstrip(';')
+        sql = f"{sql[:match.start()]}SELECT {body}\n LIMIT {limit}\n{sql[end:]}"
+
+@lru_cache(maxsize=1024)
+def adapt_sql(sql):
+    """按当前数据库方言改写语句文本"""
+    if not is_sqlite():
+        return sql
+    sql = _rewrite_top(sql)
+    sql = _GETDATE.sub("datetime('now', 'localtime')", sql)
+    sql = _TRY_CAST_FLOAT.sub(r"try_float(\1)", sql)
+    sql = _DATEDIFF_SECOND.sub(r"((julianday(\2) - julianday(\1)) * 86400)", sql)
+    sql = _TABLE_HINT.sub("", sql)
+    return sql
+
+def adapt_frame(df):
+    """SQLite 返回的时间列为文本，统一转换为 datetime64"""
+    if not is_sqlite() or df.empty:
+        return df
+    for column in DATETIME_COLUMNS.intersection(df.columns):
+        if not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column], errors='coerce', format='mixed')
+    return df
+
+def try_float(value):
+    """SQLite 版 TRY_CAST(... AS float)：无法转换时返回 NULL"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def register_sqlite_functions(dbapi_conn, connection_record=None):
+    """为 SQLite 连接注册 T-SQL 兼容函数"""
+    dbapi_conn.create_function("try_float", 1, try_float, deterministic=True)
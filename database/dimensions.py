@@ -0,0 +1,151 @@
+import streamlit as st
+import pandas as pd
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from .queries import run_query
+from .statements import get_statement
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# 维度名 -> cvsc_sign_main 列名
+DIMENSIONS = {
+    'locations': 'collection_location',
+    'types': 'patient_type',
+}
+
+# 首次加载：从患者最新状态汇总表取去重值（O(患者数)），水位线取汇总表水位线
+SNAPSHOT_SQL = """
+    SELECT DISTINCT p.collection_location, p.patient_type
+    FROM cvsc_patient_latest p
+"""
+
+WATERMARK_SQL = "SELECT last_id AS max_id FROM cvsc_summary_watermark WHERE name = 'patient_latest'"
+
+# 汇总表水位线缺失时以主表最大ID为起点（主键查找）
+MAX_ID_SQL = "SELECT MAX(id) AS max_id FROM cvsc_sign_main"
+
+# 增量：只检查水位线之前 MAIN_ID_RESCAN_WINDOW 处之后的主表记录（主键范围扫描），晚提交的较小ID也能被发现
+DELTA_SQL = """
+    SELECT m.collection_location, m.patient_type, MAX(m.id) AS max_id
+    FROM cvsc_sign_main m
+    WHERE m.id > :after_id
+    GROUP BY m.collection_location, m.patient_type
+"""
+
+def _frame_values(df):
+    """从查询结果中提取各维度的非空取值"""
+    if df.empty:
+        return {}
+    return {name: {v for v in df[column].dropna().unique() if str(v).strip()} for name, column in DIMENSIONS.items()}
+
+class DimensionRegistry:
+    """筛选维度注册表：加载一次后按主表ID水位线增量发现新取值，并通过本地文件在多个进程间共享
+
+    首次加载失败时水位线保持为空，下次刷新重新加载，不会以 0 为水位线扫描全表。
+    """
+
+    def __init__(self, path=None, refresh_seconds=None):
+        self.path = path or config.DIMENSION_CACHE_PATH
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else config.DIMENSION_REFRESH_SECONDS
+        self._lock = threading.Lock()
+        self._values = {name: set() for name in DIMENSIONS}
+        self._watermark = None
+        self._refreshed_at = 0.0
+
+    def get(self):
+        """返回各维度的取值列表（已排序）"""
+        self.refresh()
+        with self._lock:
+            return {name: sorted(values) for name, values in self._values.items()}
+
+    def refresh(self, force=False):
+        """刷新：先合并其他进程写入的文件快照，再从水位线之后增量查询"""
+        if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return
+            self._merge_file()
+            if self._watermark is None:
+                try:
+                    self._load_snapshot()
+                except Exception as e:
+                    logger.error(f"加载筛选维度失败，下次刷新重试: {e}")
+                    return
+            else:
+                self._apply_delta()
+            self._save_file()
+            self._refreshed_at = time.monotonic()
+
+    def _merge(self, values, watermark):
+        """合并新取值并推进水位线"""
+        for name, items in values.items():
+            self._values.setdefault(name, set()).update(items)
+        if watermark is not None:
+            self._watermark = watermark if self._watermark is None else max(self._watermark, watermark)
+
+    @staticmethod
+    def _max_id(sql):
+        """读取单行 max_id，无记录时返回 None；查询失败时抛出异常"""
+        df = run_query(sql, raise_errors=True)
+        return None if df.empty or pd.isna(df.iloc[0]['max_id']) else int(df.iloc[0]['max_id'])
+
+    def _load_snapshot(self):
+        """首次加载；查询失败时抛出异常，水位线保持为空"""
+        watermark = self._max_id(WATERMARK_SQL)
+        if watermark is None:
+            # 汇总表水位线缺失：以主表当前最大ID为起点，空表时为 0
+            watermark = self._max_id(MAX_ID_SQL) or 0
+        df = run_query(get_statement("dimension_snapshot", SNAPSHOT_SQL), raise_errors=True)
+        self._merge(_frame_values(df), watermark)
+        logger.info(f"筛选维度加载完成，水位线 {watermark}")
+
+    def _apply_delta(self):
+        """增量发现新取值，重读水位线之前的一段ID（取值只增不减，重复读取结果不变）"""
+        after_id = max(0, self._watermark - config.MAIN_ID_RESCAN_WINDOW)
+        df = run_query(get_statement("dimension_delta", DELTA_SQL), {'after_id': after_id})
+        if not df.empty:
+            self._merge(_frame_values(df), int(df['max_id'].max()))
+
+    def _merge_file(self):
+        """读取共享文件快照（其他进程可能已推进水位线）"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            self._merge({name: set(values) for name, values in data.get('values', {}).items()}, data.get('watermark'))
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取筛选维度缓存文件失败: {e}")
+
+    def _save_file(self):
+        """原子写入共享文件快照"""
+        if not self.path:
+            return
+        try:
+            data = {'watermark': self._watermark, 'values': {name: sorted(values) for name, values in self._values.items()}}
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"写入筛选维度缓存文件失败: {e}")
+
+@st.cache_resource
+def get_dimension_registry():
+    """获取进程内共享的筛选维度注册表"""
+    return DimensionRegistry()
+
+def get_filter_options():
+    """获取筛选条件的下拉选项（维度注册表，不扫描全表）"""
+    try:
+        return get_dimension_registry().get()
+    except Exception as e:
+        logger.error(f"获取筛选选项失败: {e}")
+        return {"locations": [], "types": []}
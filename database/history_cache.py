@@ -0,0 +1,149 @@
+import streamlit as st
+import pandas as pd
+import logging
+import threading
+from collections import OrderedDict
+from .queries import run_query, compact_values, attach_sign_config, report_frame_memory, VALUE_COLUMN_SQL
+from .statements import get_statement
+from .renormalize import get_detail_data_version
+from config import config
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SQL = f"""
+    SELECT
+        m.id AS main_id,
+        m.collection_time,
+        d.standard_field_id,
+        {VALUE_COLUMN_SQL}
+    FROM cvsc_sign_main m
+    JOIN cvsc_sign_detail d ON m.id = d.vital_sign_data_id
+    WHERE m.patient_id = :pid
+    AND m.collection_time >= :start_time
+    AND m.id > :after_id
+"""
+
+class PatientHistoryCache:
+    """按患者缓存体征历史，以 cvsc_sign_main.id 为水位线增量拉取新数据，按 LRU 和内存预算淘汰"""
+
+    def __init__(self, max_patients=None, memory_budget_bytes=None):
+        self.max_patients = max_patients or config.HISTORY_CACHE_MAX_PATIENTS
+        self.memory_budget_bytes = memory_budget_bytes or config.HISTORY_CACHE_MEMORY_MB * 1024 * 1024
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._data_version = None
+        self.hits = 0
+        self.misses = 0
+
+    def sync_data_version(self, version):
+        """明细数据版本变化（已入库明细被重算改写）时清空缓存：水位线只能发现新增记录，发现不了改写"""
+        with self._lock:
+            if version == self._data_version:
+                return
+            changed = self._data_version is not None
+            self._data_version = version
+        if changed:
+            self.invalidate()
+            logger.info(f"明细数据版本变为 {version}，体征历史缓存已清空")
+
+    def get(self, patient_id, start_time, end_time):
+        """获取患者指定时间窗口内的体征数据，只从数据库拉取水位线之后的新记录"""
+        with self._lock:
+            data_version = self._data_version
+            entry = self._entries.get(patient_id)
+            if entry is not None:
+                self._entries.move_to_end(patient_id)
+            miss = entry is None or start_time < entry['covered_from']
+            if miss:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if miss:
+            # 首次访问或窗口向前扩展：整窗加载
+            frame = self._fetch(patient_id, start_time, 0)
+            entry = {'frame': frame, 'covered_from': start_time, 'watermark': 0}
+        else:
+            entry = dict(entry)
+            if start_time > entry['covered_from']:
+                # 相对时间窗口随时间前移：丢弃窗口起点之前的行，缓存不随患者停留时间增长
+                frame = entry['frame']
+                entry['frame'] = frame.loc[frame['collection_time'] >= start_time].reset_index(drop=True)
+                entry['covered_from'] = start_time
+            # 从水位线之前一段重新读取，晚提交的较小ID也能补进来；重读区间内的缓存行以新读取的为准
+            after_id = max(0, entry['watermark'] - config.MAIN_ID_RESCAN_WINDOW)
+            tail = self._fetch(patient_id, entry['covered_from'], after_id)
+            frame = entry['frame']
+            frame = frame.loc[frame['main_id'] <= after_id]
+            if not tail.empty:
+                frame = pd.concat([frame, tail], ignore_index=True) if not frame.empty else tail
+                frame = frame.sort_values(['collection_time', 'main_id', 'standard_field_id'], ascending=[False, False, True], ignore_index=True)
+            entry['frame'] = frame.reset_index(drop=True)
+
+        if not entry['frame'].empty:
+            entry['watermark'] = max(entry['watermark'], int(entry['frame']['main_id'].max()))
+        entry['nbytes'] = int(entry['frame'].memory_usage(index=True, deep=True).sum())
+        self._store(patient_id, entry, data_version)
+
+        frame = entry['frame']
+        mask = (frame['collection_time'] >= start_time) & (frame['collection_time'] <= end_time)
+        # 缓存中只保存数值列，配置列在返回时按当前配置版本补全
+        return report_frame_memory("vital_history", attach_sign_config(frame.loc[mask].drop(columns=['main_id']).reset_index(drop=True)))
+
+    def _fetch(self, patient_id, start_time, after_id):
+        """拉取 start_time 之后、主表ID大于 after_id 的记录"""
+        stmt = get_statement("vital_history_tail", HISTORY_SQL)
+        df = compact_values(run_query(stmt, {'pid': patient_id, 'start_time': start_time, 'after_id': after_id}))
+        if not df.empty:
+            df['collection_time'] = pd.to_datetime(df['collection_time'])
+            df = df.sort_values(['collection_time', 'main_id', 'standard_field_id'], ascending=[False, False, True], ignore_index=True)
+        else:
+            df = pd.DataFrame(columns=['main_id', 'collection_time', 'standard_field_id', 'standard_field_value'])
+            df['collection_time'] = pd.to_datetime(df['collection_time'])
+        return df
+
+    def _store(self, patient_id, entry, data_version):
+        """写回缓存并按患者数和内存预算淘汰最久未使用的患者；读取期间数据版本已变化时不写回"""
+        with self._lock:
+            if data_version != self._data_version:
+                return
+            self._entries[patient_id] = entry
+            self._entries.move_to_end(patient_id)
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_patients or self.memory_usage() > self.memory_budget_bytes
+            ):
+                evicted, _ = self._entries.popitem(last=False)
+                logger.info(f"体征历史缓存淘汰患者 {evicted}")
+
+    def memory_usage(self):
+        """当前缓存占用的字节数"""
+        return sum(entry['nbytes'] for entry in self._entries.values())
+
+    def invalidate(self, patient_id=None):
+        """清除指定患者或全部缓存"""
+        with self._lock:
+            if patient_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(patient_id, None)
+
+    def stats(self):
+        """缓存统计"""
+        with self._lock:
+            return {
+                'patients': len(self._entries),
+                'bytes': self.memory_usage(),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+@st.cache_resource
+def get_history_cache():
+    """获取进程内共享的体征历史缓存"""
+    return PatientHistoryCache()
+
+def get_vital_signs_history(patient_id, start_time, end_time):
+    """查询生命体征数据（增量缓存版），返回列与 query_vital_signs_paginated 一致"""
+    cache = get_history_cache()
+    cache.sync_data_version(get_detail_data_version().version)
+    return cache.get(patient_id, start_time, end_time)
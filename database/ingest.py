@@ -0,0 +1,563 @@
+"""
+体征采集写入服务
+
+监护设备（或采集网关）以 HTTP POST 提交体征数据，服务按监护设备解析设备型号，用 cvsc_device_field_rel 的
+映射与转换公式换算为标准字段，攒成小批次后批量写入 cvsc_sign_main / cvsc_sign_detail（同时写入 standard_field_num）。
+攒满 INGEST_BATCH_SIZE 条明细或最早一条等待超过 INGEST_FLUSH_SECONDS 秒即写入，请求在所在批次提交后才返回。
+同一监护设备、同一采集时间的记录只写入一次（幂等键），已存在的记录跳过并返回原主表ID，
+因此写入确认超时（202）后可以原样重试；未提供 collection_time 的记录以接收时间为采集时间，重试无法去重：
+    python -m database.ingest --port 8765
+    curl -X POST http://127.0.0.1:8765/vitals -d '{"device_code": "MON00001", "patient_id": "ZY0000001",
+        "collection_time": "2026-10-17 08:00:00", "values": {"HR": 80, "TEMP": 36.6}}'
+
+请求体为单条或多条（JSON 数组）采集记录：
+    device_id / device_code / mac  监护设备（mr_monitor_info 的 id、monitor_code 或 mac，任选其一）
+    values                         {设备字段名: 原始值}，未配置映射的字段忽略
+    collection_time                采集时间，缺省为接收时间；与设备一起作为幂等键
+    patient_id、patient_name 等    写入主表的患者信息（见 MAIN_FIELDS），超过列宽的记录单独拒绝
+GET /stats 返回写入统计。
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from .connection import get_db_engine
+from .queries import run_query
+from .dialect import is_sqlite
+from .mapping_table import MappingTable
+from utils.formula import to_numeric, format_values
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# 由请求提供的主表字段
+MAIN_FIELDS = [
+    'id_type', 'id_number', 'patient_type', 'patient_id', 'patient_name', 'sex', 'age', 'phone',
+    'hospital_id', 'bed_no', 'visit_identifier', 'collection_location', 'remarks',
+]
+MAIN_COLUMNS = MAIN_FIELDS + ['device_id', 'collection_time', 'collector', 'data_status', 'create_time']
+# 主表文本列宽度（与 doc/cvsc_ddl.txt 一致）：超长字段在 parse_payload 中逐条拒绝，不进入批次
+MAIN_FIELD_LENGTHS = {
+    'id_type': 20, 'id_number': 50, 'patient_type': 20, 'patient_id': 50, 'patient_name': 50, 'sex': 5, 'age': 5,
+    'phone': 20, 'hospital_id': 20, 'bed_no': 50, 'visit_identifier': 50, 'collection_location': 50, 'remarks': 200,
+}
+# SQL Server datetime 的取值范围
+MIN_COLLECTION_TIME = datetime(1753, 1, 1)
+DETAIL_COLUMNS = ['seq', 'standard_field_id', 'standard_field_value', 'original_device_value', 'standard_field_num']
+
+DEVICES_SQL = "SELECT id, monitor_code, mac, modelID AS model_id, ward_name FROM mr_monitor_info"
+
+# SQL Server：参数数组写入临时表，再用集合操作写入正式表。
+# MERGE 按幂等键 (device_id, collection_time) 只插入不存在的主记录，OUTPUT 同时取到源行序号和新主表ID，用于关联明细；
+# HOLDLOCK 保证多个采集服务并发写入同一设备时不会重复插入。
+MSSQL_STAGE_SQL = f"""
+    CREATE TABLE #ingest_main (
+        seq int NOT NULL PRIMARY KEY,
+        {', '.join(f'{field} nvarchar({length})' for field, length in MAIN_FIELD_LENGTHS.items())},
+        device_id int NOT NULL, collection_time datetime NOT NULL, collector nvarchar(50), data_status nvarchar(20),
+        create_time datetime NOT NULL
+    );
+    CREATE TABLE #ingest_detail (
+        seq int NOT NULL, standard_field_id int NOT NULL, standard_field_value nvarchar(max),
+        original_device_value nvarchar(max), standard_field_num float NULL
+    );
+    CREATE TABLE #ingest_ids (seq int NOT NULL PRIMARY KEY, id int NOT NULL, inserted bit NOT NULL);
+"""
+
+MSSQL_MERGE_SQL = f"""
+    MERGE INTO cvsc_sign_main WITH (HOLDLOCK) AS t
+    USING #ingest_main AS s ON t.device_id = s.device_id AND t.collection_time = s.collection_time
+    WHEN NOT MATCHED THEN
+        INSERT ({', '.join(MAIN_COLUMNS)})
+        VALUES ({', '.join('s.' + c for c in MAIN_COLUMNS)})
+    OUTPUT s.seq, INSERTED.id, 1 INTO #ingest_ids (seq, id, inserted);
+"""
+
+# 已存在的记录（重试或重复上报）：取回原主表ID，不再写明细
+MSSQL_EXISTING_SQL = """
+    INSERT INTO #ingest_ids (seq, id, inserted)
+    SELECT s.seq, MAX(t.id), 0
+    FROM #ingest_main s
+    JOIN cvsc_sign_main t ON t.device_id = s.device_id AND t.collection_time = s.collection_time
+    WHERE NOT EXISTS (SELECT 1 FROM #ingest_ids i WHERE i.seq = s.seq)
+    GROUP BY s.seq;
+"""
+
+MSSQL_DETAIL_SQL = """
+    INSERT INTO cvsc_sign_detail
+        (vital_sign_data_id, standard_field_id, standard_field_value, original_device_value, detail_collection_time, standard_field_num)
+    SELECT i.id, d.standard_field_id, d.standard_field_value, d.original_device_value, m.collection_time, d.standard_field_num
+    FROM #ingest_detail d
+    JOIN #ingest_ids i ON i.seq = d.seq AND i.inserted = 1
+    JOIN #ingest_main m ON m.seq = d.seq;
+"""
+
+MSSQL_IDS_SQL = "SELECT seq, id, inserted FROM #ingest_ids"
+MSSQL_DROP_SQL = "DROP TABLE #ingest_main, #ingest_detail, #ingest_ids"
+
+# SQLite 替身库中时间以文本存储，格式与 benchmarks/synthetic_dataset.py 一致
+SQLITE_TIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+SQLITE_KEYS_SQL = "CREATE TEMP TABLE IF NOT EXISTS ingest_keys (seq INTEGER PRIMARY KEY, device_id INTEGER, collection_time TEXT)"
+SQLITE_EXISTING_SQL = """
+    SELECT k.seq, MAX(m.id) FROM ingest_keys k
+    JOIN cvsc_sign_main m ON m.device_id = k.device_id AND m.collection_time = k.collection_time
+    GROUP BY k.seq
+"""
+
+class PayloadError(ValueError):
+    """采集记录不合法"""
+
+class DeviceDirectory:
+    """监护设备目录：按设备ID、编码或 MAC 查设备型号"""
+
+    def __init__(self, refresh_seconds=None):
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else config.INGEST_DIRECTORY_REFRESH_SECONDS
+        self._lock = threading.Lock()
+        self._devices = {}
+        self._refreshed_at = 0.0
+
+    def refresh(self, force=False, min_interval=None):
+        """重新加载设备；force 时仍受 min_interval 限制，避免未知设备反复触发加载"""
+        elapsed = time.monotonic() - self._refreshed_at
+        if not force and elapsed < self.refresh_seconds:
+            return
+        if force and min_interval is not None and elapsed < min_interval:
+            return
+        with self._lock:
+            # 采集服务不在 Streamlit 会话中运行：查询失败记录日志并抛出，失败也计入刷新时间，避免反复重试
+            self._refreshed_at = time.monotonic()
+            devices = run_query(DEVICES_SQL, raise_errors=True)
+            if devices.empty:
+                return
+            index = {}
+            for row in devices.itertuples(index=False):
+                model_id = None if pd.isna(row.model_id) else int(row.model_id)
+                entry = (int(row.id), model_id, row.ward_name)
+                index[('id', int(row.id))] = entry
+                if row.monitor_code:
+                    index[('code', str(row.monitor_code))] = entry
+                if row.mac:
+                    index[('mac', str(row.mac).upper())] = entry
+            # 整体替换，读取方不需要加锁
+            self._devices = index
+            logger.info(f"采集设备目录已加载：{len(devices)} 台设备")
+
+    def device(self, payload):
+        """按请求中的设备标识解析 (设备ID, 型号ID, 病区)"""
+        if payload.get('device_id') is not None:
+            key = ('id', int(payload['device_id']))
+        elif payload.get('device_code'):
+            key = ('code', str(payload['device_code']))
+        elif payload.get('mac'):
+            key = ('mac', str(payload['mac']).upper())
+        else:
+            raise PayloadError("缺少设备标识（device_id、device_code 或 mac）")
+        entry = self._devices.get(key)
+        if entry is None:
+            # 新登记的设备：提前刷新一次目录，刷新失败时按未知设备处理
+            try:
+                self.refresh(force=True, min_interval=5)
+            except Exception as e:
+                logger.error(f"刷新采集设备目录失败: {e}")
+            entry = self._devices.get(key)
+        if entry is None:
+            raise PayloadError(f"未知设备: {key[1]}")
+        if entry[1] is None:
+            raise PayloadError(f"设备 {key[1]} 未配置型号")
+        return entry
+
+    def stats(self):
+        return {'devices': len({entry[0] for entry in self._devices.values()})}
+
+def _parse_time(value, default):
+    """解析采集时间文本，缺省为接收时间"""
+    if value in (None, ''):
+        return default
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        raise PayloadError(f"采集时间格式错误: {value}") from None
+    # 带时区的时间转换为本地时间（库中时间为本地时间）
+    parsed = parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+    if parsed < MIN_COLLECTION_TIME:
+        raise PayloadError(f"采集时间超出范围: {value}")
+    return parsed
+
+def parse_payload(payload, directory, mappings, received_at=None):
+    """将一条采集记录解析为 (主表行, [(FieldMapping, 原始值)])"""
+    if not isinstance(payload, dict):
+        raise PayloadError("采集记录必须是 JSON 对象")
+    values = payload.get('values')
+    if not isinstance(values, dict) or not values:
+        raise PayloadError("缺少体征数据 values")
+    received_at = received_at or datetime.now()
+    device_id, model_id, ward_name = directory.device(payload)
+
+    details = []
+    for name, raw in values.items():
+        mapping = mappings.lookup(model_id, name)
+        if mapping is None or raw is None:
+            continue
+        details.append((mapping, str(raw)))
+    if not details:
+        raise PayloadError("没有已配置映射的体征字段")
+
+    main = {field: (None if payload.get(field) is None else str(payload[field])) for field in MAIN_FIELDS}
+    for field, length in MAIN_FIELD_LENGTHS.items():
+        if main[field] is not None and len(main[field]) > length:
+            raise PayloadError(f"{field} 超过 {length} 个字符")
+    # 病区名称来自设备目录（列宽更大），截断到主表列宽
+    if not main['collection_location'] and ward_name:
+        main['collection_location'] = str(ward_name)[:MAIN_FIELD_LENGTHS['collection_location']]
+    main.update({
+        'device_id': device_id,
+        'collection_time': _parse_time(payload.get('collection_time'), received_at),
+        'collector': '自动采集',
+        'data_status': '已入库',
+        'create_time': received_at,
+    })
+    return main, details
+
+def convert_details(details):
+    """整批换算明细：按映射分组向量化计算，返回 (标准值文本列表, 数值数组)"""
+    raw = np.array([d[1] for d in details], dtype=object)
+    # 按映射对象分组：映射表在批次中途重新加载时，新旧版本的同一映射各自按自己的公式换算
+    codes, keys = pd.factorize(np.array([id(d[0]) for d in details]))
+    converters = {id(d[0]): d[0].converter for d in details}
+    numbers = np.full(len(details), np.nan)
+    values = to_numeric(raw)
+    for code, key in enumerate(keys):
+        converter = converters[key]
+        # 公式不合法的映射只保存原始值
+        if converter is not None:
+            rows = np.flatnonzero(codes == code)
+            numbers[rows] = converter(values[rows])
+    texts = format_values(numbers)
+    # 无法换算的值（如文本型体征）原样保存
+    texts = [t if t is not None else r for t, r in zip(texts, raw)]
+    return texts, numbers
+
+def _detail_rows(records):
+    """展开为明细参数行（seq 为主记录在批次内的序号）"""
+    flat = [(seq, d) for seq, (_, details) in enumerate(records) for d in details]
+    texts, numbers = convert_details([d for _, d in flat])
+    return [
+        {'seq': seq, 'standard_field_id': d[0].standard_field_id, 'standard_field_value': value,
+         'original_device_value': d[1], 'standard_field_num': float(num) if np.isfinite(num) else None}
+        for (seq, d), value, num in zip(flat, texts, numbers)
+    ]
+
+def _write_mssql(conn, mains, details):
+    """SQL Server：fast_executemany 写临时表，MERGE 写主表并取回ID，再整批写新记录的明细；返回 {seq: (主表ID, 是否新写入)}
+
+    临时表在本事务中创建，写入失败时随事务回滚一起撤销，因此只在成功后删除：
+    事务已失效时再执行 DROP 会抛出新的异常，掩盖原始错误。
+    """
+    conn.execute(text(MSSQL_STAGE_SQL))
+    conn.execute(text(f"INSERT INTO #ingest_main (seq, {', '.join(MAIN_COLUMNS)}) VALUES (:seq, {', '.join(':' + c for c in MAIN_COLUMNS)})"), mains)
+    conn.execute(text(f"INSERT INTO #ingest_detail ({', '.join(DETAIL_COLUMNS)}) VALUES ({', '.join(':' + c for c in DETAIL_COLUMNS)})"), details)
+    conn.execute(text(MSSQL_MERGE_SQL))
+    conn.execute(text(MSSQL_EXISTING_SQL))
+    conn.execute(text(MSSQL_DETAIL_SQL))
+    ids = {seq: (main_id, bool(inserted)) for seq, main_id, inserted in conn.execute(text(MSSQL_IDS_SQL)).fetchall()}
+    conn.execute(text(MSSQL_DROP_SQL))
+    return ids
+
+def _write_sqlite(conn, mains, details):
+    """SQLite 替身库：写入线程唯一，跳过已存在的记录，按当前最大ID顺延分配主表ID；返回 {seq: (主表ID, 是否新写入)}"""
+    for m in mains:
+        m['collection_time'] = m['collection_time'].strftime(SQLITE_TIME_FORMAT)
+        m['create_time'] = m['create_time'].strftime(SQLITE_TIME_FORMAT)
+    conn.execute(text(SQLITE_KEYS_SQL))
+    conn.execute(text("DELETE FROM ingest_keys"))
+    conn.execute(text("INSERT INTO ingest_keys (seq, device_id, collection_time) VALUES (:seq, :device_id, :collection_time)"),
+                 [{'seq': m['seq'], 'device_id': m['device_id'], 'collection_time': m['collection_time']} for m in mains])
+    ids = {seq: (main_id, False) for seq, main_id in conn.execute(text(SQLITE_EXISTING_SQL)).fetchall()}
+
+    start = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM cvsc_sign_main")).scalar()
+    new = [m for m in mains if m['seq'] not in ids]
+    for offset, m in enumerate(new):
+        m['id'] = start + 1 + offset
+        ids[m['seq']] = (m['id'], True)
+    if new:
+        conn.execute(text(f"INSERT INTO cvsc_sign_main (id, {', '.join(MAIN_COLUMNS)}) VALUES (:id, {', '.join(':' + c for c in MAIN_COLUMNS)})"), new)
+    times = {m['seq']: m['collection_time'] for m in new}
+    details = [d for d in details if d['seq'] in times]
+    for d in details:
+        d['vital_sign_data_id'] = ids[d['seq']][0]
+        d['detail_collection_time'] = times[d['seq']]
+    if details:
+        conn.execute(text("""
+            INSERT INTO cvsc_sign_detail
+                (vital_sign_data_id, standard_field_id, standard_field_value, original_device_value, detail_collection_time, standard_field_num)
+            VALUES (:vital_sign_data_id, :standard_field_id, :standard_field_value, :original_device_value, :detail_collection_time, :standard_field_num)
+        """), details)
+    return ids
+
+def write_batch(records):
+    """在一个事务中写入一批 (主表行, 明细) 记录，返回按顺序的 (主表ID列表, 是否为重复记录列表)
+
+    批次内幂等键相同的记录只写第一条；库中已存在的记录不再写入，返回原主表ID。
+    """
+    first = {}
+    positions = [first.setdefault((main['device_id'], main['collection_time']), seq) for seq, (main, _) in enumerate(records)]
+    unique = [records[seq] for seq in first.values()]
+    mains = [dict(main, seq=seq) for seq, (main, _) in enumerate(unique)]
+    details = _detail_rows(unique)
+    with get_db_engine().begin() as conn:
+        ids = _write_sqlite(conn, mains, details) if is_sqlite() else _write_mssql(conn, mains, details)
+    # 原记录序号 -> 去重后序号
+    order = {seq: i for i, seq in enumerate(first.values())}
+    main_ids, duplicates = [], []
+    for seq, pos in enumerate(positions):
+        main_id, inserted = ids[order[pos]]
+        main_ids.append(main_id)
+        duplicates.append(pos != seq or not inserted)
+    return main_ids, duplicates
+
+class Ticket:
+    """一次提交的写入回执，所在批次提交或失败后完成"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.main_ids = None
+        self.duplicates = None
+        self.error = None
+
+    def resolve(self, main_ids=None, duplicates=None, error=None):
+        self.main_ids, self.duplicates, self.error = main_ids, duplicates, error
+        self._done.set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+class IngestBatcher:
+    """微批写入：各请求线程提交记录，单个写入线程按条数或等待时间攒批写入"""
+
+    def __init__(self, writer=write_batch, batch_size=None, flush_seconds=None):
+        self.writer = writer
+        self.batch_size = batch_size or config.INGEST_BATCH_SIZE
+        self.flush_seconds = config.INGEST_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self._cond = threading.Condition()
+        self._pending = []  # (records, ticket)
+        self._observations = 0
+        self._oldest = None
+        self._stopped = False
+        self._stats = {'requests': 0, 'records': 0, 'duplicates': 0, 'observations': 0, 'batches': 0,
+                       'failed_batches': 0, 'failed_requests': 0,
+                       'write_seconds': 0.0, 'last_batch_ms': 0.0, 'last_batch_records': 0}
+        self._thread = threading.Thread(target=self._run, name="ingest_writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        """提交一组已解析的记录，返回回执"""
+        ticket = Ticket()
+        with self._cond:
+            first = not self._pending
+            if first:
+                self._oldest = time.monotonic()
+            self._pending.append((records, ticket))
+            self._observations += sum(len(details) for _, details in records)
+            # 第一条记录唤醒写入线程开始计时，攒满一批时立即写入
+            if first or self._observations >= self.batch_size:
+                self._cond.notify()
+        return ticket
+
+    def _take(self):
+        """等待攒满一批或超时，取出当前全部待写记录"""
+        with self._cond:
+            while True:
+                if self._stopped and not self._pending:
+                    return None
+                if self._pending:
+                    remaining = self.flush_seconds - (time.monotonic() - self._oldest)
+                    if self._observations >= self.batch_size or remaining <= 0 or self._stopped:
+                        break
+                    self._cond.wait(remaining)
+                else:
+                    self._cond.wait()
+            pending, self._pending, self._observations = self._pending, [], 0
+            return pending
+
+    def _write(self, pending):
+        """在一个事务中写入若干请求的记录并完成回执；失败时抛出异常，回执保持未完成"""
+        records = [record for batch, _ in pending for record in batch]
+        started = time.perf_counter()
+        main_ids, duplicates = self.writer(records)
+        elapsed = time.perf_counter() - started
+        self._stats['batches'] += 1
+        self._stats['requests'] += len(pending)
+        self._stats['records'] += len(records)
+        self._stats['duplicates'] += sum(duplicates)
+        self._stats['observations'] += sum(len(details) for (_, details), duplicate in zip(records, duplicates) if not duplicate)
+        self._stats['write_seconds'] += elapsed
+        self._stats['last_batch_ms'] = elapsed * 1000
+        self._stats['last_batch_records'] = len(records)
+        offset = 0
+        for batch, ticket in pending:
+            ticket.resolve(main_ids=main_ids[offset:offset + len(batch)], duplicates=duplicates[offset:offset + len(batch)])
+            offset += len(batch)
+
+    def _run(self):
+        while True:
+            pending = self._take()
+            if pending is None:
+                return
+            try:
+                self._write(pending)
+                continue
+            except Exception as e:
+                logger.error(f"体征批量写入失败（{sum(len(batch) for batch, _ in pending)} 条记录）: {e}")
+                self._stats['failed_batches'] += 1
+                if len(pending) == 1:
+                    self._stats['failed_requests'] += 1
+                    pending[0][1].resolve(error=str(e))
+                    continue
+            # 整批事务已回滚：逐个请求单独重写，个别请求中的异常数据不影响同批的其他设备
+            for request in pending:
+                try:
+                    self._write([request])
+                except Exception as e:
+                    logger.error(f"体征写入失败（{len(request[0])} 条记录）: {e}")
+                    self._stats['failed_requests'] += 1
+                    request[1].resolve(error=str(e))
+
+    def stats(self):
+        """写入统计：累计条数、批次、写入耗时与写入吞吐量（明细/秒）"""
+        stats = dict(self._stats)
+        stats['queued_observations'] = self._observations
+        stats['observations_per_second'] = stats['observations'] / stats['write_seconds'] if stats['write_seconds'] else 0.0
+        return stats
+
+    def close(self):
+        """写完剩余记录后停止写入线程"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join()
+
+class IngestService:
+    """采集服务：解析请求、提交微批并等待写入确认"""
+
+    def __init__(self, directory=None, mappings=None, batcher=None):
+        self.directory = directory or DeviceDirectory()
+        self.mappings = mappings or MappingTable()
+        self.batcher = batcher or IngestBatcher()
+        self.rejected = 0
+        # 设备目录与映射表由后台线程刷新，请求路径只读内存
+        self.directory.refresh(force=True)
+        self.mappings.refresh(force=True)
+        self.mappings.start_auto_refresh()
+        threading.Thread(target=self._refresh_devices, name="ingest_directory_refresh", daemon=True).start()
+
+    def _refresh_devices(self):
+        while True:
+            time.sleep(self.directory.refresh_seconds)
+            try:
+                self.directory.refresh(force=True)
+            except Exception as e:
+                logger.error(f"刷新采集设备目录失败: {e}")
+
+    def ingest(self, payloads, timeout=None):
+        """写入一组采集记录，返回 (HTTP 状态码, 响应内容)"""
+        payloads = payloads if isinstance(payloads, list) else [payloads]
+        received_at = datetime.now()
+        records, rejected = [], []
+        for i, payload in enumerate(payloads):
+            try:
+                records.append(parse_payload(payload, self.directory, self.mappings, received_at))
+            except (PayloadError, TypeError, ValueError) as e:
+                rejected.append({'index': i, 'error': str(e)})
+        self.rejected += len(rejected)
+        if not records:
+            return 400, {'accepted': 0, 'rejected': rejected}
+
+        ticket = self.batcher.submit(records)
+        if not ticket.wait(timeout or config.INGEST_ACK_TIMEOUT):
+            # 批次仍在写入队列中，之后可能提交成功；重试由幂等键去重
+            return 202, {'status': 'pending', 'message': "已接收，写入尚未确认；以相同设备和采集时间重试不会重复写入",
+                         'queued': len(records), 'rejected': rejected}
+        if ticket.error:
+            return 503, {'error': f"写入失败: {ticket.error}", 'rejected': rejected}
+        duplicates = sum(ticket.duplicates)
+        return 200, {'accepted': len(records) - duplicates, 'duplicates': duplicates, 'main_ids': ticket.main_ids, 'rejected': rejected}
+
+    def stats(self):
+        stats = dict(self.batcher.stats(), rejected=self.rejected)
+        stats.update(self.directory.stats())
+        stats['mapping_table'] = self.mappings.stats()
+        return stats
+
+class IngestHandler(BaseHTTPRequestHandler):
+    """POST /vitals 写入采集记录，GET /stats 查看写入统计"""
+
+    service = None
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/vitals':
+            return self._reply(404, {'error': "未知路径"})
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0 or length > config.INGEST_MAX_BODY_BYTES:
+            return self._reply(413 if length > 0 else 400, {'error': "请求体为空或过大"})
+        try:
+            payloads = json.loads(self.rfile.read(length))
+        except (ValueError, UnicodeDecodeError) as e:
+            return self._reply(400, {'error': f"JSON 格式错误: {e}"})
+        self._reply(*self.service.ingest(payloads))
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            return self._reply(200, self.service.stats())
+        self._reply(404, {'error': "未知路径"})
+
+    def log_message(self, format, *args):
+        # 逐请求访问日志开销较大，只在调试级别输出
+        logger.debug(format % args)
+
+class IngestServer(ThreadingHTTPServer):
+    """每个连接一个线程；监听队列加长，避免大量设备同时连接时被拒绝"""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+def serve(host=None, port=None, service=None):
+    """启动 HTTP 采集服务（阻塞）"""
+    IngestHandler.service = service or IngestService()
+    server = IngestServer((host or config.INGEST_HOST, port or config.INGEST_PORT), IngestHandler)
+    logger.info(f"体征采集服务已启动: http://{server.server_address[0]}:{server.server_address[1]}/vitals")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        IngestHandler.service.batcher.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="体征采集写入服务")
+    parser.add_argument("--host", default=config.INGEST_HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=config.INGEST_PORT, help="监听端口")
+    parser.add_argument("--batch-size", type=int, default=config.INGEST_BATCH_SIZE, help="每批写入的明细条数")
+    parser.add_argument("--flush-seconds", type=float, default=config.INGEST_FLUSH_SECONDS, help="最长攒批时间（秒）")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    serve(args.host, args.port, IngestService(batcher=IngestBatcher(batch_size=args.batch_size, flush_seconds=args.flush_seconds)))
+
+if __name__ == "__main__":
+    main()
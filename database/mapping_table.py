@@ -0,0 +1,126 @@
+import pandas as pd
+import logging
+import threading
+import time
+from collections import namedtuple
+from .queries import run_query
+from utils.formula import compile_formula, FormulaError
+from config import config
+
+logger = logging.getLogger(__name__)
+
+MAPPINGS_SQL = """
+    SELECT m.id AS model_id, m.model_name, r.id AS mapping_id, r.device_field_name, r.standard_field_id, r.conversion_formula
+    FROM cvsc_device_model_config m
+    LEFT JOIN cvsc_device_field_rel r ON r.model_id = m.id
+    ORDER BY m.id, r.id
+"""
+
+# 单个设备字段的映射：converter 为编译后的转换公式，公式不合法时为 None
+FieldMapping = namedtuple('FieldMapping', ['mapping_id', 'standard_field_id', 'formula', 'converter'])
+
+def field_key(device_field_name):
+    """设备字段名的查找键：与库中 Chinese_PRC_CI_AS 排序规则一致，忽略大小写和首尾空格"""
+    return str(device_field_name).strip().casefold()
+
+class MappingTable:
+    """设备字段映射的内存查找表：(型号ID, 设备字段名) -> FieldMapping，内容变化时版本号递增并整体替换快照
+
+    查找只读取当前快照的字典，不访问数据库；刷新由后台线程或调用方显式触发。
+    """
+
+    def __init__(self, refresh_seconds=None):
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else config.MAPPING_TABLE_REFRESH_SECONDS
+        self._lock = threading.Lock()
+        self._snapshot = self._build(pd.DataFrame(columns=['model_id', 'model_name', 'mapping_id', 'device_field_name', 'standard_field_id', 'conversion_formula']), 0, None)
+        self._refreshed_at = 0.0
+        self._thread = None
+
+    def snapshot(self):
+        """当前快照：{'version', 'checksum', 'fields', 'models', 'model_ids', 'invalid'}"""
+        return self._snapshot
+
+    @property
+    def version(self):
+        """映射版本号，每次内容变化加一"""
+        return self._snapshot['version']
+
+    def refresh(self, force=False):
+        """重新加载映射（数百行），内容未变化时保留原快照；查询失败时记录日志并抛出异常，旧快照继续生效"""
+        if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return
+            # 查找表由采集服务在 Streamlit 会话之外使用，查询失败不走 st.error
+            self._refreshed_at = time.monotonic()
+            df = run_query(MAPPINGS_SQL, raise_errors=True)
+            if df.empty:
+                return
+            checksum = int(pd.util.hash_pandas_object(df, index=False).sum())
+            if self._snapshot['checksum'] == checksum:
+                return
+            version = self._snapshot['version'] + 1
+            # 整体替换引用，查找方始终读到完整的一版
+            self._snapshot = self._build(df, version, checksum)
+            logger.info(f"设备字段映射表已加载，版本 {version}，{len(self._snapshot['fields'])} 条映射")
+
+    @staticmethod
+    def _build(df, version, checksum):
+        """构建快照：映射哈希表（公式在加载时编译）与型号名称索引"""
+        fields, models, invalid = {}, {}, []
+        for row in df.itertuples(index=False):
+            models[int(row.model_id)] = row.model_name
+            if pd.isna(row.mapping_id):
+                continue
+            try:
+                converter = compile_formula(row.conversion_formula)
+            except FormulaError as e:
+                converter = None
+                invalid.append(int(row.mapping_id))
+                logger.warning(f"映射 {int(row.mapping_id)} 的转换公式不合法: {e}")
+            fields[(int(row.model_id), field_key(row.device_field_name))] = FieldMapping(
+                int(row.mapping_id), int(row.standard_field_id), row.conversion_formula, converter
+            )
+        return {
+            'version': version,
+            'checksum': checksum,
+            'fields': fields,
+            'models': models,
+            'model_ids': {name: model_id for model_id, name in models.items()},
+            'invalid': invalid,
+        }
+
+    def lookup(self, model_id, device_field_name):
+        """查找设备字段映射，未配置时返回 None"""
+        return self._snapshot['fields'].get((model_id, field_key(device_field_name)))
+
+    def model_id(self, model_name):
+        """按型号名称查型号ID"""
+        return self._snapshot['model_ids'].get(model_name)
+
+    def start_auto_refresh(self):
+        """启动后台刷新线程（进程内只启动一次），查找路径不再触发加载"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._refresh_loop, name="mapping_table_refresh", daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.refresh(force=True)
+            except Exception as e:
+                logger.error(f"刷新设备字段映射表失败: {e}")
+            time.sleep(self.refresh_seconds)
+
+    def stats(self):
+        """映射表概况"""
+        snapshot = self._snapshot
+        return {
+            'version': snapshot['version'],
+            'models': len(snapshot['models']),
+            'mappings': len(snapshot['fields']),
+            'invalid': len(snapshot['invalid']),
+        }
@@ -0,0 +1,175 @@
+"""
+映射批量验证：抽取指定设备型号最近的历史明细，用（当前或候选的）转换公式重新计算原始设备值，
+与已存的标准值比较，报告不一致率和吞吐量。
+
+明细按ID降序键集分页读取，每块交给进程池转换比较，读取下一块与计算并行进行；
+公式变更上线前可先用候选公式跑一遍，确认不会改变历史数据的换算结果。
+"""
+import streamlit as st
+import pandas as pd
+import numpy as np
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .queries import run_query
+from .statements import get_statement
+from utils.formula import compile_formula, check_conversions, FormulaError, CHECK_MATCH, CHECK_LABELS
+from config import config
+
+logger = logging.getLogger(__name__)
+
+MAPPINGS_SQL = """
+    SELECT r.standard_field_id, r.device_field_name, r.conversion_formula, c.description
+    FROM cvsc_device_field_rel r
+    LEFT JOIN cvsc_standard_sign_config c ON c.id = r.standard_field_id
+    WHERE r.model_id = :model_id
+    ORDER BY r.standard_field_id
+"""
+
+# 从最新明细向前读取；设备型号经监护设备表 modelID 确定
+SAMPLE_SQL = """
+    SELECT TOP (:page_size) d.id, d.standard_field_id, d.original_device_value, d.standard_field_value
+    FROM cvsc_sign_detail d
+    JOIN cvsc_sign_main m ON m.id = d.vital_sign_data_id
+    JOIN mr_monitor_info i ON i.id = m.device_id
+    WHERE i.modelID = :model_id
+    {cursor_filter}
+    ORDER BY d.id DESC
+"""
+
+SAMPLE_LIMIT = 100  # 返回的不一致样例行数
+
+@st.cache_resource
+def get_validation_pool():
+    """创建映射验证进程池（进程内共享）；使用 spawn 启动，避免复制 Streamlit 进程的线程状态"""
+    return ProcessPoolExecutor(max_workers=config.MAPPING_VALIDATION_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+
+def get_model_mappings(model_id):
+    """获取设备型号的字段映射"""
+    return run_query(get_statement("mapping_validation_mappings", MAPPINGS_SQL), {'model_id': int(model_id)})
+
+def _iter_samples(model_id, limit, chunk_size):
+    """按明细ID降序分块读取历史明细，共不超过 limit 行"""
+    cur_id = None
+    fetched = 0
+    while fetched < limit:
+        page_size = min(chunk_size, limit - fetched)
+        params = {'model_id': int(model_id), 'page_size': page_size}
+        if cur_id is None:
+            stmt = get_statement("mapping_validation_sample", SAMPLE_SQL.format(cursor_filter=""))
+        else:
+            stmt = get_statement("mapping_validation_sample:cursor", SAMPLE_SQL.format(cursor_filter="AND d.id < :cur_id"))
+            params['cur_id'] = cur_id
+        df = run_query(stmt, params)
+        if df.empty:
+            return
+        fetched += len(df)
+        cur_id = int(df['id'].iloc[-1])
+        yield df
+        if len(df) < page_size:
+            return
+
+def _chunk_args(df):
+    """提取交给工作进程的列（只传数组，减少序列化开销）"""
+    return (
+        df['standard_field_id'].to_numpy(dtype=np.int64),
+        df['original_device_value'].to_numpy(dtype=object),
+        df['standard_field_value'].to_numpy(dtype=object),
+    )
+
+def validate_model_mappings(model_id, limit=None, formulas=None, chunk_size=None, tolerance=None, progress=None):
+    """验证设备型号的字段映射
+
+    formulas 为 {standard_field_id: 候选公式}，覆盖当前配置；progress(已处理行数, 上限) 用于显示进度。
+    返回 {'success', 'rows', 'mismatch_rate', 'rows_per_second', 'elapsed', 'by_field', 'samples'}，失败时返回 {'success': False, 'error'}。
+    """
+    limit = int(limit or config.MAPPING_VALIDATION_MAX_ROWS)
+    chunk_size = int(chunk_size or config.MAPPING_VALIDATION_CHUNK_SIZE)
+    tolerance = config.MAPPING_VALIDATION_TOLERANCE if tolerance is None else tolerance
+
+    mappings = get_model_mappings(model_id)
+    if mappings.empty:
+        return {'success': False, 'error': "该设备型号没有字段映射"}
+    active = {int(r.standard_field_id): r.conversion_formula for r in mappings.itertuples(index=False)}
+    active.update({int(k): v for k, v in (formulas or {}).items()})
+    try:
+        # 先在本进程编译，公式不合法时直接报错而不是在工作进程中失败
+        for formula in active.values():
+            compile_formula(formula)
+    except FormulaError as e:
+        return {'success': False, 'error': f"公式不合法: {e}"}
+
+    started = time.perf_counter()
+    ncodes = len(CHECK_LABELS)
+    field_index = pd.Index(sorted(active))
+    counts = np.zeros((len(field_index) + 1, ncodes), dtype=np.int64)  # 最后一行为无映射字段
+    samples = []
+    rows = 0
+
+    def collect(df, codes, converted):
+        nonlocal rows
+        pos = field_index.get_indexer(df['standard_field_id'].to_numpy(dtype=np.int64))
+        pos[pos < 0] = len(field_index)
+        np.add.at(counts, (pos, codes), 1)
+        rows += len(df)
+        if len(samples) < SAMPLE_LIMIT:
+            bad = np.flatnonzero(codes != CHECK_MATCH)[:SAMPLE_LIMIT - len(samples)]
+            if len(bad):
+                sample = df.iloc[bad][['id', 'standard_field_id', 'original_device_value', 'standard_field_value']].copy()
+                sample['converted_value'] = converted[bad]
+                sample['result'] = np.asarray(CHECK_LABELS, dtype=object)[codes[bad]]
+                samples.extend(sample.to_dict('records'))
+        if progress:
+            progress(rows, limit)
+
+    chunks = _iter_samples(model_id, limit, chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        return {'success': False, 'error': "该设备型号没有历史明细"}
+    if len(first) < chunk_size:
+        # 数据量不足一块时直接在本进程计算，省去进程间传输
+        collect(first, *check_conversions(active, *_chunk_args(first), tolerance))
+    else:
+        pool = get_validation_pool()
+        pending = []
+        try:
+            df = first
+            while df is not None:
+                pending.append((df, pool.submit(check_conversions, active, *_chunk_args(df), tolerance)))
+                # 最多保留两倍进程数的在途块，控制内存占用
+                while len(pending) >= config.MAPPING_VALIDATION_WORKERS * 2:
+                    done, future = pending.pop(0)
+                    collect(done, *future.result())
+                df = next(chunks, None)
+            for done, future in pending:
+                collect(done, *future.result())
+        except Exception as e:
+            for _, future in pending:
+                future.cancel()
+            logger.error(f"映射批量验证失败: {e}")
+            return {'success': False, 'error': str(e)}
+    elapsed = time.perf_counter() - started
+
+    by_field = pd.DataFrame(counts, columns=CHECK_LABELS)
+    by_field.insert(0, 'standard_field_id', pd.array(list(field_index) + [None], dtype='Int64'))
+    labels = mappings.set_index('standard_field_id')
+    by_field.insert(1, 'description', by_field['standard_field_id'].map(labels['description']))
+    by_field.insert(2, 'device_field_name', by_field['standard_field_id'].map(labels['device_field_name']))
+    by_field.insert(3, 'conversion_formula', by_field['standard_field_id'].map(active))
+    by_field['readings'] = counts.sum(axis=1)
+    by_field = by_field[by_field['readings'] > 0].reset_index(drop=True)
+    by_field['mismatch_rate'] = (by_field['readings'] - by_field[CHECK_LABELS[CHECK_MATCH]]) / by_field['readings'] * 100
+
+    mismatched = rows - int(counts[:, CHECK_MATCH].sum())
+    logger.info(f"映射批量验证：型号 {model_id}，{rows} 行，不一致 {mismatched} 行，耗时 {elapsed:.2f}s")
+    return {
+        'success': True,
+        'rows': rows,
+        'mismatched': mismatched,
+        'mismatch_rate': mismatched / rows * 100 if rows else 0.0,
+        'rows_per_second': rows / elapsed if elapsed > 0 else 0.0,
+        'elapsed': elapsed,
+        'by_field': by_field,
+        'samples': pd.DataFrame(samples),
+    }
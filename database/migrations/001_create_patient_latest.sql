@@ -0,0 +1,49 @@
+-- 001: 患者最新状态汇总表 cvsc_patient_latest
+--
+-- 每位患者一行，保存最近一次采集的床号、病区、类型与采集时间，
+-- 供患者检索、基本信息、看板卡片与病区统计读取，避免对 cvsc_sign_main 做 GROUP BY / TOP 1。
+-- 由 database/patient_summary.py 按 cvsc_sign_main.id 水位线增量维护。
+
+CREATE TABLE UNIONDEV.dbo.cvsc_patient_latest (
+	patient_id nvarchar(50) COLLATE Chinese_PRC_CI_AS NOT NULL,
+	patient_name nvarchar(50) COLLATE Chinese_PRC_CI_AS NULL,
+	sex nvarchar(5) COLLATE Chinese_PRC_CI_AS NULL,
+	age nvarchar(5) COLLATE Chinese_PRC_CI_AS NULL,
+	hospital_id nvarchar(20) COLLATE Chinese_PRC_CI_AS NULL,
+	bed_no nvarchar(50) COLLATE Chinese_PRC_CI_AS NULL,
+	collection_location nvarchar(50) COLLATE Chinese_PRC_CI_AS NULL,
+	patient_type nvarchar(20) COLLATE Chinese_PRC_CI_AS NULL,
+	last_main_id int NOT NULL,
+	last_time datetime NOT NULL,
+	updated_at datetime NOT NULL DEFAULT GETDATE(),
+	CONSTRAINT PK_cvsc_patient_latest PRIMARY KEY (patient_id)
+);
+CREATE NONCLUSTERED INDEX IX_cvsc_patient_latest_last_time ON UNIONDEV.dbo.cvsc_patient_latest (last_time DESC);
+CREATE NONCLUSTERED INDEX IX_cvsc_patient_latest_location ON UNIONDEV.dbo.cvsc_patient_latest (collection_location, last_time DESC);
+
+-- 汇总任务水位线：记录已处理的最大 cvsc_sign_main.id
+CREATE TABLE UNIONDEV.dbo.cvsc_summary_watermark (
+	name nvarchar(50) COLLATE Chinese_PRC_CI_AS NOT NULL,
+	last_id int NOT NULL,
+	updated_at datetime NOT NULL DEFAULT GETDATE(),
+	CONSTRAINT PK_cvsc_summary_watermark PRIMARY KEY (name)
+);
+
+-- 病区统计按最新一次采集关联明细，需要明细表的主表外键索引
+CREATE NONCLUSTERED INDEX IX_cvsc_sign_detail_vital_sign_data_id ON UNIONDEV.dbo.cvsc_sign_detail (vital_sign_data_id)
+	INCLUDE (standard_field_id);
+
+-- 初始填充：以当前最大ID为水位线，取每位患者最新一条记录
+DECLARE @cur_id int = (SELECT ISNULL(MAX(id), 0) FROM UNIONDEV.dbo.cvsc_sign_main);
+
+INSERT INTO UNIONDEV.dbo.cvsc_patient_latest
+	(patient_id, patient_name, sex, age, hospital_id, bed_no, collection_location, patient_type, last_main_id, last_time)
+SELECT patient_id, patient_name, sex, age, hospital_id, bed_no, collection_location, patient_type, id, collection_time
+FROM (
+	SELECT m.*, ROW_NUMBER() OVER (PARTITION BY m.patient_id ORDER BY m.collection_time DESC, m.id DESC) AS rn
+	FROM UNIONDEV.dbo.cvsc_sign_main m
+	WHERE m.patient_id IS NOT NULL AND m.id <= @cur_id
+) t
+WHERE rn = 1;
+
+INSERT INTO UNIONDEV.dbo.cvsc_summary_watermark (name, last_id) VALUES (N'patient_latest', @cur_id);
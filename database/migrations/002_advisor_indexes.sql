@@ -0,0 +1,29 @@
+-- 索引顾问生成于 2026-10-17 02:57（python -m benchmarks.index_advisor）
+--
+-- 依据 run_query 采集到的语句分析谓词与关联条件，推荐以下覆盖索引。
+-- 离线建索引，建索引期间会阻塞表上的写入，请在低峰期执行；Enterprise/Developer 版可加 --online 生成在线建索引脚本。
+--
+-- 本地替身库基准（1m，994740 条明细）：建索引前 -> 建索引后
+-- 查询                                               p50(ms)             p95(ms)
+-- search_patients:keyword                  6.03 -> 5.94         6.93 -> 8.83    
+-- search_patients:location                 4.77 -> 4.78         5.85 -> 5.34    
+-- query_vital_signs_paginated:24h          5.82 -> 3.10        11.84 -> 9.87    
+-- query_vital_signs_paginated:7d          15.54 -> 12.86       36.92 -> 34.01   
+-- query_vital_signs_page:7d                9.40 -> 4.65        26.71 -> 13.80   
+-- get_patient_basic_info                   2.90 -> 2.06         3.58 -> 3.21    
+-- get_overview_stats                      18.56 -> 19.78       20.19 -> 21.30   
+-- get_location_stats                      19.77 -> 19.67       20.59 -> 21.66   
+-- get_field_mappings                       2.32 -> 2.79         3.30 -> 3.52    
+-- get_standard_fields                      2.83 -> 3.71         3.66 -> 4.25    
+-- get_device_models                        2.72 -> 3.36         3.54 -> 4.01    
+-- get_mapping_stats                        6.58 -> 8.07         7.51 -> 8.32    
+--
+-- 说明：
+--   cvsc_patient_latest.patient_id: 前导通配符 LIKE 无法使用索引（已由内存索引 / 汇总表承担）
+--   cvsc_patient_latest.patient_name: 前导通配符 LIKE 无法使用索引（已由内存索引 / 汇总表承担）
+
+-- cvsc_sign_main：2 条语句受益，累计耗时 352 ms
+--   SELECT m.collection_time, d.standard_field_id, d.standard_field_value, s.field_name, s.description, s.unit, s.normal_range_low, s.normal_range_high, s
+--   SELECT p.id AS main_id, p.collection_time, d.standard_field_id, d.standard_field_value, s.field_name, s.description, s.unit, s.normal_range_low, s.nor
+--   创建后 IX_cvsc_sign_main_patient_id 成为冗余索引，可在确认无其他依赖后删除
+CREATE NONCLUSTERED INDEX IX_cvsc_sign_main_patient_id_collection_time ON UNIONDEV.dbo.cvsc_sign_main (patient_id, collection_time);
@@ -0,0 +1,11 @@
+-- 003: 明细数值列 cvsc_sign_detail.standard_field_num
+--
+-- standard_field_value 为 nvarchar(MAX)，读取后还要在应用端逐值解析。新增 float 数值列，
+-- 由采集写入方在写入时一并填充；历史数据由 database/detail_numeric.py 按明细ID分批回填（可中断续跑）。
+-- 查询层读取 COALESCE(standard_field_num, TRY_CAST(standard_field_value AS float))，回填完成前结果不变。
+
+-- 仅增加可空列，不重写已有数据页
+ALTER TABLE UNIONDEV.dbo.cvsc_sign_detail ADD standard_field_num float NULL;
+
+-- 回填水位线：记录已处理的最大 cvsc_sign_detail.id，从 0 开始
+INSERT INTO UNIONDEV.dbo.cvsc_summary_watermark (name, last_id) VALUES (N'detail_numeric', 0);
@@ -0,0 +1,35 @@
+-- 004: 体征正常范围分段表 cvsc_sign_range_band
+--
+-- cvsc_standard_sign_config 中的 normal_range_low/high、warning_threshold 为默认范围；
+-- 本表按性别、年龄段覆盖默认范围（sex 为空表示不限性别，年龄区间为 [age_min, age_max)，为空表示不限）。
+-- 同一字段命中多条时取最具体的一条：指定性别优先，其次年龄区间最窄。分段中为空的界限沿用默认范围。
+-- 由 database/normal_ranges.py 加载并定期检查变化，修改后无需重启应用。
+
+CREATE TABLE UNIONDEV.dbo.cvsc_sign_range_band (
+	id int IDENTITY(1,1) NOT NULL,
+	standard_field_id int NOT NULL,
+	sex nvarchar(5) COLLATE Chinese_PRC_CI_AS NULL,
+	age_min int NULL,
+	age_max int NULL,
+	normal_range_low float NULL,
+	normal_range_high float NULL,
+	warning_threshold float NULL,
+	remarks nvarchar(200) COLLATE Chinese_PRC_CI_AS NULL,
+	updated_at datetime NOT NULL DEFAULT GETDATE(),
+	CONSTRAINT PK_cvsc_sign_range_band PRIMARY KEY (id),
+	CONSTRAINT FK_cvsc_sign_range_band_field FOREIGN KEY (standard_field_id) REFERENCES UNIONDEV.dbo.cvsc_standard_sign_config(id)
+);
+CREATE NONCLUSTERED INDEX IX_cvsc_sign_range_band_field ON UNIONDEV.dbo.cvsc_sign_range_band (standard_field_id);
+
+-- 初始分段：儿童心率、呼吸与老年收缩压（按字段名匹配，字段名不一致时请调整）
+INSERT INTO UNIONDEV.dbo.cvsc_sign_range_band
+	(standard_field_id, sex, age_min, age_max, normal_range_low, normal_range_high, warning_threshold, remarks)
+SELECT c.id, b.sex, b.age_min, b.age_max, b.normal_range_low, b.normal_range_high, b.warning_threshold, b.remarks
+FROM (VALUES
+	(N'heart_rate', NULL, 0, 1, 100, 160, 180, N'婴儿心率'),
+	(N'heart_rate', NULL, 1, 12, 70, 120, 160, N'儿童心率'),
+	(N'respiratory_rate', NULL, 0, 1, 30, 60, 70, N'婴儿呼吸'),
+	(N'respiratory_rate', NULL, 1, 12, 18, 30, 40, N'儿童呼吸'),
+	(N'systolic_bp', NULL, 65, NULL, 90, 150, 180, N'老年收缩压')
+) AS b (field_name, sex, age_min, age_max, normal_range_low, normal_range_high, warning_threshold, remarks)
+JOIN UNIONDEV.dbo.cvsc_standard_sign_config c ON c.field_name = b.field_name;
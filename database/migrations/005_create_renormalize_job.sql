@@ -0,0 +1,27 @@
+-- 005: 映射公式变更后的明细重算任务表 cvsc_renormalize_job
+--
+-- 修改 cvsc_device_field_rel.conversion_formula 后，已入库明细的 standard_field_value 仍是按旧公式换算的。
+-- update_field_mapping 在公式变化时登记一条任务，由 database/renormalize.py 按明细ID升序分块，
+-- 用 original_device_value 和新公式重算该型号、该字段的明细，并同时更新 standard_field_num。
+-- last_id 为检查点：每块的明细更新与检查点推进在同一事务中提交，中断后从检查点继续。
+-- 采集服务的映射表定期刷新，任务登记后延迟 RENORMALIZE_DELAY_SECONDS 再开始，开始时把 max_id 置为当时的最大明细ID：
+-- 按旧公式写入的明细都在范围内，之后写入的明细已按新公式换算。
+-- 同一映射再次修改公式时，未完成的旧任务标记为 superseded，由新任务从头重算。
+
+CREATE TABLE UNIONDEV.dbo.cvsc_renormalize_job (
+	id int IDENTITY(1,1) NOT NULL,
+	mapping_id int NOT NULL,
+	model_id int NOT NULL,
+	standard_field_id int NOT NULL,
+	conversion_formula nvarchar(200) COLLATE Chinese_PRC_CI_AS NULL,
+	status nvarchar(20) COLLATE Chinese_PRC_CI_AS NOT NULL,
+	last_id int NOT NULL DEFAULT 0,
+	max_id int NOT NULL,
+	rows_scanned int NOT NULL DEFAULT 0,
+	rows_updated int NOT NULL DEFAULT 0,
+	error nvarchar(500) COLLATE Chinese_PRC_CI_AS NULL,
+	created_at datetime NOT NULL DEFAULT GETDATE(),
+	updated_at datetime NOT NULL DEFAULT GETDATE(),
+	CONSTRAINT PK_cvsc_renormalize_job PRIMARY KEY (id)
+);
+CREATE NONCLUSTERED INDEX IX_cvsc_renormalize_job_status ON UNIONDEV.dbo.cvsc_renormalize_job (status, id);
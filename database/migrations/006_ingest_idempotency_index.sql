@@ -0,0 +1,8 @@
+-- 006: 采集写入幂等键 (device_id, collection_time) 的索引
+--
+-- database/ingest.py 写入前按监护设备和采集时间查找已存在的主记录，已存在的跳过并返回原主表ID，
+-- 写入确认超时后客户端原样重试不会产生重复体征记录。MERGE 使用 HOLDLOCK，该索引使范围锁落在单个键上，
+-- 没有该索引时每批写入都要扫描同一设备的全部主记录。
+-- 该索引覆盖 IX_cvsc_sign_main_device_id 的查询，确认执行计划后可删除后者以降低写入开销。
+-- 主表很大，建索引期间会阻塞写入（离线建索引），请在低峰期执行。
+CREATE NONCLUSTERED INDEX IX_cvsc_sign_main_device_id_collection_time ON UNIONDEV.dbo.cvsc_sign_main (device_id, collection_time);
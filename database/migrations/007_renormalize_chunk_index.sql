@@ -0,0 +1,8 @@
+-- 007: 明细重算分块读取的索引
+--
+-- database/renormalize.py 按 (standard_field_id, id) 键集分块读取明细。没有该索引时，每块要沿主键扫描检查点之后全部字段的明细，
+-- 字段越少见，读到一块所需扫描的ID区间越长。有该索引时每块为一次范围查找，再按 vital_sign_data_id 关联主表过滤型号；
+-- 同一字段其他型号的明细仍会被读取后丢弃，代价与该字段的明细总数成正比。
+-- 明细表很大，建索引期间会阻塞写入（离线建索引），请在低峰期执行。
+CREATE NONCLUSTERED INDEX IX_cvsc_sign_detail_standard_field_id ON UNIONDEV.dbo.cvsc_sign_detail (standard_field_id, id)
+	INCLUDE (vital_sign_data_id);
@@ -0,0 +1,170 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import logging
+import re
+import threading
+import time
+from .queries import run_query
+from .sign_config import get_sign_config_table
+from config import config
+
+logger = logging.getLogger(__name__)
+
+BANDS_SQL = """
+    SELECT standard_field_id, sex, age_min, age_max, normal_range_low, normal_range_high, warning_threshold
+    FROM cvsc_sign_range_band
+"""
+
+BAND_COLUMNS = ['standard_field_id', 'sex', 'age_min', 'age_max', 'normal_range_low', 'normal_range_high', 'warning_threshold']
+RANGE_KEYS = (('min', 'normal_range_low'), ('max', 'normal_range_high'), ('warning', 'warning_threshold'))
+
+_AGE = re.compile(r"(\d+)")
+
+def parse_age(age):
+    """解析年龄文本（如 45、45岁、3月），不足一岁按 0 岁，无法解析返回 None"""
+    if age is None or (isinstance(age, float) and np.isnan(age)):
+        return None
+    text = str(age).strip()
+    match = _AGE.search(text)
+    if match is None:
+        return None
+    if '月' in text or '天' in text or '周' in text:
+        return 0
+    return int(match.group(1))
+
+def _band_key(sex, age):
+    """分段查找的缓存键：性别只区分男/女/未知"""
+    sex = sex if sex in ('男', '女') else None
+    return sex, parse_age(age)
+
+class NormalRangeRegistry:
+    """体征正常范围注册表：默认范围取自标准体征配置，按性别、年龄分段覆盖；配置或分段变化时整体替换快照"""
+
+    def __init__(self, refresh_seconds=None):
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else config.NORMAL_RANGE_REFRESH_SECONDS
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._refreshed_at = 0.0
+
+    def snapshot(self):
+        """当前快照：{'version', 'ids', 'descriptions', 'defaults', 'bands', 'resolved'}"""
+        self.refresh()
+        return self._snapshot
+
+    def refresh(self, force=False):
+        """检查标准体征配置版本和分段表内容，有变化时重建快照"""
+        if not force and self._snapshot is not None and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if not force and self._snapshot is not None and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return
+            config_snapshot = get_sign_config_table().snapshot()
+            bands = run_query(BANDS_SQL)
+            if bands.empty:
+                bands = pd.DataFrame(columns=BAND_COLUMNS)
+            checksum = int(pd.util.hash_pandas_object(bands, index=False).sum()) if len(bands) else 0
+            version = (config_snapshot['version'], checksum)
+            self._refreshed_at = time.monotonic()
+            if self._snapshot is not None and self._snapshot['version'] == version:
+                return
+            self._snapshot = self._build(config_snapshot, bands, version)
+            logger.info(f"正常范围注册表已加载：配置版本 {version[0]}，{len(bands)} 条分段")
+
+    @staticmethod
+    def _build(config_snapshot, bands, version):
+        """构建快照：默认范围数组与按具体程度排序的分段"""
+        codes, categories = config_snapshot['labels']['description']
+        descriptions = np.array([categories[c] if c >= 0 else None for c in codes], dtype=object)
+        bands = bands.copy()
+        for column in ['standard_field_id', 'age_min', 'age_max', 'normal_range_low', 'normal_range_high', 'warning_threshold']:
+            bands[column] = pd.to_numeric(bands[column], errors='coerce')
+        bands['sex'] = bands['sex'].where(bands['sex'].isin(['男', '女']), None)
+        # 具体程度：指定性别优先，其次年龄区间越窄越优先
+        span = bands['age_max'].fillna(200) - bands['age_min'].fillna(0)
+        bands = bands.assign(_has_sex=bands['sex'].notna(), _span=span)
+        bands = bands.sort_values(['_has_sex', '_span'], ascending=[False, True], ignore_index=True)
+        return {
+            'version': version,
+            'ids': config_snapshot['ids'],
+            'descriptions': descriptions,
+            'defaults': {column: values.astype(np.float64) for column, values in config_snapshot['ranges'].items()},
+            'bands': bands,
+            'resolved': {},
+        }
+
+    def arrays(self, sex=None, age=None):
+        """按患者性别、年龄解析各字段范围，返回 {'ids', 'normal_range_low', 'normal_range_high', 'warning_threshold'} 数组"""
+        snapshot = self.snapshot()
+        key = _band_key(sex, age)
+        resolved = snapshot['resolved'].get(key)
+        if resolved is not None:
+            return resolved
+
+        sex, age = key
+        resolved = {'ids': snapshot['ids']}
+        resolved.update({column: values.copy() for column, values in snapshot['defaults'].items()})
+        bands = snapshot['bands']
+        if len(bands):
+            match = bands['sex'].isna() | (bands['sex'] == sex) if sex else bands['sex'].isna()
+            if age is None:
+                match &= bands['age_min'].isna() & bands['age_max'].isna()
+            else:
+                match &= (bands['age_min'].isna() | (bands['age_min'] <= age)) & (bands['age_max'].isna() | (bands['age_max'] > age))
+            chosen = bands[match].drop_duplicates('standard_field_id')
+            pos = snapshot['ids'].get_indexer(chosen['standard_field_id'].to_numpy(dtype='int64'))
+            known = pos >= 0
+            for column in ('normal_range_low', 'normal_range_high', 'warning_threshold'):
+                values = chosen[column].to_numpy(dtype=np.float64)[known]
+                target = pos[known]
+                # 分段中为空的界限沿用默认范围
+                has_value = ~np.isnan(values)
+                resolved[column][target[has_value]] = values[has_value]
+        snapshot['resolved'][key] = resolved
+        return resolved
+
+    def evaluate(self, df, sex=None, age=None):
+        """为体征数据逐行对齐范围（按 standard_field_id），返回 (下限, 上限, 危急阈值) 数组"""
+        resolved = self.arrays(sex, age)
+        pos = resolved['ids'].get_indexer(df['standard_field_id'].to_numpy(dtype='int64'))
+        missing = pos < 0
+        result = []
+        for column in ('normal_range_low', 'normal_range_high', 'warning_threshold'):
+            values = resolved[column].take(pos, mode='clip') if len(resolved[column]) else np.full(len(pos), np.nan)
+            values[missing] = np.nan
+            result.append(values)
+        return tuple(result)
+
+    def ranges(self, sex=None, age=None):
+        """按体征项目名称返回范围 {描述: {'min', 'max', 'warning'}}，只包含有上下限的项目"""
+        snapshot = self.snapshot()
+        resolved = self.arrays(sex, age)
+        if 'ranges' in resolved:
+            return resolved['ranges']
+        ranges = {}
+        for i, description in enumerate(snapshot['descriptions']):
+            if description is None:
+                continue
+            item = {key: resolved[column][i] for key, column in RANGE_KEYS}
+            if np.isnan(item['min']) and np.isnan(item['max']):
+                continue
+            ranges[description] = {key: (None if np.isnan(value) else float(value)) for key, value in item.items()}
+        resolved['ranges'] = ranges
+        return ranges
+
+@st.cache_resource
+def get_normal_range_registry():
+    """获取进程内共享的正常范围注册表"""
+    return NormalRangeRegistry()
+
+def get_normal_ranges(sex=None, age=None):
+    """获取患者适用的各体征正常范围（按体征项目名称）"""
+    try:
+        return get_normal_range_registry().ranges(sex, age)
+    except Exception as e:
+        logger.error(f"获取正常范围失败: {e}")
+        return {}
+
+def get_normal_range(vital_sign, sex=None, age=None):
+    """获取单项体征的正常范围，无配置时返回 None"""
+    return get_normal_ranges(sex, age).get(vital_sign)
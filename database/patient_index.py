@@ -0,0 +1,236 @@
+import streamlit as st
+import pandas as pd
+import bisect
+import heapq
+import logging
+import threading
+import time
+from .queries import run_query
+from .statements import get_statement
+from config import config
+
+logger = logging.getLogger(__name__)
+
+PATIENT_COLUMNS = ['patient_id', 'patient_name', 'sex', 'age', 'bed_no', 'collection_location', 'patient_type', 'last_time']
+
+# 每位患者最新一条采集记录，读取患者最新状态汇总表，用于首次构建索引
+SNAPSHOT_SQL = """
+    SELECT p.last_main_id AS id, p.patient_id, p.patient_name, p.sex, p.age, p.bed_no,
+           p.collection_location, p.patient_type, p.last_time
+    FROM cvsc_patient_latest p
+"""
+
+WATERMARK_SQL = "SELECT last_id AS max_id FROM cvsc_summary_watermark WHERE name = 'patient_latest'"
+
+# 水位线之后新增的主表记录，按主表ID键集分页，用于增量刷新
+DELTA_SQL = """
+    SELECT TOP (:page_size) m.id, m.patient_id, m.patient_name, m.sex, m.age, m.bed_no,
+           m.collection_location, m.patient_type, m.collection_time AS last_time
+    FROM cvsc_sign_main m
+    WHERE m.id > :after_id
+    ORDER BY m.id
+"""
+
+# 参与检索的字段
+INDEXED_FIELDS = ('patient_name', 'patient_id', 'bed_no')
+
+def _normalize(value):
+    """统一检索键：去空白、转小写"""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).strip().lower()
+
+def _ngrams(value, max_n):
+    """生成长度 1~max_n 的全部子串"""
+    grams = set()
+    for n in range(1, max_n + 1):
+        for i in range(len(value) - n + 1):
+            grams.add(value[i:i + n])
+    return grams
+
+class PatientIndex:
+    """进程内患者目录：基于每位患者最新记录，提供 n-gram 子串检索与前缀联想，按主表ID水位线增量刷新"""
+
+    def __init__(self, max_n=None, refresh_seconds=None):
+        self.max_n = max_n or config.PATIENT_INDEX_NGRAM
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else config.PATIENT_INDEX_REFRESH_SECONDS
+        self._lock = threading.RLock()
+        self._records = {}      # patient_id -> 最新记录
+        self._grams = {field: {} for field in INDEXED_FIELDS}  # 字段 -> {n-gram: {patient_id}}
+        self._prefix = []       # 有序 (检索键, patient_id)，用于前缀联想
+        self._prefix_dirty = False
+        self._watermark = None
+        self._refreshed_at = 0.0
+
+    def refresh(self, force=False):
+        """刷新索引：首次全量构建，之后只拉取水位线之后的新记录"""
+        if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return
+            if self._watermark is None:
+                self._build()
+            else:
+                self._apply_delta()
+            if self._prefix_dirty:
+                # 有序前缀表在刷新时重建，联想请求只做二分查找
+                self._prefix = sorted(
+                    (_normalize(r[field]), r['patient_id']) for r in self._records.values() for field in INDEXED_FIELDS
+                )
+                self._prefix_dirty = False
+            self._refreshed_at = time.monotonic()
+
+    @staticmethod
+    def _summary_watermark():
+        """汇总表已合并到的主表ID"""
+        df_max = run_query(WATERMARK_SQL)
+        if df_max.empty or pd.isna(df_max.iloc[0]['max_id']):
+            return 0
+        return int(df_max.iloc[0]['max_id'])
+
+    def _build(self):
+        """全量构建：读取汇总表快照，之后从汇总水位线开始增量"""
+        watermark = self._summary_watermark()
+        df = run_query(get_statement("patient_index_snapshot", SNAPSHOT_SQL))
+        self._records.clear()
+        self._grams = {field: {} for field in INDEXED_FIELDS}
+        self._prefix_dirty = True
+        self._upsert_frame(df)
+        self._watermark = watermark
+        logger.info(f"患者索引构建完成：{len(self._records)} 位患者，水位线 {watermark}")
+
+    def _apply_delta(self):
+        """增量刷新：从水位线之前 MAIN_ID_RESCAN_WINDOW 处按页拉取，单次最多 PATIENT_INDEX_DELTA_MAX_PAGES 页
+
+        重读水位线之前的一段ID，晚于水位线提交的较小ID也能进入索引；重复读到的记录按采集时间合并，结果不变。
+        """
+        page_size = config.PATIENT_INDEX_DELTA_PAGE_SIZE
+        stmt = get_statement("patient_index_delta", DELTA_SQL)
+        after_id = max(0, self._watermark - config.MAIN_ID_RESCAN_WINDOW)
+        for _ in range(config.PATIENT_INDEX_DELTA_MAX_PAGES):
+            df = run_query(stmt, {'after_id': after_id, 'page_size': page_size})
+            if df.empty:
+                return
+            # 无患者ID的记录不入索引（与汇总表一致），但仍推进水位线
+            self._upsert_frame(df.dropna(subset=['patient_id']))
+            after_id = int(df['id'].max())
+            self._watermark = max(self._watermark, after_id)
+            if len(df) < page_size:
+                return
+        # 积压仍未读完：汇总表已合并到更新的位置时从汇总表重建（代价只与患者数有关），否则下次刷新继续分页
+        if self._summary_watermark() > self._watermark:
+            logger.info(f"患者索引增量积压超过 {config.PATIENT_INDEX_DELTA_MAX_PAGES} 页，从汇总表重建")
+            self._build()
+
+    def _upsert_frame(self, df):
+        """按采集时间保留每位患者的最新记录并更新索引"""
+        if df.empty:
+            return
+        df = df.copy()
+        df['last_time'] = pd.to_datetime(df['last_time'])
+        df = df.sort_values(['last_time', 'id']).drop_duplicates('patient_id', keep='last')
+        for row in df[PATIENT_COLUMNS].itertuples(index=False):
+            record = row._asdict()
+            old = self._records.get(record['patient_id'])
+            if old is not None:
+                # 较旧的记录或重读到的同一条记录不改动索引
+                if old['last_time'] > record['last_time'] or old == record:
+                    continue
+                self._unindex(old)
+            self._records[record['patient_id']] = record
+            self._index(record)
+            self._prefix_dirty = True
+
+    def _index(self, record):
+        """将记录写入各字段的 n-gram 倒排表"""
+        for field in INDEXED_FIELDS:
+            postings = self._grams[field]
+            for gram in _ngrams(_normalize(record[field]), self.max_n):
+                postings.setdefault(gram, set()).add(record['patient_id'])
+
+    def _unindex(self, record):
+        """从倒排表中移除旧记录"""
+        for field in INDEXED_FIELDS:
+            postings = self._grams[field]
+            for gram in _ngrams(_normalize(record[field]), self.max_n):
+                ids = postings.get(gram)
+                if ids is not None:
+                    ids.discard(record['patient_id'])
+                    if not ids:
+                        del postings[gram]
+
+    def _match(self, field, term):
+        """字段包含 term 的患者ID集合"""
+        term = _normalize(term)
+        postings = self._grams[field]
+        if len(term) <= self.max_n:
+            return set(postings.get(term, ()))
+        # 长关键词：取各 n-gram 倒排表的交集，再逐个校验子串
+        candidates = None
+        for i in range(len(term) - self.max_n + 1):
+            ids = postings.get(term[i:i + self.max_n])
+            if not ids:
+                return set()
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return {pid for pid in candidates if term in _normalize(self._records[pid][field])}
+
+    def search(self, name=None, pid=None, bed_no=None, location=None, p_type=None, limit=None):
+        """多维度患者查询，筛选语义与 search_patients 一致"""
+        self.refresh()
+        limit = limit or config.SEARCH_RESULT_LIMIT
+        with self._lock:
+            candidates = None
+            if pid:
+                candidates = self._match('patient_id', pid)
+            if name:
+                ids = self._match('patient_name', name) | self._match('patient_id', name)
+                candidates = ids if candidates is None else candidates & ids
+            records = self._records.values() if candidates is None else [self._records[p] for p in candidates]
+            if bed_no:
+                records = [r for r in records if _normalize(r['bed_no']) == _normalize(bed_no)]
+            if location and location != "全部":
+                records = [r for r in records if r['collection_location'] == location]
+            if p_type and p_type != "全部":
+                records = [r for r in records if r['patient_type'] == p_type]
+            top = heapq.nlargest(limit, records, key=lambda r: r['last_time'])
+        return pd.DataFrame(top, columns=PATIENT_COLUMNS)
+
+    def typeahead(self, prefix, limit=10):
+        """按姓名、患者ID、床号前缀联想，按检索键顺序返回最多 limit 位患者，列与 search 一致"""
+        self.refresh()
+        prefix = _normalize(prefix)
+        if not prefix:
+            return pd.DataFrame(columns=PATIENT_COLUMNS)
+        with self._lock:
+            results = {}
+            for key, patient_id in self._prefix[bisect.bisect_left(self._prefix, (prefix, '')):]:
+                if not key.startswith(prefix) or len(results) >= limit:
+                    break
+                results.setdefault(patient_id, self._records[patient_id])
+        return pd.DataFrame(list(results.values()), columns=PATIENT_COLUMNS)
+
+    def stats(self):
+        """索引统计"""
+        with self._lock:
+            return {
+                'patients': len(self._records),
+                'grams': sum(len(postings) for postings in self._grams.values()),
+                'prefix_keys': len(self._prefix),
+                'watermark': self._watermark,
+            }
+
+@st.cache_resource
+def get_patient_index():
+    """获取进程内共享的患者索引"""
+    return PatientIndex()
+
+def search_patients_indexed(name=None, pid=None, bed_no=None, location=None, p_type=None):
+    """多维度患者查询（内存索引版），返回列与 search_patients 一致"""
+    return get_patient_index().search(name=name, pid=pid, bed_no=bed_no, location=location, p_type=p_type)
+
+def typeahead_patients(prefix, limit=10):
+    """患者联想：姓名、患者ID或床号以 prefix 开头的患者，返回列与 search_patients 一致"""
+    return get_patient_index().typeahead(prefix, limit=limit)
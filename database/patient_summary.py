@@ -0,0 +1,156 @@
+"""
+患者最新状态汇总表（cvsc_patient_latest）增量维护
+
+建表见 database/migrations/001_create_patient_latest.sql。
+每 PATIENT_SUMMARY_REFRESH_SECONDS 秒由后台线程（PATIENT_SUMMARY_IN_APP）或独立任务刷新，页面请求只读汇总表：
+    python -m database.patient_summary --interval 30
+每次刷新从水位线之前 MAIN_ID_RESCAN_WINDOW 个ID处开始合并，并发写入时晚提交的较小ID不会被永久跳过。
+"""
+import streamlit as st
+import pandas as pd
+import argparse
+import logging
+import threading
+import time
+from .queries import run_query, run_update
+from config import config
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = 'patient_latest'
+
+WATERMARK_SQL = "SELECT last_id FROM cvsc_summary_watermark WHERE name = :name"
+
+MAX_ID_SQL = "SELECT MAX(id) AS max_id FROM cvsc_sign_main"
+
+# 只处理 (after_id, cur_id] 区间内的主表记录（走主键范围扫描），每位患者取最新一条
+LATEST_IN_RANGE_SQL = """
+        SELECT id, patient_id, patient_name, sex, age, hospital_id, bed_no, collection_location, patient_type, collection_time
+        FROM (
+            SELECT m.id, m.patient_id, m.patient_name, m.sex, m.age, m.hospital_id, m.bed_no,
+                   m.collection_location, m.patient_type, m.collection_time,
+                   ROW_NUMBER() OVER (PARTITION BY m.patient_id ORDER BY m.collection_time DESC, m.id DESC) AS rn
+            FROM cvsc_sign_main m
+            WHERE m.id > :after_id AND m.id <= :cur_id AND m.patient_id IS NOT NULL
+        ) x
+        WHERE rn = 1
+"""
+
+# 合并进汇总表：只有比已有记录更新时才覆盖，重复执行同一区间结果不变
+UPSERT_SQL = {
+    'mssql': f"""
+    MERGE cvsc_patient_latest WITH (HOLDLOCK) AS t
+    USING ({LATEST_IN_RANGE_SQL}) AS s
+    ON t.patient_id = s.patient_id
+    WHEN MATCHED AND (s.collection_time > t.last_time OR (s.collection_time = t.last_time AND s.id > t.last_main_id)) THEN
+        UPDATE SET patient_name = s.patient_name, sex = s.sex, age = s.age, hospital_id = s.hospital_id,
+                   bed_no = s.bed_no, collection_location = s.collection_location, patient_type = s.patient_type,
+                   last_main_id = s.id, last_time = s.collection_time, updated_at = GETDATE()
+    WHEN NOT MATCHED THEN
+        INSERT (patient_id, patient_name, sex, age, hospital_id, bed_no, collection_location, patient_type, last_main_id, last_time)
+        VALUES (s.patient_id, s.patient_name, s.sex, s.age, s.hospital_id, s.bed_no, s.collection_location, s.patient_type, s.id, s.collection_time);
+    """,
+    # SQLite 不支持 MERGE，使用 UPSERT
+    'sqlite': f"""
+    INSERT INTO cvsc_patient_latest
+        (patient_id, patient_name, sex, age, hospital_id, bed_no, collection_location, patient_type, last_main_id, last_time, updated_at)
+    SELECT patient_id, patient_name, sex, age, hospital_id, bed_no, collection_location, patient_type, id, collection_time, GETDATE()
+    FROM ({LATEST_IN_RANGE_SQL}) s
+    WHERE 1=1
+    ON CONFLICT (patient_id) DO UPDATE SET
+        patient_name = excluded.patient_name, sex = excluded.sex, age = excluded.age, hospital_id = excluded.hospital_id,
+        bed_no = excluded.bed_no, collection_location = excluded.collection_location, patient_type = excluded.patient_type,
+        last_main_id = excluded.last_main_id, last_time = excluded.last_time, updated_at = excluded.updated_at
+    WHERE excluded.last_time > cvsc_patient_latest.last_time
+       OR (excluded.last_time = cvsc_patient_latest.last_time AND excluded.last_main_id > cvsc_patient_latest.last_main_id)
+    """,
+}
+
+ADVANCE_WATERMARK_SQL = """
+    UPDATE cvsc_summary_watermark SET last_id = :cur_id, updated_at = GETDATE()
+    WHERE name = :name AND last_id < :cur_id
+"""
+
+def _scalar(df, column):
+    """读取单行查询结果中的整数值"""
+    if df.empty or pd.isna(df.iloc[0][column]):
+        return None
+    return int(df.iloc[0][column])
+
+def get_summary_watermark(raise_errors=False):
+    """汇总表已处理到的主表ID"""
+    return _scalar(run_query(WATERMARK_SQL, {'name': WATERMARK_NAME}, raise_errors=raise_errors), 'last_id')
+
+def refresh_patient_summary(batch_size=None, max_batches=None, raise_errors=False):
+    """将水位线之后的主表记录分批合并进汇总表，返回本次处理到的主表ID"""
+    batch_size = batch_size or config.PATIENT_SUMMARY_BATCH_SIZE
+    watermark = get_summary_watermark(raise_errors=raise_errors)
+    max_id = _scalar(run_query(MAX_ID_SQL, raise_errors=raise_errors), 'max_id')
+    if watermark is None or max_id is None:
+        logger.warning("患者汇总表未初始化，请先执行 database/migrations/001_create_patient_latest.sql")
+        return watermark
+
+    # 重新合并水位线之前的一段：合并只覆盖更新的记录，重复合并同一区间结果不变；水位线只前进不后退
+    after_id = max(0, watermark - config.MAIN_ID_RESCAN_WINDOW)
+    upsert_sql = UPSERT_SQL[config.DB_BACKEND]
+    batches = 0
+    while after_id < max_id and (max_batches is None or batches < max_batches):
+        cur_id = min(max_id, after_id + batch_size)
+        if not run_update(upsert_sql, {'after_id': after_id, 'cur_id': cur_id}, raise_errors=raise_errors):
+            break
+        run_update(ADVANCE_WATERMARK_SQL, {'cur_id': cur_id, 'name': WATERMARK_NAME}, raise_errors=raise_errors)
+        after_id = cur_id
+        batches += 1
+    if after_id > watermark:
+        logger.info(f"患者汇总表刷新 {batches} 批，水位线 {after_id}")
+    return max(after_id, watermark)
+
+class PatientSummaryRefresher:
+    """应用内的后台刷新线程：按固定间隔追平汇总表，进程内只启动一次"""
+
+    def __init__(self, interval=None):
+        self.interval = interval or config.PATIENT_SUMMARY_REFRESH_SECONDS
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动后台线程，已在运行时直接返回"""
+        with self._lock:
+            if self.running:
+                return False
+            self._thread = threading.Thread(target=self._run, name="patient_summary_refresh", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self):
+        while True:
+            try:
+                # 不在 Streamlit 会话中运行：失败只记录日志，下个周期重试
+                refresh_patient_summary(raise_errors=True)
+            except Exception as e:
+                logger.error(f"刷新患者汇总表失败: {e}")
+            time.sleep(self.interval)
+
+@st.cache_resource
+def get_patient_summary_refresher():
+    """获取进程内共享的汇总表后台刷新线程"""
+    return PatientSummaryRefresher()
+
+def main():
+    parser = argparse.ArgumentParser(description="患者最新状态汇总表刷新任务")
+    parser.add_argument("--interval", type=int, default=config.PATIENT_SUMMARY_REFRESH_SECONDS, help="刷新间隔（秒）")
+    parser.add_argument("--once", action="store_true", help="只刷新一次")
+    args = parser.parse_args()
+
+    while True:
+        refresh_patient_summary()
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
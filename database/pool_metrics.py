@@ -0,0 +1,162 @@
+import bisect
+import threading
+import time
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# 等待时间直方图分桶上界（毫秒）
+WAIT_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, 5000]
+# 连接存活时间直方图分桶上界（秒）
+LIFETIME_BUCKETS_S = [60, 300, 900, 1800, 3600, 4 * 3600]
+
+class PoolMetrics:
+    """连接池运行指标，由连接池事件回调更新"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空全部指标"""
+        with self._lock:
+            self.checked_out = 0
+            self.peak_checked_out = 0
+            self.total_checkouts = 0
+            self.connects = 0
+            self.closes = 0
+            self.invalidations = 0
+            self.wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self.recent_waits_ms = deque(maxlen=1024)
+            self.max_wait_ms = 0.0
+            self.lifetime_histogram = [0] * (len(LIFETIME_BUCKETS_S) + 1)
+            self.max_lifetime_s = 0.0
+            self.total_lifetime_s = 0.0
+
+    def record_wait(self, seconds):
+        """记录一次获取连接的等待时间"""
+        wait_ms = seconds * 1000
+        with self._lock:
+            self.wait_histogram[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            self.recent_waits_ms.append(wait_ms)
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def record_checkout(self):
+        """连接被借出"""
+        with self._lock:
+            self.checked_out += 1
+            self.total_checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def record_checkin(self):
+        """连接被归还"""
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def record_connect(self):
+        """新建物理连接"""
+        with self._lock:
+            self.connects += 1
+
+    def record_close(self, lifetime_s):
+        """物理连接关闭，记录其存活时间"""
+        with self._lock:
+            self.closes += 1
+            if lifetime_s is not None:
+                self.lifetime_histogram[bisect.bisect_left(LIFETIME_BUCKETS_S, lifetime_s)] += 1
+                self.max_lifetime_s = max(self.max_lifetime_s, lifetime_s)
+                self.total_lifetime_s += lifetime_s
+
+    def record_invalidate(self):
+        """连接失效"""
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self):
+        """获取指标快照"""
+        with self._lock:
+            waits = sorted(self.recent_waits_ms)
+            return {
+                'checked_out': self.checked_out,
+                'peak_checked_out': self.peak_checked_out,
+                'total_checkouts': self.total_checkouts,
+                'connects': self.connects,
+                'closes': self.closes,
+                'invalidations': self.invalidations,
+                'wait_p50_ms': _percentile(waits, 50),
+                'wait_p95_ms': _percentile(waits, 95),
+                'wait_max_ms': self.max_wait_ms,
+                'wait_histogram': _histogram_rows(WAIT_BUCKETS_MS, self.wait_histogram, "ms"),
+                'lifetime_avg_s': self.total_lifetime_s / self.closes if self.closes else 0.0,
+                'lifetime_max_s': self.max_lifetime_s,
+                'lifetime_histogram': _histogram_rows(LIFETIME_BUCKETS_S, self.lifetime_histogram, "s"),
+            }
+
+def _percentile(sorted_values, pct):
+    """计算已排序序列的百分位数"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def _histogram_rows(bounds, counts, unit):
+    """将直方图计数转换为 [(分桶标签, 次数)]"""
+    labels = [f"≤{b}{unit}" for b in bounds] + [f">{bounds[-1]}{unit}"]
+    return list(zip(labels, counts))
+
+# 进程内共享的连接池指标
+pool_metrics = PoolMetrics()
+
+class InstrumentedQueuePool(QueuePool):
+    """记录借出等待时间的 QueuePool"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_metrics.record_wait(time.perf_counter() - started)
+
+def register_pool_listeners(engine):
+    """为引擎连接池注册事件监听，跟踪借出、归还、连接创建与关闭"""
+    pool = engine.pool
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_conn, connection_record):
+        connection_record.info['connected_at'] = time.monotonic()
+        pool_metrics.record_connect()
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_conn, connection_record, connection_proxy):
+        pool_metrics.record_checkout()
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_conn, connection_record):
+        pool_metrics.record_checkin()
+
+    @event.listens_for(pool, "close")
+    def _on_close(dbapi_conn, connection_record):
+        connected_at = connection_record.info.get('connected_at')
+        pool_metrics.record_close(time.monotonic() - connected_at if connected_at else None)
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_conn, connection_record, exception):
+        pool_metrics.record_invalidate()
+
+def get_pool_status(engine):
+    """汇总连接池配置、当前占用与累计指标"""
+    pool = engine.pool
+    metrics = pool_metrics.snapshot()
+    pool_size = pool.size() if hasattr(pool, 'size') else 0
+    max_overflow = getattr(pool, '_max_overflow', 0)
+    capacity = pool_size + max_overflow
+    metrics.update({
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'capacity': capacity,
+        'overflow': max(0, pool.overflow()) if hasattr(pool, 'overflow') else 0,
+        'checked_in': pool.checkedin() if hasattr(pool, 'checkedin') else 0,
+        'saturation': metrics['checked_out'] / capacity * 100 if capacity else 0.0,
+        'peak_saturation': metrics['peak_checked_out'] / capacity * 100 if capacity else 0.0,
+    })
+    return metrics
@@ -0,0 +1,154 @@
+import contextvars
+import heapq
+import json
+import logging
+import re
+import threading
+from collections import deque
+from datetime import datetime
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# 当前页面，由 app.py 在每次渲染时设置，并随面板加载线程的上下文传递
+current_page = contextvars.ContextVar('current_page', default='未知页面')
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_sql(sql):
+    """压缩空白字符，作为语句统计的键"""
+    return _WHITESPACE.sub(" ", str(sql)).strip()
+
+class QueryProfiler:
+    """查询剖析器：记录每条语句的耗时、行数、数据量和调用页面"""
+
+    def __init__(self, slowest_size=None, recent_size=None):
+        self._lock = threading.Lock()
+        self.slowest_size = slowest_size or config.PROFILER_SLOWEST_SIZE
+        self.recent_size = recent_size or config.PROFILER_RECENT_SIZE
+        self._slow_logger = None
+        self.reset()
+
+    def reset(self):
+        """清空剖析数据"""
+        with self._lock:
+            self._slowest = []  # 最小堆，保留耗时最长的 N 条
+            self._recent = deque(maxlen=self.recent_size)
+            self._statements = {}
+            self._frames = {}
+            self._seq = 0
+            self._slow = 0
+
+    def record(self, sql, elapsed_ms, rows=0, nbytes=0, kind='query', error=None):
+        """记录一次语句执行"""
+        statement = normalize_sql(sql)
+        entry = {
+            'timestamp': datetime.now(),
+            'statement': statement,
+            'kind': kind,
+            'page': current_page.get(),
+            'elapsed_ms': elapsed_ms,
+            'rows': rows,
+            'bytes': nbytes,
+            'error': error,
+        }
+        slow = elapsed_ms >= config.SLOW_QUERY_THRESHOLD_MS
+        with self._lock:
+            self._seq += 1
+            self._slow += 1 if slow else 0
+            self._recent.append(entry)
+            item = (elapsed_ms, self._seq, entry)
+            if len(self._slowest) < self.slowest_size:
+                heapq.heappush(self._slowest, item)
+            elif elapsed_ms > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+
+            stat = self._statements.get(statement)
+            if stat is None:
+                stat = self._statements[statement] = {
+                    'statement': statement, 'kind': kind, 'calls': 0, 'errors': 0,
+                    'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'bytes': 0, 'pages': set()
+                }
+            stat['calls'] += 1
+            stat['errors'] += 1 if error else 0
+            stat['total_ms'] += elapsed_ms
+            stat['max_ms'] = max(stat['max_ms'], elapsed_ms)
+            stat['rows'] += rows
+            stat['bytes'] += nbytes
+            stat['pages'].add(entry['page'])
+
+        if slow:
+            self._write_slow_log(entry)
+
+    def record_frame(self, name, rows, nbytes):
+        """记录一次查询层返回的 DataFrame 内存占用"""
+        page = current_page.get()
+        with self._lock:
+            stat = self._frames.get(name)
+            if stat is None:
+                stat = self._frames[name] = {'name': name, 'calls': 0, 'rows': 0, 'bytes': 0, 'max_bytes': 0, 'pages': set()}
+            stat['calls'] += 1
+            stat['rows'] += rows
+            stat['bytes'] += nbytes
+            stat['max_bytes'] = max(stat['max_bytes'], nbytes)
+            stat['pages'].add(page)
+
+    def frames(self):
+        """各类结果 DataFrame 的内存统计，按单帧平均字节数降序"""
+        with self._lock:
+            stats = [dict(stat, pages=', '.join(sorted(stat['pages']))) for stat in self._frames.values()]
+        for stat in stats:
+            stat['avg_bytes'] = stat['bytes'] / stat['calls']
+            stat['bytes_per_row'] = stat['bytes'] / stat['rows'] if stat['rows'] else 0.0
+        return sorted(stats, key=lambda stat: stat['avg_bytes'], reverse=True)
+
+    def _write_slow_log(self, entry):
+        """将慢查询以 JSON 行追加到磁盘日志（未配置路径时跳过）"""
+        if not config.SLOW_QUERY_LOG_PATH:
+            return
+        if self._slow_logger is None:
+            slow_logger = logging.getLogger('cvsc.slow_query')
+            slow_logger.propagate = False
+            if not slow_logger.handlers:
+                handler = logging.FileHandler(config.SLOW_QUERY_LOG_PATH, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                slow_logger.addHandler(handler)
+            slow_logger.setLevel(logging.INFO)
+            self._slow_logger = slow_logger
+        self._slow_logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+
+    def slowest(self):
+        """耗时最长的 N 条语句，按耗时降序"""
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._slowest, key=lambda item: item[0], reverse=True)]
+
+    def recent(self):
+        """最近执行的语句"""
+        with self._lock:
+            return list(self._recent)
+
+    def top_statements(self, limit=20):
+        """按累计耗时排序的语句统计"""
+        with self._lock:
+            stats = [dict(stat, pages=', '.join(sorted(stat['pages']))) for stat in self._statements.values()]
+        for stat in stats:
+            stat['avg_ms'] = stat['total_ms'] / stat['calls']
+        return sorted(stats, key=lambda stat: stat['total_ms'], reverse=True)[:limit]
+
+    def summary(self):
+        """整体统计：调用次数、平均耗时、成功率、慢查询数"""
+        with self._lock:
+            calls = sum(stat['calls'] for stat in self._statements.values())
+            errors = sum(stat['errors'] for stat in self._statements.values())
+            total_ms = sum(stat['total_ms'] for stat in self._statements.values())
+            slow = self._slow
+        return {
+            'calls': calls,
+            'errors': errors,
+            'slow': slow,
+            'avg_ms': total_ms / calls if calls else 0.0,
+            'success_rate': (1 - errors / calls) * 100 if calls else 100.0,
+        }
+
+# 进程内共享的剖析器
+profiler = QueryProfiler()
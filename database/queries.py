@@ -2,50 +2,55 @@ import streamlit as st
 import pandas as pd
 from sqlalchemy import text, exc
 import logging
-from datetime import datetime
-from .connection import get_db_engine
+import time
+from datetime import datetime, timedelta
+from .connection import get_db_engine, get_pool_metrics
+from .statements import get_statement
+from .profiler import profiler
+from .dialect import adapt_sql, adapt_frame
 from config import config
 
 logger = logging.getLogger(__name__)
 
-def run_query(query, params=None):
-    """执行查询，返回 DataFrame"""
+def run_query(query, params=None, raise_errors=False):
+    """执行查询，返回 DataFrame；raise_errors 时失败只记录日志并抛出异常（用于不在 Streamlit 会话中运行的服务）"""
+    started = time.perf_counter()
     try:
         with get_db_engine().connect() as conn:
-            result = pd.read_sql(text(query), conn, params=params or {})
+            stmt = text(adapt_sql(query)) if isinstance(query, str) else query
+            result = adapt_frame(pd.read_sql(stmt, conn, params=params or {}))
+        if config.QUERY_PROFILING:
+            nbytes = int(result.memory_usage(index=True, deep=config.PROFILE_DEEP_BYTES).sum())
+            profiler.record(query, (time.perf_counter() - started) * 1000, rows=len(result), nbytes=nbytes)
         return result
-    except exc.SQLAlchemyError as e:
+    except (exc.SQLAlchemyError, pd.errors.DatabaseError) as e:
+        # pandas 会把驱动异常包装为 DatabaseError
+        if config.QUERY_PROFILING:
+            profiler.record(query, (time.perf_counter() - started) * 1000, error=str(e))
         logger.error(f"查询失败: {e}")
+        if raise_errors:
+            raise
         st.error(f"查询失败: {str(e)}")
         return pd.DataFrame()
 
-def run_update(sql, params=None):
-    """执行更新/插入/删除"""
+def run_update(sql, params=None, raise_errors=False):
+    """执行更新/插入/删除；raise_errors 时失败只记录日志并抛出异常（用于不在 Streamlit 会话中运行的服务）"""
+    started = time.perf_counter()
     try:
         with get_db_engine().begin() as conn:
-            conn.execute(text(sql), params or {})
+            result = conn.execute(text(adapt_sql(sql)), params or {})
+        if config.QUERY_PROFILING:
+            profiler.record(sql, (time.perf_counter() - started) * 1000, rows=max(result.rowcount, 0), kind='update')
         return True
     except exc.SQLAlchemyError as e:
+        if config.QUERY_PROFILING:
+            profiler.record(sql, (time.perf_counter() - started) * 1000, kind='update', error=str(e))
         logger.error(f"更新失败: {e}")
+        if raise_errors:
+            raise
         st.error(f"更新失败: {str(e)}")
         return False
 
-@st.cache_data(ttl=config.FILTER_CACHE_TTL)
-def get_filter_options():
-    """获取筛选条件的下拉选项（缓存以提高性能）"""
-    try:
-        # 获取所有出现过的科室/位置
-        locs = run_query("SELECT DISTINCT collection_location FROM cvsc_sign_main WHERE collection_location IS NOT NULL")
-        # 获取就诊类型
-        types = run_query("SELECT DISTINCT patient_type FROM cvsc_sign_main WHERE patient_type IS NOT NULL")
-        
-        return {
-            "locations": locs['collection_location'].tolist() if not locs.empty else [],
-            "types": types['patient_type'].tolist() if not types.empty else []
-        }
-    except:
-        return {"locations": [], "types": []}
-
 @st.cache_data(ttl=config.QUERY_CACHE_TTL)
 def get_standard_fields():
     """获取标准体征字段配置"""
@@ -57,83 +62,338 @@ def get_device_models():
     return run_query("SELECT id, model_name, manufacturer FROM cvsc_device_model_config ORDER BY model_name")
 
 def search_patients(name=None, pid=None, bed_no=None, location=None, p_type=None):
-    """多维度患者查询"""
+    """多维度患者查询（读取患者最新状态汇总表）"""
     base_sql = """
         SELECT TOP 100
-            m.patient_id, m.patient_name, m.sex, m.age, 
-            m.bed_no, m.collection_location, m.patient_type,
-            MAX(m.collection_time) as last_time
-        FROM cvsc_sign_main m
+            p.patient_id, p.patient_name, p.sex, p.age, 
+            p.bed_no, p.collection_location, p.patient_type,
+            p.last_time
+        FROM cvsc_patient_latest p
         WHERE 1=1
     """
     params = {}
     
     if pid:
-        base_sql += " AND m.patient_id LIKE :pid"
+        base_sql += " AND p.patient_id LIKE :pid"
         params['pid'] = f"%{pid}%"
     if name:
-        base_sql += " AND (m.patient_name LIKE :name OR m.patient_id LIKE :name)"
+        base_sql += " AND (p.patient_name LIKE :name OR p.patient_id LIKE :name)"
         params['name'] = f"%{name}%"
     if bed_no:
-        base_sql += " AND m.bed_no = :bed_no"
+        base_sql += " AND p.bed_no = :bed_no"
         params['bed_no'] = bed_no
     if location and location != "全部":
-        base_sql += " AND m.collection_location = :location"
+        base_sql += " AND p.collection_location = :location"
         params['location'] = location
     if p_type and p_type != "全部":
-        base_sql += " AND m.patient_type = :ptype"
+        base_sql += " AND p.patient_type = :ptype"
         params['ptype'] = p_type
         
-    base_sql += " GROUP BY m.patient_id, m.patient_name, m.sex, m.age, m.bed_no, m.collection_location, m.patient_type ORDER BY last_time DESC"
+    base_sql += " ORDER BY p.last_time DESC"
     
-    return run_query(base_sql, params)
+    # 按启用的筛选条件组合注册语句，最多 32 种固定文本
+    stmt = get_statement(f"search_patients:{','.join(params)}", base_sql)
+    return run_query(stmt, params)
+
+def align_time_window(start_time, end_time, bucket_seconds=None):
+    """将时间窗口对齐到固定粒度：起点向下取整、终点向上取整"""
+    bucket = timedelta(seconds=bucket_seconds or config.TIME_BUCKET_SECONDS)
+    floor_start = datetime.min + (start_time - datetime.min) // bucket * bucket
+    floor_end = datetime.min + (end_time - datetime.min) // bucket * bucket
+    ceil_end = floor_end if floor_end == end_time else floor_end + bucket
+    return floor_start, ceil_end
 
 def build_time_filter_sql(start_time, end_time):
-    """构建时间筛选SQL"""
+    """构建时间筛选SQL，时间边界以类型化参数绑定，返回 (SQL片段, 参数)"""
     if start_time and end_time:
-        return f"AND m.collection_time BETWEEN '{start_time.strftime('%Y-%m-%d %H:%M:%S')}' AND '{end_time.strftime('%Y-%m-%d %H:%M:%S')}'"
-    return ""
+        start_time, end_time = align_time_window(start_time, end_time)
+        return "AND m.collection_time BETWEEN :start_time AND :end_time", {'start_time': start_time, 'end_time': end_time}
+    return "", {}
 
-def query_vital_signs_paginated(patient_id, start_time, end_time):
-    """查询生命体征详细数据"""
-    time_filter = build_time_filter_sql(start_time, end_time)
+# 体征数值：优先读 float 数值列，未回填的行在库内转换，查询结果直接为数值
+VALUE_COLUMN_SQL = "COALESCE(d.standard_field_num, TRY_CAST(d.standard_field_value AS float)) AS standard_field_value"
+
+# 体征数据的紧凑类型：数值 float32、字段ID int16（配置表仅数十个字段）、主表ID int32（与库表 int 一致）
+VITAL_DTYPES = {
+    'main_id': 'int32',
+    'standard_field_id': 'int16',
+    'standard_field_value': 'float32',
+}
+
+def compact_values(df):
+    """将体征数据转换为紧凑类型：时间 datetime64，数值 float32，ID 为定宽整数（含空值的ID列保持原样）"""
+    if 'collection_time' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['collection_time']):
+        df['collection_time'] = pd.to_datetime(df['collection_time'])
+    for column, dtype in VITAL_DTYPES.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        if dtype.startswith('int') and df[column].isna().any():
+            continue
+        df[column] = df[column].astype(dtype)
+    return df
+
+def frame_memory(df, deep=True):
+    """DataFrame 内存占用：{'rows', 'bytes', 'columns': {列名: 字节数}}；deep 时计入对象列的实际占用"""
+    usage = df.memory_usage(index=True, deep=deep)
+    return {'rows': len(df), 'bytes': int(usage.sum()), 'columns': {str(k): int(v) for k, v in usage.items()}}
+
+def report_frame_memory(name, df):
+    """记录结果 DataFrame 的内存占用，按名称汇总到剖析器；是否统计对象列实际占用由 PROFILE_DEEP_BYTES 决定"""
+    if config.QUERY_PROFILING:
+        profiler.record_frame(name, len(df), frame_memory(df, deep=config.PROFILE_DEEP_BYTES)['bytes'])
+    return df
+
+def attach_sign_config(df):
+    """按标准体征配置快照在内存中补全名称、单位和范围列（替代逐行关联配置表）"""
+    from .sign_config import get_sign_config_table
+    return get_sign_config_table().attach(df)
+
+def query_vital_values(patient_id, start_time, end_time):
+    """查询生命体征数值：只取 (collection_time, standard_field_id, standard_field_value)"""
+    time_filter, params = build_time_filter_sql(start_time, end_time)
+    params['pid'] = patient_id
     
     sql = f"""
     SELECT 
         m.collection_time,
         d.standard_field_id,
-        d.standard_field_value,
-        s.field_name,
-        s.description,
-        s.unit,
-        s.normal_range_low,
-        s.normal_range_high,
-        s.warning_threshold
+        {VALUE_COLUMN_SQL}
     FROM cvsc_sign_main m
     JOIN cvsc_sign_detail d ON m.id = d.vital_sign_data_id
-    JOIN cvsc_standard_sign_config s ON d.standard_field_id = s.id
     WHERE m.patient_id = :pid
     {time_filter}
     ORDER BY m.collection_time DESC, d.standard_field_id
     """
-    return run_query(sql, {"pid": patient_id})
+    stmt = get_statement(f"vital_values:{bool(time_filter)}", sql)
+    return compact_values(run_query(stmt, params))
+
+def query_vital_signs_paginated(patient_id, start_time, end_time):
+    """查询生命体征详细数据"""
+    return report_frame_memory("vital_signs", attach_sign_config(query_vital_values(patient_id, start_time, end_time)))
+
+@st.cache_data(ttl=config.VITALS_WINDOW_CACHE_TTL, max_entries=config.VITALS_WINDOW_CACHE_ENTRIES)
+def query_vital_signs_cached(patient_id, start_time, end_time, data_version=0):
+    """查询已对齐的历史时间段（缓存键稳定，可跨刷新、跨会话复用；只缓存数值列，配置列在读取时补全）
+
+    data_version 为明细数据版本，只参与缓存键：重算任务改写明细后换用新的缓存条目。
+    """
+    return query_vital_values(patient_id, start_time, end_time)
+
+def query_vital_signs_tail(patient_id, after_time):
+    """查询实时尾段：采集时间严格晚于 after_time 的数据"""
+    sql = f"""
+    SELECT 
+        m.collection_time,
+        d.standard_field_id,
+        {VALUE_COLUMN_SQL}
+    FROM cvsc_sign_main m
+    JOIN cvsc_sign_detail d ON m.id = d.vital_sign_data_id
+    WHERE m.patient_id = :pid
+    AND m.collection_time > :start_time
+    ORDER BY m.collection_time DESC, d.standard_field_id
+    """
+    return compact_values(run_query(get_statement("vital_values_tail", sql), {'pid': patient_id, 'start_time': after_time}))
+
+def query_vital_signs_window(patient_id, window):
+    """按对齐窗口查询：历史段走缓存，仅实时尾段访问数据库"""
+    from .renormalize import get_detail_data_version
+    history = query_vital_signs_cached(patient_id, window.start, window.split, get_detail_data_version().version)
+    tail = query_vital_signs_tail(patient_id, window.split)
+    if tail.empty:
+        df = history
+    elif history.empty:
+        df = tail
+    else:
+        df = pd.concat([tail, history], ignore_index=True)
+    return report_frame_memory("vital_signs_window", attach_sign_config(df))
+
+def query_vital_signs_page(patient_id, start_time, end_time, cursor=None, page_size=None):
+    """按 (collection_time, m.id) 键集分页查询生命体征数据，返回 (DataFrame, 下一页游标)"""
+    page_size = int(page_size or config.VITALS_PAGE_SIZE)
+    time_filter, params = build_time_filter_sql(start_time, end_time)
+    params.update({"pid": patient_id, "page_size": page_size})
+
+    # 游标为上一页最后一条主记录的 (采集时间, 主表ID)，按降序继续向后翻页
+    cursor_filter = ""
+    if cursor:
+        cursor_filter = "AND (m.collection_time < :cur_time OR (m.collection_time = :cur_time AND m.id < :cur_id))"
+        params['cur_time'], params['cur_id'] = cursor
+
+    # 先在主表上取一页采集记录，再关联明细，保证同一次采集的明细不会被拆到两页
+    sql = f"""
+    SELECT
+        p.id AS main_id,
+        p.collection_time,
+        d.standard_field_id,
+        {VALUE_COLUMN_SQL}
+    FROM (
+        SELECT TOP (:page_size) m.id, m.collection_time
+        FROM cvsc_sign_main m
+        WHERE m.patient_id = :pid
+        {time_filter}
+        {cursor_filter}
+        ORDER BY m.collection_time DESC, m.id DESC
+    ) p
+    LEFT JOIN cvsc_sign_detail d ON p.id = d.vital_sign_data_id
+    ORDER BY p.collection_time DESC, p.id DESC, d.standard_field_id
+    """
+    stmt = get_statement(f"vital_values_page:{bool(time_filter)}:{bool(cursor_filter)}", sql)
+    df = compact_values(run_query(stmt, params))
+    if df.empty:
+        return df, None
+
+    # 本页主记录数不足一页说明已到末尾
+    next_cursor = None
+    if df['main_id'].nunique() >= page_size:
+        last = df.iloc[-1]
+        next_cursor = (pd.Timestamp(last['collection_time']).to_pydatetime(), int(last['main_id']))
+
+    # 没有明细的主记录只用于推进游标，不返回给调用方
+    df = df.dropna(subset=['standard_field_id']).reset_index(drop=True)
+    df = compact_values(df)
+    return report_frame_memory("vital_signs_page", attach_sign_config(df)), next_cursor
+
+def iter_vital_signs_pages(patient_id, start_time, end_time, page_size=None):
+    """逐页生成生命体征数据 DataFrame，用于流式展示和导出"""
+    cursor = None
+    while True:
+        df, cursor = query_vital_signs_page(patient_id, start_time, end_time, cursor, page_size)
+        if not df.empty:
+            yield df
+        if cursor is None:
+            break
 
 def get_patient_basic_info(patient_id):
-    """获取患者基本信息"""
+    """获取患者基本信息（读取患者最新状态汇总表）"""
     return run_query(
-        "SELECT TOP 1 patient_id, patient_name, age, sex, hospital_id, bed_no, collection_location FROM cvsc_sign_main WHERE patient_id = :pid ORDER BY collection_time DESC",
+        get_statement("patient_basic_info", "SELECT patient_id, patient_name, age, sex, hospital_id, bed_no, collection_location FROM cvsc_patient_latest WHERE patient_id = :pid"),
         {"pid": patient_id}
     )
 
+# 病区统计：汇总表中近期有采集的患者，按其最新一次采集的体征判定状态（0正常/1警告/2危急）
+LOCATION_STATS_SQL = """
+    SELECT
+        p.collection_location AS location,
+        p.patient_id,
+        MAX(CASE
+            WHEN s.warning_threshold IS NOT NULL AND d.value >= s.warning_threshold THEN 2
+            WHEN d.value > s.normal_range_high OR d.value < s.normal_range_low THEN 1
+            ELSE 0
+        END) AS status_level
+    FROM cvsc_patient_latest p
+    LEFT JOIN (
+        SELECT vital_sign_data_id, standard_field_id,
+               COALESCE(standard_field_num, TRY_CAST(standard_field_value AS float)) AS value
+        FROM cvsc_sign_detail
+    ) d ON d.vital_sign_data_id = p.last_main_id
+    LEFT JOIN cvsc_standard_sign_config s ON d.standard_field_id = s.id
+    WHERE p.last_time >= :day_ago AND p.collection_location IS NOT NULL
+    GROUP BY p.collection_location, p.patient_id
+"""
+
+@st.cache_data(ttl=config.STATS_CACHE_TTL)
+def get_location_stats(now=None):
+    """获取病区统计数据：各病区正常/警告/危急患者数；now 缺省为当前时间（基准测试固定为数据集生成时间）"""
+    now = now or datetime.now()
+    df = run_query(get_statement("location_stats", LOCATION_STATS_SQL), {'day_ago': now - timedelta(days=1)})
+    if df.empty:
+        return pd.DataFrame(columns=['location', 'normal_count', 'warning_count', 'critical_count'])
+    level = df['status_level'].fillna(0).astype(int)
+    stats = pd.DataFrame({
+        'location': df['location'],
+        'normal_count': (level == 0).astype(int),
+        'warning_count': (level == 1).astype(int),
+        'critical_count': (level == 2).astype(int),
+    }).groupby('location', as_index=False).sum()
+    return stats.sort_values('location', ignore_index=True)
+
+OVERVIEW_STATS_SQL = {
+    # 设备表：一次条件聚合得到全部设备指标
+    'devices': """
+        SELECT
+            COUNT(*) AS total_devices,
+            SUM(CASE WHEN monitor_status = '在线' THEN 1 ELSE 0 END) AS online_devices,
+            SUM(CASE WHEN use_status = '使用中' THEN 1 ELSE 0 END) AS in_use_devices,
+            SUM(CASE WHEN use_status = '维护中' THEN 1 ELSE 0 END) AS maintenance_needed,
+            SUM(CASE WHEN operate_time >= :month_start THEN 1 ELSE 0 END) AS new_devices_this_month
+        FROM mr_monitor_info
+    """,
+    # 采集主表：按 collection_time 区间过滤（可走索引），今日/昨日/近一小时一并统计；
+    # 采集延迟为入库时间与采集时间之差的平均值（毫秒），近一小时与前一小时对比
+    'collections': """
+        SELECT
+            SUM(CASE WHEN collection_time >= :today_start THEN 1 ELSE 0 END) AS today_collections,
+            SUM(CASE WHEN collection_time < :today_start THEN 1 ELSE 0 END) AS yesterday_collections,
+            COUNT(DISTINCT CASE WHEN collection_time >= :today_start THEN patient_id END) AS monitored_patients,
+            COUNT(DISTINCT CASE WHEN collection_time < :today_start THEN patient_id END) AS yesterday_patients,
+            SUM(CASE WHEN collection_time >= :hour_ago THEN 1 ELSE 0 END) AS last_hour_collections,
+            SUM(CASE WHEN collection_time >= :day_hour_ago AND collection_time < :day_ago THEN 1 ELSE 0 END) AS yesterday_hour_collections,
+            AVG(CASE WHEN collection_time >= :hour_ago THEN CAST(DATEDIFF(second, collection_time, create_time) AS float) END) * 1000 AS collection_delay,
+            AVG(CASE WHEN collection_time >= :two_hours_ago AND collection_time < :hour_ago THEN CAST(DATEDIFF(second, collection_time, create_time) AS float) END) * 1000 AS prev_hour_delay
+        FROM cvsc_sign_main
+        WHERE collection_time >= :yesterday_start
+    """
+}
+
+def _first_row_counts(df):
+    """将单行聚合结果转换为整数字典，空值按 0 处理"""
+    if df.empty:
+        return {}
+    return {key: int(value) if pd.notna(value) else 0 for key, value in df.iloc[0].items()}
+
+@st.cache_data(ttl=config.STATS_CACHE_TTL)
+def get_overview_stats(now=None):
+    """统一统计引擎：每张表一次聚合查询，结果供侧边栏、看板、设备概览和系统状态共用；now 缺省为当前时间"""
+    now = now or datetime.now()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    devices = _first_row_counts(run_query(
+        get_statement("overview_stats:devices", OVERVIEW_STATS_SQL['devices']),
+        {'month_start': today_start.replace(day=1)}
+    ))
+    collections = _first_row_counts(run_query(
+        get_statement("overview_stats:collections", OVERVIEW_STATS_SQL['collections']),
+        {
+            'today_start': today_start,
+            'yesterday_start': today_start - timedelta(days=1),
+            'hour_ago': now - timedelta(hours=1),
+            'two_hours_ago': now - timedelta(hours=2),
+            'day_ago': now - timedelta(days=1),
+            'day_hour_ago': now - timedelta(days=1, hours=1)
+        }
+    ))
+    
+    stats = {
+        'total_devices': 0, 'online_devices': 0, 'in_use_devices': 0,
+        'maintenance_needed': 0, 'new_devices_this_month': 0,
+        'today_collections': 0, 'yesterday_collections': 0,
+        'monitored_patients': 0, 'yesterday_patients': 0,
+        'last_hour_collections': 0, 'yesterday_hour_collections': 0,
+        'collection_delay': 0, 'prev_hour_delay': 0
+    }
+    stats.update(devices)
+    stats.update(collections)
+    
+    total = stats['total_devices']
+    stats['online_rate'] = round(stats['online_devices'] / total * 100, 1) if total > 0 else 0
+    stats['usage_rate'] = round(stats['in_use_devices'] / total * 100, 1) if total > 0 else 0
+    stats['patient_change'] = stats['monitored_patients'] - stats['yesterday_patients']
+    stats['collection_rate'] = round(stats['last_hour_collections'] / 60, 1)
+    prev_hour = stats['yesterday_hour_collections']
+    stats['throughput_change'] = round((stats['last_hour_collections'] - prev_hour) / prev_hour * 100, 1) if prev_hour > 0 else 0
+    stats['delay_change'] = stats['collection_delay'] - stats['prev_hour_delay'] if stats['prev_hour_delay'] > 0 else 0
+    return stats
+
 def get_dashboard_stats():
     """获取仪表板统计数据"""
     try:
-        today_count = run_query("SELECT COUNT(*) as c FROM cvsc_sign_main WHERE CAST(collection_time AS DATE) = CAST(GETDATE() AS DATE)")
-        device_count = run_query("SELECT COUNT(*) as c FROM mr_monitor_info")
-        
+        stats = get_overview_stats()
         return {
-            "today_collections": today_count['c'].values[0] if not today_count.empty else 0,
-            "online_devices": device_count['c'].values[0] if not device_count.empty else 0
+            "today_collections": stats['today_collections'],
+            "online_devices": stats['online_devices'],
+            "online_rate": stats['online_rate'],
+            "monitored_patients": stats['monitored_patients'],
+            "patient_change": stats['patient_change'],
+            "collection_rate": stats['collection_rate']
         }
     except:
         return {"today_collections": 0, "online_devices": 0}
@@ -174,25 +434,21 @@ def get_system_logs():
 def get_device_stats():
     """获取设备统计数据"""
     try:
-        total_devices = run_query("SELECT COUNT(*) as c FROM mr_monitor_info")
-        online_devices = run_query("SELECT COUNT(*) as c FROM mr_monitor_info WHERE monitor_status = '在线'")
-        in_use_devices = run_query("SELECT COUNT(*) as c FROM mr_monitor_info WHERE use_status = '使用中'")
-        
+        stats = get_overview_stats()
         return {
-            'total_devices': total_devices['c'].values[0] if not total_devices.empty else 0,
-            'online_devices': online_devices['c'].values[0] if not online_devices.empty else 0,
-            'in_use_devices': in_use_devices['c'].values[0] if not in_use_devices.empty else 0,
-            'online_rate': (online_devices['c'].values[0] / total_devices['c'].values[0] * 100) if not total_devices.empty and total_devices['c'].values[0] > 0 else 0,
-            'usage_rate': (in_use_devices['c'].values[0] / total_devices['c'].values[0] * 100) if not total_devices.empty and total_devices['c'].values[0] > 0 else 0,
-            'maintenance_needed': run_query("SELECT COUNT(*) as c FROM mr_monitor_info WHERE use_status = '维护中'")['c'].values[0] if not run_query("SELECT COUNT(*) as c FROM mr_monitor_info WHERE use_status = '维护中'").empty else 0,
-            'new_devices_this_month': 30,  # 模拟数据
-            'resolved_today': 5  # 模拟数据
+            'total_devices': stats['total_devices'],
+            'online_devices': stats['online_devices'],
+            'in_use_devices': stats['in_use_devices'],
+            'online_rate': stats['online_rate'],
+            'usage_rate': stats['usage_rate'],
+            'maintenance_needed': stats['maintenance_needed'],
+            'new_devices_this_month': stats['new_devices_this_month']
         }
     except:
         return {
             'total_devices': 0, 'online_devices': 0, 'in_use_devices': 0,
             'online_rate': 0, 'usage_rate': 0, 'maintenance_needed': 0,
-            'new_devices_this_month': 0, 'resolved_today': 0
+            'new_devices_this_month': 0
         }
 
 def get_mapping_stats():
@@ -234,10 +490,32 @@ def update_field_mapping(mapping_id, **kwargs):
             set_clauses.append(f"{key} = :{key}")
             params[key] = value
     
-    if set_clauses:
-        sql = f"UPDATE cvsc_device_field_rel SET {', '.join(set_clauses)} WHERE id = :id"
+    if not set_clauses:
+        return False
+    sql = f"UPDATE cvsc_device_field_rel SET {', '.join(set_clauses)} WHERE id = :id"
+    if 'conversion_formula' not in params:
         return run_update(sql, params)
-    return False
+    
+    # 公式变化后，已入库明细的标准值需要按新公式重算：公式更新与重算任务登记在同一事务中提交
+    from .renormalize import enqueue_renormalization
+    started = time.perf_counter()
+    try:
+        with get_db_engine().begin() as conn:
+            previous = conn.execute(
+                text(adapt_sql("SELECT conversion_formula FROM cvsc_device_field_rel WITH (UPDLOCK) WHERE id = :id")), {'id': mapping_id}
+            ).fetchone()
+            conn.execute(text(adapt_sql(sql)), params)
+            if previous is not None and previous[0] != params['conversion_formula']:
+                enqueue_renormalization(conn, mapping_id)
+        if config.QUERY_PROFILING:
+            profiler.record(sql, (time.perf_counter() - started) * 1000, rows=1, kind='update')
+        return True
+    except exc.SQLAlchemyError as e:
+        if config.QUERY_PROFILING:
+            profiler.record(sql, (time.perf_counter() - started) * 1000, kind='update', error=str(e))
+        logger.error(f"更新失败: {e}")
+        st.error(f"更新失败: {str(e)}")
+        return False
 
 def get_error_logs():
     """获取错误日志"""
@@ -260,38 +538,36 @@ def get_error_logs():
 
 def get_performance_metrics():
     """获取性能指标"""
+    summary = profiler.summary()
     return {
-        'avg_response_time': 25.5,
-        'success_rate': 98.7,
-        'concurrent_users': 45
+        'avg_response_time': summary['avg_ms'],
+        'success_rate': summary['success_rate'],
+        'total_queries': summary['calls'],
+        'concurrent_users': 45  # 模拟数据
     }
 
 def get_system_stats():
     """获取系统统计数据"""
     try:
-        today_count = run_query("SELECT COUNT(*) as c FROM cvsc_sign_main WHERE CAST(collection_time AS DATE) = CAST(GETDATE() AS DATE)")
-        device_count = run_query("SELECT COUNT(*) as c FROM mr_monitor_info WHERE monitor_status = '在线'")
+        stats = get_overview_stats()
+        pool = get_pool_metrics()
         
         return {
             'db_status': '正常',
-            'db_pool_size': 8,
-            'db_pool_max': 20,
-            'collection_delay': 12,
-            'delay_change': -3,
-            'error_count': 5,
-            'resolved_errors': 8,
-            'data_throughput': 45,
-            'throughput_change': 12.5
+            'db_pool_size': pool.get('checked_out', 0),
+            'db_pool_max': pool.get('capacity', config.DB_POOL_SIZE + config.DB_MAX_OVERFLOW),
+            'collection_delay': stats['collection_delay'],
+            'delay_change': stats['delay_change'],
+            'data_throughput': stats['collection_rate'],
+            'throughput_change': stats['throughput_change']
         }
     except:
         return {
             'db_status': '异常',
             'db_pool_size': 0,
-            'db_pool_max': 20,
+            'db_pool_max': config.DB_POOL_SIZE + config.DB_MAX_OVERFLOW,
             'collection_delay': 0,
             'delay_change': 0,
-            'error_count': 0,
-            'resolved_errors': 0,
             'data_throughput': 0,
             'throughput_change': 0
         }
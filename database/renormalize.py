@@ -0,0 +1,316 @@
+"""
+映射公式变更后的明细重算任务
+
+任务表见 database/migrations/005_create_renormalize_job.sql，分块读取的索引见 007_renormalize_chunk_index.sql。
+update_field_mapping 修改转换公式时在同一事务中登记任务；
+本模块按明细ID升序键集分块读取该型号、该字段的明细，用 original_device_value 和新公式重算，
+只批量更新数值有变化的行；每块的更新与检查点推进在同一事务中提交，中断后从检查点继续，
+块间休眠 RENORMALIZE_PAUSE 秒以控制对生产库的压力。任务表的累计更新行数作为明细数据版本，
+体征历史缓存在版本变化后失效，已打开的患者会读到重算后的值：
+    python -m database.renormalize --once
+    python -m database.renormalize --interval 30
+"""
+import streamlit as st
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+import numpy as np
+from sqlalchemy import text
+from .connection import get_db_engine
+from .queries import run_query, run_update
+from .statements import get_statement
+from .dialect import adapt_sql
+from utils.formula import compile_formula, to_numeric, format_values
+from config import config
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_SUPERSEDED = 'superseded'
+STATUS_LABELS = {
+    STATUS_PENDING: '等待中',
+    STATUS_RUNNING: '执行中',
+    STATUS_DONE: '已完成',
+    STATUS_FAILED: '失败',
+    STATUS_SUPERSEDED: '已被新任务取代',
+}
+
+SUPERSEDE_SQL = """
+    UPDATE cvsc_renormalize_job SET status = :superseded, updated_at = GETDATE()
+    WHERE mapping_id = :mapping_id AND status IN (:pending, :running)
+"""
+
+ENQUEUE_SQL = """
+    INSERT INTO cvsc_renormalize_job
+        (mapping_id, model_id, standard_field_id, conversion_formula, status, last_id, max_id, rows_scanned, rows_updated, created_at, updated_at)
+    SELECT r.id, r.model_id, r.standard_field_id, r.conversion_formula, :pending, 0,
+        (SELECT COALESCE(MAX(id), 0) FROM cvsc_sign_detail), 0, 0, GETDATE(), GETDATE()
+    FROM cvsc_device_field_rel r
+    WHERE r.id = :mapping_id
+"""
+
+# 新登记的任务延迟 RENORMALIZE_DELAY_SECONDS 再开始，等各采集进程的映射表加载新公式
+NEXT_JOB_SQL = """
+    SELECT TOP 1 id, mapping_id, model_id, standard_field_id, conversion_formula, status, last_id, max_id
+    FROM cvsc_renormalize_job
+    WHERE status = :running OR (status = :pending AND created_at <= :ready_before)
+    ORDER BY id
+"""
+
+JOB_SQL = """
+    SELECT id, mapping_id, model_id, standard_field_id, conversion_formula, status, last_id, max_id
+    FROM cvsc_renormalize_job
+    WHERE id = :job_id
+"""
+
+# 开始时重新确定重算范围：此前按旧公式写入的明细都不超过当前最大明细ID
+START_SQL = """
+    UPDATE cvsc_renormalize_job
+    SET status = :running, max_id = (SELECT COALESCE(MAX(id), 0) FROM cvsc_sign_detail), updated_at = GETDATE()
+    WHERE id = :job_id AND status = :pending
+"""
+
+JOBS_SQL = """
+    SELECT TOP (:page_size) j.id, j.mapping_id, dm.model_name, s.description, j.conversion_formula, j.status,
+        j.last_id, j.max_id, j.rows_scanned, j.rows_updated, j.error, j.created_at, j.updated_at
+    FROM cvsc_renormalize_job j
+    LEFT JOIN cvsc_device_model_config dm ON dm.id = j.model_id
+    LEFT JOIN cvsc_standard_sign_config s ON s.id = j.standard_field_id
+    ORDER BY j.id DESC
+"""
+
+# 键集分块：只读取检查点之后、登记时最大明细ID之内的行
+CHUNK_SQL = """
+    SELECT TOP (:page_size) d.id, d.original_device_value, d.standard_field_value, d.standard_field_num
+    FROM cvsc_sign_detail d
+    JOIN cvsc_sign_main m ON m.id = d.vital_sign_data_id
+    JOIN mr_monitor_info i ON i.id = m.device_id
+    WHERE d.id > :after_id AND d.id <= :cur_id
+    AND d.standard_field_id = :field_id AND i.modelID = :model_id
+    ORDER BY d.id
+"""
+
+UPDATE_DETAIL_SQL = """
+    UPDATE cvsc_sign_detail SET standard_field_value = :value, standard_field_num = :num
+    WHERE id = :id
+"""
+
+# 乐观检查点：只有检查点未被其他执行者推进、任务未被取代时才生效
+CHECKPOINT_SQL = """
+    UPDATE cvsc_renormalize_job
+    SET last_id = :cur_id, rows_scanned = rows_scanned + :scanned, rows_updated = rows_updated + :updated,
+        status = :status, updated_at = GETDATE()
+    WHERE id = :job_id AND last_id = :after_id AND status IN (:pending, :running)
+"""
+
+FAIL_SQL = """
+    UPDATE cvsc_renormalize_job SET status = :failed, error = :error, updated_at = GETDATE()
+    WHERE id = :job_id AND status IN (:pending, :running)
+"""
+
+# 明细数据版本：重算任务累计改写的明细行数，与每块的更新在同一事务中增加
+DATA_VERSION_SQL = "SELECT COALESCE(SUM(rows_updated), 0) AS rows_updated FROM cvsc_renormalize_job"
+
+STATUS_PARAMS = {
+    'pending': STATUS_PENDING,
+    'running': STATUS_RUNNING,
+    'superseded': STATUS_SUPERSEDED,
+    'failed': STATUS_FAILED,
+}
+
+class CheckpointLost(Exception):
+    """检查点已被其他执行者推进或任务已被取代"""
+
+def enqueue_renormalization(conn, mapping_id):
+    """在调用方的事务中登记映射的重算任务，同一映射未完成的旧任务标记为已取代
+
+    须与公式更新在同一事务中执行：任一步失败时公式、旧任务和新任务一起回滚，不会出现公式已改而没有任务的状态。
+    """
+    params = dict(STATUS_PARAMS, mapping_id=int(mapping_id))
+    conn.execute(text(adapt_sql(SUPERSEDE_SQL)), params)
+    conn.execute(text(adapt_sql(ENQUEUE_SQL)), params)
+
+def get_renormalize_jobs(limit=20):
+    """获取最近的重算任务及进度"""
+    df = run_query(get_statement("renormalize_jobs", JOBS_SQL), {'page_size': int(limit)})
+    if df.empty:
+        return df
+    # 按明细ID区间估算进度
+    df['progress'] = np.where(df['max_id'] > 0, df['last_id'] / df['max_id'].where(df['max_id'] > 0, 1), 1.0)
+    df.loc[df['status'] == STATUS_DONE, 'progress'] = 1.0
+    df['status_label'] = df['status'].map(STATUS_LABELS).fillna(df['status'])
+    return df
+
+def _next_job():
+    """取最早的可执行任务"""
+    params = dict(STATUS_PARAMS, ready_before=datetime.now() - timedelta(seconds=config.RENORMALIZE_DELAY_SECONDS))
+    df = run_query(get_statement("renormalize_next_job", NEXT_JOB_SQL), params)
+    return None if df.empty else df.iloc[0].to_dict()
+
+def _start_job(job):
+    """等待中的任务标记为执行中并确定重算范围，返回最新的任务行"""
+    if job['status'] == STATUS_PENDING:
+        run_update(START_SQL, dict(STATUS_PARAMS, job_id=int(job['id'])))
+    df = run_query(get_statement("renormalize_job", JOB_SQL), {'job_id': int(job['id'])})
+    return None if df.empty else df.iloc[0].to_dict()
+
+def _renormalize_chunk(job, formula, after_id, chunk_size):
+    """重算一块明细并推进检查点，返回 (新检查点, 扫描行数, 更新行数, 是否完成)"""
+    max_id = int(job['max_id'])
+    params = {
+        'page_size': chunk_size, 'after_id': after_id, 'cur_id': max_id,
+        'field_id': int(job['standard_field_id']), 'model_id': int(job['model_id']),
+    }
+    # 读取、更新与检查点在同一事务中，读取失败时抛出异常而不是当作已完成
+    with get_db_engine().begin() as conn:
+        df = pd.read_sql(get_statement("renormalize_chunk", CHUNK_SQL), conn, params=params)
+        finished = len(df) < chunk_size
+        cur_id = max_id if finished else int(df['id'].iloc[-1])
+
+        converted = formula(to_numeric(df['original_device_value'].to_numpy(dtype=object)))
+        current = to_numeric(df['standard_field_num'].to_numpy(dtype=object))
+        current = np.where(np.isnan(current), to_numeric(df['standard_field_value'].to_numpy(dtype=object)), current)
+        # 原值无法换算的行保持不变；只写数值有变化的行
+        changed = ~np.isnan(converted) & (np.isnan(current) | (np.abs(converted - current) > 1e-9))
+        rows = [
+            {'id': int(i), 'value': value, 'num': float(num)}
+            for i, value, num in zip(df['id'].to_numpy()[changed], format_values(converted[changed]), converted[changed])
+        ]
+        if rows:
+            conn.execute(text(adapt_sql(UPDATE_DETAIL_SQL)), rows)
+        checkpoint = dict(STATUS_PARAMS, job_id=int(job['id']), after_id=after_id, cur_id=cur_id,
+                          scanned=len(df), updated=len(rows), status=STATUS_DONE if finished else STATUS_RUNNING)
+        if conn.execute(text(adapt_sql(CHECKPOINT_SQL)), checkpoint).rowcount != 1:
+            raise CheckpointLost()
+    return cur_id, len(df), len(rows), finished
+
+def run_renormalize_job(job, chunk_size=None, pause=None, should_stop=None):
+    """从检查点继续执行一个重算任务，返回本次更新的行数"""
+    chunk_size = int(chunk_size or config.RENORMALIZE_CHUNK_SIZE)
+    pause = config.RENORMALIZE_PAUSE if pause is None else pause
+    job = _start_job(job)
+    if job is None or job['status'] != STATUS_RUNNING:
+        return 0
+    after_id = int(job['last_id'])
+    scanned = updated = 0
+    try:
+        formula = compile_formula(job['conversion_formula'])
+        while True:
+            after_id, chunk_scanned, chunk_updated, finished = _renormalize_chunk(job, formula, after_id, chunk_size)
+            scanned += chunk_scanned
+            updated += chunk_updated
+            if finished or (should_stop and should_stop()):
+                break
+            if pause:
+                time.sleep(pause)
+    except CheckpointLost:
+        logger.info(f"重算任务 {job['id']} 已被取代或由其他执行者处理，停止")
+    except Exception as e:
+        logger.error(f"重算任务 {job['id']} 失败: {e}")
+        run_update(FAIL_SQL, dict(STATUS_PARAMS, job_id=int(job['id']), error=str(e)[:500]))
+    logger.info(f"重算任务 {job['id']}：扫描 {scanned} 行，更新 {updated} 行，检查点 {after_id}/{job['max_id']}")
+    return updated
+
+def run_pending_jobs(chunk_size=None, pause=None, should_stop=None):
+    """依次执行未完成的重算任务，返回处理的任务数"""
+    handled = set()
+    while not (should_stop and should_stop()):
+        job = _next_job()
+        # 同一任务本次已处理过（失败或被并发执行者接管）时不再重复
+        if job is None or job['id'] in handled:
+            break
+        handled.add(job['id'])
+        run_renormalize_job(job, chunk_size, pause, should_stop)
+    return len(handled)
+
+class RenormalizeWorker:
+    """应用内的后台重算线程：处理完当前未完成任务后退出，重复启动不会并发执行"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动后台线程，已在运行时直接返回"""
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=run_pending_jobs, kwargs={'should_stop': self._stop.is_set},
+                                            name="renormalize", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """请求在当前块提交后停止"""
+        self._stop.set()
+
+class DetailDataVersion:
+    """已入库明细的数据版本：重算任务改写明细后变化，体征缓存以此失效（重算可能在其他进程中执行，因此从任务表读取）"""
+
+    def __init__(self, refresh_seconds=None):
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else config.DETAIL_VERSION_REFRESH_SECONDS
+        self._lock = threading.Lock()
+        self._version = None
+        self._refreshed_at = 0.0
+
+    @property
+    def version(self):
+        """当前数据版本"""
+        self.refresh()
+        return self._version or 0
+
+    def refresh(self, force=False):
+        """读取重算任务累计更新行数（任务表只有数十行）"""
+        if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return
+            df = run_query(DATA_VERSION_SQL)
+            self._refreshed_at = time.monotonic()
+            if df.empty:
+                # 查询失败时沿用旧版本
+                return
+            version = int(df.iloc[0]['rows_updated'])
+            if self._version is not None and version != self._version:
+                logger.info(f"重算任务改写了已入库明细，明细数据版本 {self._version} -> {version}")
+            self._version = version
+
+@st.cache_resource
+def get_detail_data_version():
+    """获取进程内共享的明细数据版本"""
+    return DetailDataVersion()
+
+@st.cache_resource
+def get_renormalize_worker():
+    """获取进程内共享的后台重算线程"""
+    return RenormalizeWorker()
+
+def main():
+    parser = argparse.ArgumentParser(description="映射公式变更后的明细重算任务")
+    parser.add_argument("--chunk-size", type=int, default=config.RENORMALIZE_CHUNK_SIZE, help="每块明细行数")
+    parser.add_argument("--pause", type=float, default=config.RENORMALIZE_PAUSE, help="块间休眠（秒）")
+    parser.add_argument("--interval", type=int, default=config.RENORMALIZE_INTERVAL, help="检查新任务的间隔（秒）")
+    parser.add_argument("--once", action="store_true", help="处理完当前任务后退出")
+    args = parser.parse_args()
+
+    while True:
+        run_pending_jobs(args.chunk_size, args.pause)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
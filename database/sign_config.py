@@ -0,0 +1,102 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import logging
+import threading
+import time
+from .queries import run_query
+from config import config
+
+logger = logging.getLogger(__name__)
+
+CONFIG_SQL = """
+    SELECT id, field_name, description, unit, normal_range_low, normal_range_high, warning_threshold
+    FROM cvsc_standard_sign_config
+    ORDER BY id
+"""
+
+# 体征数据中由配置表补全的列（文本列为分类类型，范围列与数值列同为 float32），顺序与原关联查询一致
+LABEL_COLUMNS = ['field_name', 'description', 'unit']
+RANGE_COLUMNS = ['normal_range_low', 'normal_range_high', 'warning_threshold']
+CONFIG_COLUMNS = LABEL_COLUMNS + RANGE_COLUMNS
+
+class SignConfigTable:
+    """标准体征配置的内存快照：按字段ID在内存中补全名称、单位和范围，内容变化时版本号递增并整体替换快照"""
+
+    def __init__(self, refresh_seconds=None):
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else config.SIGN_CONFIG_REFRESH_SECONDS
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._refreshed_at = 0.0
+
+    def snapshot(self):
+        """当前快照：{'version', 'checksum', 'ids', 'labels', 'ranges'}"""
+        self.refresh()
+        return self._snapshot
+
+    @property
+    def version(self):
+        """配置版本号，每次内容变化加一"""
+        snapshot = self.snapshot()
+        return snapshot['version'] if snapshot else 0
+
+    def refresh(self, force=False):
+        """重新加载配置表（数十行），内容未变化时保留原快照"""
+        if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return
+            df = run_query(CONFIG_SQL)
+            self._refreshed_at = time.monotonic()
+            if df.empty:
+                # 查询失败时沿用旧快照
+                if self._snapshot is None:
+                    self._snapshot = self._build(df, 0, None)
+                return
+            checksum = int(pd.util.hash_pandas_object(df, index=False).sum())
+            if self._snapshot is not None and self._snapshot['checksum'] == checksum:
+                return
+            version = (self._snapshot['version'] if self._snapshot else 0) + 1
+            self._snapshot = self._build(df, version, checksum)
+            logger.info(f"标准体征配置已加载，版本 {version}，{len(df)} 个字段")
+
+    @staticmethod
+    def _build(df, version, checksum):
+        """构建快照：字段ID索引、文本列的分类编码和范围列数组"""
+        if df.empty:
+            df = pd.DataFrame(columns=['id'] + CONFIG_COLUMNS)
+        labels = {}
+        for column in LABEL_COLUMNS:
+            categorical = pd.Categorical(df[column].astype(object).where(df[column].notna(), None))
+            labels[column] = (categorical.codes.astype(np.int32), categorical.categories)
+        return {
+            'version': version,
+            'checksum': checksum,
+            'ids': pd.Index(df['id'].astype('int64')),
+            'labels': labels,
+            'ranges': {column: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float32') for column in RANGE_COLUMNS},
+        }
+
+    def attach(self, df):
+        """按 standard_field_id 补全配置列，未知字段ID补空值"""
+        if 'standard_field_id' not in df.columns:
+            return df
+        snapshot = self.snapshot()
+        ids = df['standard_field_id'].to_numpy(dtype='int64') if len(df) else np.empty(0, dtype='int64')
+        pos = snapshot['ids'].get_indexer(ids)
+        missing = pos < 0
+        for column, (codes, categories) in snapshot['labels'].items():
+            taken = codes.take(pos, mode='clip') if len(codes) else np.full(len(pos), -1, dtype=np.int32)
+            taken[missing] = -1
+            df[column] = pd.Categorical.from_codes(taken, categories=categories)
+        for column, values in snapshot['ranges'].items():
+            taken = values.take(pos, mode='clip') if len(values) else np.full(len(pos), np.nan, dtype=np.float32)
+            taken[missing] = np.nan
+            df[column] = taken
+        return df
+
+@st.cache_resource
+def get_sign_config_table():
+    """获取进程内共享的标准体征配置快照"""
+    return SignConfigTable()
@@ -0,0 +1,58 @@
+import threading
+from sqlalchemy import text, bindparam, DateTime, Integer, Unicode
+from .dialect import adapt_sql
+
+# 常用参数的固定类型，保证同一语句每次下发的参数声明一致，便于 SQL Server 复用执行计划
+PARAM_TYPES = {
+    'start_time': DateTime(),
+    'end_time': DateTime(),
+    'cur_time': DateTime(),
+    'today_start': DateTime(),
+    'yesterday_start': DateTime(),
+    'month_start': DateTime(),
+    'hour_ago': DateTime(),
+    'day_ago': DateTime(),
+    'day_hour_ago': DateTime(),
+    'ready_before': DateTime(),
+    'cur_id': Integer(),
+    'after_id': Integer(),
+    'model_id': Integer(),
+    'field_id': Integer(),
+    'job_id': Integer(),
+    'page_size': Integer(),
+    'pid': Unicode(50),
+    'name': Unicode(50),
+    'bed_no': Unicode(50),
+    'location': Unicode(50),
+    'ptype': Unicode(20),
+}
+
+_statements = {}
+_stats = {}
+_lock = threading.Lock()
+
+def get_statement(name, sql):
+    """获取预编译语句，同名语句只构建一次并在进程内复用"""
+    with _lock:
+        stmt = _statements.get(name)
+        if stmt is None:
+            stmt = text(adapt_sql(sql))
+            typed = [bindparam(key, type_=PARAM_TYPES[key]) for key in stmt.compile().params if key in PARAM_TYPES]
+            if typed:
+                stmt = stmt.bindparams(*typed)
+            _statements[name] = stmt
+            _stats[name] = 0
+        # 计数与注册在同一把锁内，多线程并发调用时不丢失复用次数
+        _stats[name] += 1
+    return stmt
+
+def get_statement_stats():
+    """获取语句注册表统计：每个语句的复用次数"""
+    with _lock:
+        return dict(_stats)
+
+def clear_statements():
+    """清空语句注册表"""
+    with _lock:
+        _statements.clear()
+        _stats.clear()
@@ -3,40 +3,66 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from database.queries import search_patients, get_filter_options, get_dashboard_stats
+from database.queries import (
+    get_dashboard_stats, get_active_alerts, get_location_stats,
+    get_device_list, get_device_monitoring_stats, get_device_performance_metrics
+)
 from components.patient_detail import render_patient_detail
 from components.common import render_footer
+from utils.panel_loader import load_panels
 
 def render_dashboard():
     """渲染实时监控看板页面"""
     st.title("📊 全院体征实时监控")
     
+    # 本次刷新开始时并发加载所有面板数据，页面耗时约等于最慢的单个查询
+    panels, errors = load_panels({
+        'stats': get_dashboard_stats,
+        'trend': get_collection_trend,
+        'location_stats': get_location_stats,
+        'alerts': get_active_alerts,
+        'device_stats': get_device_monitoring_stats,
+        'device_list': get_device_list,
+        'perf_metrics': get_device_performance_metrics
+    })
+    
     # 实时监控概览
-    render_realtime_overview()
+    render_realtime_overview(panels['stats'], panels['trend'], panels['location_stats'], errors)
     
     st.divider()
     
     # 病区监控状态
-    render_location_monitoring()
+    render_location_monitoring(panels['location_stats'], errors)
     
     st.divider()
     
     # 实时告警信息
-    render_realtime_alerts()
+    render_realtime_alerts(panels['alerts'], errors)
     
     st.divider()
     
     # 设备状态监控
-    render_device_monitoring()
+    render_device_monitoring(panels['device_stats'], panels['device_list'], panels['perf_metrics'], errors)
     
     # 自动刷新
     render_auto_refresh()
 
-def render_realtime_overview():
+def render_panel_error(errors, *names):
+    """面板数据加载失败时显示降级提示"""
+    for name in names:
+        if name in errors:
+            st.warning(f"⚠️ 数据加载失败（{errors[name]}），请稍后刷新")
+
+def render_realtime_overview(stats, trend_data, location_stats, errors):
     """渲染实时监控概览"""
     st.markdown("### 🏥 实时监控概览")
     
-    stats = get_dashboard_stats()
+    render_panel_error(errors, 'stats', 'trend')
+    stats = dict(stats or {})
+    # 活跃告警取自病区统计：近24小时内最新一次采集为警告或危急的患者数
+    if location_stats is not None and not location_stats.empty:
+        stats['critical_alerts'] = int(location_stats['critical_count'].sum())
+        stats['active_alerts'] = int(location_stats['warning_count'].sum()) + stats['critical_alerts']
     
     # 关键指标卡片
     col1, col2, col3, col4 = st.columns(4)
@@ -62,20 +88,19 @@ def render_realtime_overview():
             delta_color="normal"
         )
     with col4:
-        alert_delta = stats.get('new_alerts', 0)
+        critical_alerts = stats.get('critical_alerts', 0)
         st.metric(
             label="⚠️ 活跃告警",
             value=stats.get('active_alerts', 0),
-            delta=f"+{alert_delta} 新增" if alert_delta > 0 else f"-{abs(alert_delta)} 已处理",
-            delta_color="inverse" if alert_delta > 0 else "normal"
+            delta=f"{critical_alerts} 危急",
+            delta_color="inverse" if critical_alerts > 0 else "off"
         )
     
     # 实时趋势图
     col1, col2 = st.columns([2, 1])
     with col1:
         st.markdown("#### 📈 24小时采集趋势")
-        trend_data = get_collection_trend()
-        if not trend_data.empty:
+        if trend_data is not None and not trend_data.empty:
             fig = go.Figure()
             fig.add_trace(go.Scatter(
                 x=trend_data['time'], 
@@ -126,12 +151,12 @@ def render_realtime_overview():
         fig.update_layout(height=300, template="plotly_white", margin=dict(l=0, r=0, t=30, b=0))
         st.plotly_chart(fig, use_container_width=True)
 
-def render_location_monitoring():
+def render_location_monitoring(location_stats, errors):
     """渲染病区监控状态"""
     st.markdown("### 🏥 病区监护状态")
     
-    location_stats = get_location_stats()
-    if not location_stats.empty:
+    render_panel_error(errors, 'location_stats')
+    if location_stats is not None and not location_stats.empty:
         col1, col2 = st.columns([3, 1])
         
         with col1:
@@ -178,11 +203,13 @@ def render_location_monitoring():
     else:
         st.info("暂无病区数据")
 
-def render_realtime_alerts():
+def render_realtime_alerts(alerts, errors):
     """渲染实时告警信息"""
     st.markdown("### ⚠️ 实时告警监控")
     
-    alerts = get_active_alerts()
+    render_panel_error(errors, 'alerts')
+    if alerts is None:
+        return
     
     if not alerts.empty:
         # 告警统计
@@ -226,16 +253,16 @@ def render_realtime_alerts():
     else:
         st.success("✅ 当前无活跃告警，系统运行正常")
 
-def render_device_monitoring():
+def render_device_monitoring(device_stats, device_list, perf_metrics, errors):
     """渲染设备状态监控"""
     st.markdown("### 🖥️ 设备状态监控")
     
-    device_stats = get_device_monitoring_stats()
+    render_panel_error(errors, 'device_stats', 'device_list', 'perf_metrics')
     
     col1, col2, col3 = st.columns(3)
     with col1:
         # 设备状态饼图
-        if not device_stats.empty:
+        if device_stats is not None and not device_stats.empty:
             fig = px.pie(
                 values=device_stats['count'].values,
                 names=device_stats['status'].values,
@@ -252,8 +279,7 @@ def render_device_monitoring():
     with col2:
         # 设备详细信息
         st.markdown("#### 📋 设备清单")
-        device_list = get_device_list()
-        if not device_list.empty:
+        if device_list is not None and not device_list.empty:
             # 只显示前10台设备
             display_devices = device_list.head(10)
             
@@ -267,7 +293,7 @@ def render_device_monitoring():
     with col3:
         # 设备性能指标
         st.markdown("#### ⚡ 性能指标")
-        perf_metrics = get_device_performance_metrics()
+        perf_metrics = perf_metrics or {}
         
         st.metric("平均响应时间", f"{perf_metrics.get('avg_response_time', 0)}ms")
         st.metric("数据成功率", f"{perf_metrics.get('success_rate', 0)}%")
@@ -379,26 +405,6 @@ def calculate_system_health(stats):
     
     render_footer()
 
-@st.cache_data(ttl=300)  # 缓存5分钟
-def get_dashboard_stats():
-    """获取仪表板统计数据"""
-    try:
-        # 这里应该调用实际的数据库查询
-        # 暂时返回模拟数据
-        return {
-            'online_devices': 45,
-            'new_devices_today': 3,
-            'monitored_patients': 128,
-            'patient_change': 5.2,
-            'today_collections': 3847,
-            'collection_rate': 2.7,
-            'abnormal_alerts': 12,
-            'resolved_alerts': 8
-        }
-    except Exception as e:
-        st.error(f"获取统计数据失败: {e}")
-        return {}
-
 @st.cache_data(ttl=60)  # 缓存1分钟
 def get_collection_trend():
     """获取采集趋势数据"""
@@ -409,20 +415,4 @@ def get_collection_trend():
         return pd.DataFrame({'time': times, 'count': counts})
     except Exception as e:
         st.error(f"获取趋势数据失败: {e}")
-        return pd.DataFrame()
-
-@st.cache_data(ttl=300)  # 缓存5分钟
-def get_location_stats():
-    """获取病区统计数据"""
-    try:
-        # 模拟病区数据
-        data = {
-            'location': ['ICU', '内科', '外科', '儿科', '妇产科'],
-            'normal_count': [15, 28, 22, 18, 12],
-            'warning_count': [3, 5, 4, 2, 1],
-            'critical_count': [2, 1, 2, 1, 0]
-        }
-        return pd.DataFrame(data)
-    except Exception as e:
-        st.error(f"获取病区统计失败: {e}")
         return pd.DataFrame()
\ No newline at end of file
@@ -58,8 +58,7 @@ def render_device_overview():
     with col4:
         st.metric(
             label="⚠️ 需维护",
-            value=stats.get('maintenance_needed', 0),
-            delta=f"-{stats.get('resolved_today', 0)} 今日已处理"
+            value=stats.get('maintenance_needed', 0)
         )
 
 def render_device_list():
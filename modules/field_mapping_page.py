@@ -1,8 +1,13 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-from database.queries import get_field_mappings, add_field_mapping, get_device_models, get_standard_fields, delete_field_mapping
+from database.queries import get_field_mappings, add_field_mapping, get_device_models, get_standard_fields, delete_field_mapping, update_field_mapping
+from database.renormalize import get_renormalize_jobs, get_renormalize_worker
 from utils.helpers import validate_mapping_form
+from database.mapping_validation import validate_model_mappings, get_model_mappings
+from utils.formula import compile_formula, FormulaError, CHECK_LABELS
+from config import config
 from components.common import render_footer
 
 def render_field_mapping():
@@ -124,14 +129,57 @@ def render_mapping_management():
             num_rows="dynamic"
         )
         
+        # 保存公式修改：公式变化的映射会登记明细重算任务
+        if st.button("💾 保存修改", type="primary"):
+            save_mapping_changes(mapping_df, edited_df)
+        
         # 删除选中映射
         if st.button("🗑️ 删除选中映射", type="secondary"):
             st.warning("⚠️ 删除操作不可恢复，请谨慎操作！")
         
         st.caption("💡 提示：直接编辑表格可更新映射配置，或使用右侧表单添加新映射")
+        
+        st.divider()
+        render_renormalize_jobs()
     else:
         st.info("暂无映射配置，请先添加字段映射。")
 
+def render_renormalize_jobs():
+    """渲染明细重算任务进度"""
+    st.markdown("#### 🔁 明细重算任务")
+    st.caption("修改转换公式后，已入库明细的标准值按新公式分块重算，可中断续跑")
+    jobs = get_renormalize_jobs()
+    if jobs.empty:
+        st.info("暂无重算任务")
+        return
+    
+    worker = get_renormalize_worker()
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        if st.button("▶️ 后台执行", disabled=worker.running, use_container_width=True):
+            worker.start()
+            st.rerun()
+    with col2:
+        st.caption("后台执行中，刷新页面查看进度" if worker.running else "也可以独立运行：python -m database.renormalize --interval 30")
+    
+    jobs['progress'] = jobs['progress'] * 100
+    st.dataframe(
+        jobs[['id', 'model_name', 'description', 'conversion_formula', 'status_label', 'progress', 'rows_scanned', 'rows_updated', 'updated_at', 'error']],
+        column_config={
+            'id': "任务",
+            'model_name': "设备型号",
+            'description': "标准字段",
+            'conversion_formula': "转换公式",
+            'status_label': "状态",
+            'progress': st.column_config.ProgressColumn("进度", min_value=0, max_value=100, format="%.0f%%"),
+            'rows_scanned': "已扫描",
+            'rows_updated': "已更新",
+            'updated_at': st.column_config.DatetimeColumn("更新时间", format="MM-DD HH:mm:ss"),
+            'error': "错误",
+        },
+        use_container_width=True, hide_index=True
+    )
+
 def render_add_mapping():
     """渲染新增映射"""
     st.subheader("➕ 新增字段映射")
@@ -242,31 +290,79 @@ def render_mapping_testing():
     st.subheader("🧪 映射配置测试")
     
     st.markdown("#### 批量测试")
-    col1, col2 = st.columns(2)
-    with col1:
-        test_model = st.selectbox("选择设备型号", get_device_model_names())
-    with col2:
-        test_count = st.number_input("测试数据量", min_value=1, max_value=100, value=10)
-    
-    if st.button("🚀 开始批量测试", type="primary"):
-        with st.spinner("正在测试映射配置..."):
-            test_results = run_batch_mapping_test(test_model, test_count)
-            
+    st.caption("抽取该型号最近的历史明细，用转换公式重新计算原始设备值，并与已存的标准值比较")
+    models = get_device_models()
+    if models.empty:
+        st.info("暂无设备型号")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            test_model = st.selectbox("选择设备型号", models.index, format_func=lambda i: models.loc[i, 'model_name'])
+        with col2:
+            test_count = st.number_input(
+                "测试数据量（明细行）", min_value=1000, max_value=config.MAPPING_VALIDATION_MAX_ROWS,
+                value=min(100000, config.MAPPING_VALIDATION_MAX_ROWS), step=10000
+            )
+        model_id = int(models.loc[test_model, 'id'])
+
+        # 候选公式：修改后先用历史数据验证，确认无误再保存到映射配置
+        mappings = get_model_mappings(model_id)
+        candidates = {}
+        if not mappings.empty:
+            with st.expander("候选转换公式（可选）"):
+                edited = st.data_editor(
+                    mappings[['standard_field_id', 'description', 'device_field_name', 'conversion_formula']],
+                    column_config={
+                        'standard_field_id': None,
+                        'description': st.column_config.TextColumn("标准字段", disabled=True),
+                        'device_field_name': st.column_config.TextColumn("设备字段", disabled=True),
+                        'conversion_formula': st.column_config.TextColumn("转换公式"),
+                    },
+                    use_container_width=True, hide_index=True, key=f"candidate_formulas_{model_id}"
+                )
+                before, after = mappings['conversion_formula'], edited['conversion_formula']
+                # 空单元格为 None/NaN，两者互不相等，都为空时按未修改处理
+                changed = ~(after.eq(before) | (after.isna() & before.isna()))
+                candidates = dict(zip(edited.loc[changed, 'standard_field_id'], edited.loc[changed, 'conversion_formula']))
+
+        if st.button("🚀 开始批量测试", type="primary"):
+            progress_bar = st.progress(0.0, text="正在读取历史明细...")
+            test_results = run_batch_mapping_test(
+                model_id, test_count, candidates,
+                progress=lambda done, total: progress_bar.progress(min(done / total, 1.0), text=f"已验证 {done:,} 行")
+            )
+            progress_bar.empty()
+
             if test_results['success']:
-                st.success(f"✅ 批量测试完成，成功率：{test_results['success_rate']:.1f}%")
-                
-                # 显示测试结果
-                results_df = pd.DataFrame(test_results['details'])
-                st.dataframe(results_df, use_container_width=True, hide_index=True)
-                
+                st.success(f"✅ 批量测试完成，不一致率：{test_results['mismatch_rate']:.2f}%")
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("验证行数", f"{test_results['rows']:,}")
+                col2.metric("不一致行数", f"{test_results['mismatched']:,}")
+                col3.metric("吞吐量", f"{test_results['rows_per_second']:,.0f} 行/秒")
+                col4.metric("耗时", f"{test_results['elapsed']:.2f} 秒")
+
+                by_field = test_results['by_field']
+                st.dataframe(
+                    by_field.drop(columns=['standard_field_id']),
+                    column_config={
+                        'description': "标准字段",
+                        'device_field_name': "设备字段",
+                        'conversion_formula': "转换公式",
+                        'readings': "验证行数",
+                        'mismatch_rate': st.column_config.NumberColumn("不一致率 (%)", format="%.2f"),
+                    },
+                    use_container_width=True, hide_index=True
+                )
+
                 # 可视化测试结果
-                if not results_df.empty:
-                    fig = px.pie(
-                        values=results_df['result'].value_counts().values,
-                        names=results_df['result'].value_counts().index,
-                        title="测试结果分布"
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
+                totals = by_field[CHECK_LABELS].sum()
+                totals = totals[totals > 0]
+                fig = px.pie(values=totals.values, names=totals.index, title="测试结果分布")
+                st.plotly_chart(fig, use_container_width=True)
+
+                if not test_results['samples'].empty:
+                    st.markdown("##### 不一致样例")
+                    st.dataframe(test_results['samples'], use_container_width=True, hide_index=True)
             else:
                 st.error(f"❌ 批量测试失败：{test_results['error']}")
     
@@ -375,9 +471,32 @@ def get_mapping_stats():
         'validated_today': 8
     }
 
+def save_mapping_changes(original_df, edited_df):
+    """保存表格中修改的转换公式，公式变化的映射会登记明细重算任务"""
+    merged = original_df[['id', 'conversion_formula']].merge(
+        edited_df[['id', 'conversion_formula']], on='id', suffixes=('', '_new')
+    )
+    changed = merged[merged['conversion_formula'].fillna('') != merged['conversion_formula_new'].fillna('')]
+    if changed.empty:
+        st.info("没有需要保存的修改")
+        return
+    
+    saved = 0
+    for row in changed.itertuples(index=False):
+        try:
+            compile_formula(row.conversion_formula_new)
+        except FormulaError as e:
+            st.error(f"❌ 映射 {row.id} 的转换公式不合法：{e}")
+            continue
+        if update_field_mapping(int(row.id), conversion_formula=row.conversion_formula_new):
+            saved += 1
+    if saved:
+        st.success(f"✅ 已保存 {saved} 条映射，历史明细将按新公式重算")
+
 def get_device_model_names():
     """获取设备型号名称列表"""
-    return ["迈瑞T5", "菲利普MX700", "GE CARESCAPE", "西门子SC6000"]
+    models = get_device_models()
+    return models['model_name'].tolist() if not models.empty else []
 
 def get_standard_field_names():
     """获取标准字段名称列表"""
@@ -394,62 +513,41 @@ def export_mapping_config(df):
     )
 
 def test_mapping_conversion(formula, data_type):
-    """测试转换公式"""
+    """测试转换公式（编译为受限表达式，整批样例一次计算）"""
     try:
         if data_type == "数值":
-            test_values = [100, 37.5, 0, -10]
-            for val in test_values:
-                x = val
-                result = eval(formula)
-            return {'success': True, 'example': f"输入: 100 -> 输出: {eval(formula)}"}
+            test_values = np.array([100, 37.5, 0, -10], dtype=np.float64)
+            results = compile_formula(formula)(test_values)
+            if np.isnan(results).any():
+                invalid = ", ".join(f"{v:g}" for v in test_values[np.isnan(results)])
+                return {'success': False, 'error': f"输入 {invalid} 的计算结果无效"}
+            return {'success': True, 'example': f"输入: 100 -> 输出: {results[0]:g}"}
         else:
             return {'success': True, 'example': "字符串类型测试通过"}
-    except Exception as e:
+    except FormulaError as e:
         return {'success': False, 'error': str(e)}
 
-def run_batch_mapping_test(model_name, count):
-    """运行批量映射测试"""
-    # 模拟测试结果
-    import random
-    success_count = int(count * 0.85)
-    
-    details = []
-    for i in range(count):
-        if i < success_count:
-            details.append({
-                'test_id': i + 1,
-                'original_value': random.randint(50, 150),
-                'converted_value': random.randint(50, 150),
-                'result': '成功'
-            })
-        else:
-            details.append({
-                'test_id': i + 1,
-                'original_value': random.randint(50, 150),
-                'converted_value': None,
-                'result': '失败'
-            })
-    
-    return {
-        'success': True,
-        'success_rate': (success_count / count) * 100,
-        'details': details
-    }
+def run_batch_mapping_test(model_id, count, formulas=None, progress=None):
+    """运行批量映射测试：用历史明细验证当前或候选转换公式"""
+    try:
+        return validate_model_mappings(model_id, limit=count, formulas=formulas, progress=progress)
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
 
 def test_single_mapping(mapping_info, test_value):
     """测试单个映射"""
     try:
         formula = mapping_info['conversion_formula']
         x = float(test_value)
-        converted_value = eval(formula)
+        converted_value = float(compile_formula(formula)(x))
         
         return {
             'success': True,
             'original_value': test_value,
             'converted_value': converted_value,
-            'validation_passed': True
+            'validation_passed': not np.isnan(converted_value)
         }
-    except Exception as e:
+    except (FormulaError, ValueError) as e:
         return {'success': False, 'error': str(e)}
 
 @st.cache_data(ttl=300)
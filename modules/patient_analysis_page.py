@@ -3,8 +3,11 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from database.queries import search_patients, query_vital_signs_paginated
+from database.patient_index import search_patients_indexed, typeahead_patients
+from database.history_cache import get_vital_signs_history
 from components.common import render_footer
+from database.normal_ranges import get_normal_ranges
+from utils.helpers import detect_abnormal
 
 def render_patient_analysis():
     """渲染患者数据分析页面"""
@@ -22,7 +25,11 @@ def render_patient_analysis():
     
     if search_term or quick_search != "最近监护患者":
         if search_term:
-            patients = search_patients(name=search_term, pid=search_term)
+            # 前缀联想的患者排在前面，其后是姓名或ID包含关键词的患者
+            patients = pd.concat(
+                [typeahead_patients(search_term), search_patients_indexed(name=search_term, pid=search_term)],
+                ignore_index=True
+            ).drop_duplicates('patient_id', ignore_index=True)
         else:
             patients = get_quick_search_patients(quick_search)
             
@@ -70,23 +77,24 @@ def render_patient_analysis():
                         )
                 
                 # 获取数据
-                df_analysis = query_vital_signs_paginated(
+                df_analysis = get_vital_signs_history(
                     selected_pid, 
                     datetime.combine(start_d, datetime.min.time()),
                     datetime.combine(end_d, datetime.max.time())
                 )
                 
                 if not df_analysis.empty:
-                    df_analysis['standard_field_value'] = pd.to_numeric(df_analysis['standard_field_value'], errors='coerce')
+                    # 按患者性别、年龄取正常范围
+                    ranges = get_normal_ranges(patient_info['sex'], patient_info['age'])
                     
                     with tab1:
-                        render_trend_analysis(df_analysis, vital_types)
+                        render_trend_analysis(df_analysis, vital_types, ranges)
                     
                     with tab2:
                         render_statistical_analysis(df_analysis, vital_types)
                     
                     with tab3:
-                        render_abnormal_detection(df_analysis, vital_types)
+                        render_abnormal_detection(df_analysis, vital_types, ranges)
                     
                     with tab4:
                         render_detailed_data(df_analysis)
@@ -98,7 +106,7 @@ def render_patient_analysis():
     
     render_footer()
 
-def render_trend_analysis(df, vital_types):
+def render_trend_analysis(df, vital_types, ranges):
     """渲染趋势分析"""
     st.subheader("📈 体征趋势变化")
     
@@ -121,8 +129,8 @@ def render_trend_analysis(df, vital_types):
                 ))
                 
                 # 添加正常范围参考线
-                normal_range = get_normal_range(vital)
-                if normal_range:
+                normal_range = ranges.get(vital)
+                if normal_range and normal_range['min'] is not None and normal_range['max'] is not None:
                     fig.add_hline(y=normal_range['min'], line_dash="dash", line_color="green", opacity=0.5)
                     fig.add_hline(y=normal_range['max'], line_dash="dash", line_color="green", opacity=0.5)
                     fig.add_annotation(
@@ -179,28 +187,18 @@ def render_statistical_analysis(df, vital_types):
         if stats_summary:
             st.dataframe(pd.DataFrame(stats_summary), use_container_width=True, hide_index=True)
 
-def render_abnormal_detection(df, vital_types):
+def render_abnormal_detection(df, vital_types, ranges):
     """渲染异常检测"""
     st.subheader("⚠️ 异常检测分析")
     
-    abnormal_data = []
-    for vital in vital_types:
-        vital_data = df[df['description'] == vital]
-        if not vital_data.empty:
-            normal_range = get_normal_range(vital)
-            if normal_range:
-                abnormal = vital_data[
-                    (vital_data['standard_field_value'] < normal_range['min']) |
-                    (vital_data['standard_field_value'] > normal_range['max'])
-                ]
-                if not abnormal.empty:
-                    abnormal_data.extend(abnormal.to_dict('records'))
+    selected = df[df['description'].isin(vital_types)]
+    mask, _ = detect_abnormal(selected, ranges)
+    abnormal_df = selected[mask]
     
-    if abnormal_data:
-        st.warning(f"检测到 {len(abnormal_data)} 个异常数据点")
+    if not abnormal_df.empty:
+        st.warning(f"检测到 {len(abnormal_df)} 个异常数据点")
         
         # 异常数据表格
-        abnormal_df = pd.DataFrame(abnormal_data)
         st.dataframe(
             abnormal_df[['collection_time', 'description', 'standard_field_value']],
             column_config={
@@ -214,7 +212,7 @@ def render_abnormal_detection(df, vital_types):
         
         # 异常趋势图
         fig = px.scatter(
-            pd.DataFrame(abnormal_data),
+            abnormal_df,
             x='collection_time',
             y='standard_field_value',
             color='description',
@@ -270,17 +268,6 @@ def render_detailed_data(df):
         hide_index=True
     )
 
-def get_normal_range(vital_sign):
-    """获取体征正常范围"""
-    ranges = {
-        '体温': {'min': 36.0, 'max': 37.5},
-        '脉搏': {'min': 60, 'max': 100},
-        '呼吸': {'min': 12, 'max': 20},
-        '血压': {'min': 90, 'max': 140},
-        '血氧饱和度': {'min': 95, 'max': 100}
-    }
-    return ranges.get(vital_sign)
-
 @st.cache_data(ttl=300)
 def get_quick_search_patients(search_type):
     """快速搜索患者"""
@@ -3,9 +3,12 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from database.queries import search_patients, query_vital_signs_paginated, get_filter_options
+from database.dimensions import get_filter_options
+from database.patient_index import search_patients_indexed, typeahead_patients
+from database.history_cache import get_vital_signs_history
 from components.patient_detail import render_patient_detail
-from components.common import render_footer
+from utils.helpers import detect_abnormal
+from database.normal_ranges import get_normal_ranges
 
 def render_patient_search():
     """渲染患者检索分析页面"""
@@ -63,6 +66,9 @@ def render_patient_selection_step():
     with st.container(border=True):
         st.markdown("#### 🔍 筛选条件")
         
+        # 快速定位：按前缀联想，选中后直接进入体征分析
+        render_patient_typeahead()
+        
         # 获取筛选选项
         filter_opts = get_filter_options()
         
@@ -116,10 +122,32 @@ def render_patient_selection_step():
     if st.session_state.search_filters:
         render_patient_results()
 
+def render_patient_typeahead():
+    """渲染快速定位：姓名、住院号或床号前缀联想"""
+    prefix = st.text_input("⚡ 快速定位", placeholder="输入姓名、住院号或床号开头，回车显示候选患者", key="patient_typeahead")
+    if not prefix:
+        return
+    suggestions = typeahead_patients(prefix)
+    if suggestions.empty:
+        st.caption("没有以此开头的患者，可使用下方条件检索")
+        return
+    labels = {
+        row.patient_id: f"{row.patient_name} ({row.patient_id}) - {row.bed_no}床 | {row.collection_location}"
+        for row in suggestions.itertuples(index=False)
+    }
+    col_pick, col_go = st.columns([4, 1])
+    with col_pick:
+        picked = st.selectbox("候选患者", list(labels), format_func=labels.get, label_visibility="collapsed")
+    with col_go:
+        if st.button("📊 体征分析", key="typeahead_analyze", use_container_width=True, type="primary"):
+            st.session_state.selected_patient_id = picked
+            st.session_state.search_step = 2
+            st.rerun()
+
 def render_patient_results():
     """渲染患者查询结果"""
     with st.spinner("正在查询患者数据..."):
-        df_patients = search_patients(
+        df_patients = search_patients_indexed(
             name=st.session_state.search_filters.get('name'),
             pid=st.session_state.search_filters.get('pid'),
             bed_no=st.session_state.search_filters.get('bed_no'),
@@ -273,15 +301,15 @@ def render_vital_signs_analysis():
     })
     
     with st.spinner("正在查询体征数据..."):
-        df_vitals = query_vital_signs_paginated(
+        df_vitals = get_vital_signs_history(
             st.session_state.selected_patient_id,
             datetime.combine(filters['start_date'], datetime.min.time()),
             datetime.combine(filters['end_date'], datetime.max.time())
         )
     
     if not df_vitals.empty:
-        # 数据预处理
-        df_vitals['standard_field_value'] = pd.to_numeric(df_vitals['standard_field_value'], errors='coerce')
+        # 按患者性别、年龄取正常范围，各标签页共用
+        ranges = get_patient_normal_ranges(st.session_state.selected_patient_id)
         
         # 筛选体征类型
         if filters['vital_types']:
@@ -289,7 +317,7 @@ def render_vital_signs_analysis():
         
         # 筛选异常数据
         if filters['abnormal_only']:
-            df_vitals = filter_abnormal_data(df_vitals)
+            df_vitals = filter_abnormal_data(df_vitals, ranges)
         
         st.markdown(f"### 📊 数据分析结果：共 `{len(df_vitals)}` 条体征记录")
         
@@ -297,13 +325,13 @@ def render_vital_signs_analysis():
         tab1, tab2, tab3, tab4 = st.tabs(["📈 趋势图", "📊 统计分析", "⚠️ 异常检测", "📋 数据详情"])
         
         with tab1:
-            render_trend_charts(df_vitals)
+            render_trend_charts(df_vitals, ranges)
         
         with tab2:
-            render_statistical_analysis(df_vitals)
+            render_statistical_analysis(df_vitals, ranges)
         
         with tab3:
-            render_abnormal_detection(df_vitals)
+            render_abnormal_detection(df_vitals, ranges)
         
         with tab4:
             render_data_details(df_vitals)
@@ -311,23 +339,12 @@ def render_vital_signs_analysis():
     else:
         st.warning("⚠️ 该时间段内未找到体征数据，请调整筛选条件。")
 
-def filter_abnormal_data(df):
-    """筛选异常数据"""
-    abnormal_data = []
-    for _, row in df.iterrows():
-        normal_range = get_normal_range(row['description'])
-        if normal_range:
-            value = row['standard_field_value']
-            if pd.notna(value) and (value < normal_range['min'] or value > normal_range['max']):
-                abnormal_data.append(True)
-            else:
-                abnormal_data.append(False)
-        else:
-            abnormal_data.append(False)
-    
-    return df[abnormal_data]
+def filter_abnormal_data(df, ranges):
+    """筛选异常数据（向量化：按体征项合并正常范围后一次比较）"""
+    mask, _ = detect_abnormal(df, ranges)
+    return df[mask]
 
-def render_trend_charts(df_vitals):
+def render_trend_charts(df_vitals, ranges):
     """渲染趋势图表"""
     if df_vitals.empty:
         st.info("暂无数据显示")
@@ -350,8 +367,8 @@ def render_trend_charts(df_vitals):
             ))
             
             # 添加正常范围参考线
-            normal_range = get_normal_range(vital)
-            if normal_range:
+            normal_range = ranges.get(vital)
+            if normal_range and normal_range['min'] is not None and normal_range['max'] is not None:
                 fig.add_hline(y=normal_range['min'], line_dash="dash", line_color="green", opacity=0.5)
                 fig.add_hline(y=normal_range['max'], line_dash="dash", line_color="green", opacity=0.5)
                 fig.add_annotation(
@@ -369,7 +386,7 @@ def render_trend_charts(df_vitals):
             )
             st.plotly_chart(fig, use_container_width=True)
 
-def render_statistical_analysis(df_vitals):
+def render_statistical_analysis(df_vitals, ranges):
     """渲染统计分析"""
     if df_vitals.empty:
         st.info("暂无数据统计")
@@ -393,15 +410,12 @@ def render_statistical_analysis(df_vitals):
     with col2:
         # 统计摘要
         stats_summary = []
+        _, abnormal_summary = detect_abnormal(df_vitals, ranges)
+        abnormal_counts = dict(zip(abnormal_summary['description'], abnormal_summary['abnormal_count']))
         for vital in df_vitals['description'].unique():
             vital_data = df_vitals[df_vitals['description'] == vital]['standard_field_value']
             if not vital_data.empty:
-                normal_range = get_normal_range(vital)
-                abnormal_count = 0
-                if normal_range:
-                    abnormal_count = len(vital_data[
-                        (vital_data < normal_range['min']) | (vital_data > normal_range['max'])
-                    ])
+                abnormal_count = int(abnormal_counts.get(vital, 0))
                 
                 stats_summary.append({
                     '体征项目': vital,
@@ -416,26 +430,15 @@ def render_statistical_analysis(df_vitals):
         if stats_summary:
             st.dataframe(pd.DataFrame(stats_summary), use_container_width=True, hide_index=True)
 
-def render_abnormal_detection(df_vitals):
+def render_abnormal_detection(df_vitals, ranges):
     """渲染异常检测"""
-    abnormal_data = []
-    for vital in df_vitals['description'].unique():
-        vital_data = df_vitals[df_vitals['description'] == vital]
-        if not vital_data.empty:
-            normal_range = get_normal_range(vital)
-            if normal_range:
-                abnormal = vital_data[
-                    (vital_data['standard_field_value'] < normal_range['min']) |
-                    (vital_data['standard_field_value'] > normal_range['max'])
-                ]
-                if not abnormal.empty:
-                    abnormal_data.extend(abnormal.to_dict('records'))
+    mask, summary = detect_abnormal(df_vitals, ranges)
     
-    if abnormal_data:
-        st.warning(f"⚠️ 检测到 `{len(abnormal_data)}` 个异常数据点")
+    if mask.any():
+        st.warning(f"⚠️ 检测到 `{int(mask.sum())}` 个异常数据点")
         
         # 异常数据表格
-        abnormal_df = pd.DataFrame(abnormal_data)
+        abnormal_df = df_vitals[mask]
         st.dataframe(
             abnormal_df[['collection_time', 'description', 'standard_field_value']],
             column_config={
@@ -447,11 +450,24 @@ def render_abnormal_detection(df_vitals):
             hide_index=True
         )
         
+        # 各项异常次数与连续异常段
+        st.dataframe(
+            summary,
+            column_config={
+                'description': '体征项目',
+                'readings': '测量次数',
+                'abnormal_count': '异常次数',
+                'runs': '连续异常段数',
+                'max_run': '最长连续异常'
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+        
         # 异常分布图
-        vital_counts = pd.DataFrame(abnormal_data)['description'].value_counts()
         fig_abnormal = px.bar(
-            x=vital_counts.index,
-            y=vital_counts.values,
+            x=summary['description'],
+            y=summary['abnormal_count'],
             title="异常数据分布",
             labels={'x': '体征项目', 'y': '异常次数'}
         )
@@ -506,17 +522,12 @@ def render_data_details(df_vitals):
         hide_index=True
     )
 
-def get_normal_range(vital_sign):
-    """获取体征正常范围"""
-    ranges = {
-        '体温': {'min': 36.0, 'max': 37.5},
-        '脉搏': {'min': 60, 'max': 100},
-        '呼吸': {'min': 12, 'max': 20},
-        '血压': {'min': 90, 'max': 140},
-        '血氧饱和度': {'min': 95, 'max': 100},
-        '心输出量': {'min': 4.0, 'max': 8.0}
-    }
-    return ranges.get(vital_sign)
+def get_patient_normal_ranges(patient_id):
+    """按患者性别、年龄获取各体征正常范围（正常范围注册表）"""
+    info = get_patient_basic_info(patient_id)
+    if info.empty:
+        return get_normal_ranges()
+    return get_normal_ranges(info.iloc[0]['sex'], info.iloc[0]['age'])
 
 def render_patient_detail_view():
     """渲染患者详情视图"""
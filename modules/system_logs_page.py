@@ -4,7 +4,10 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from database.queries import get_system_logs, get_system_stats, get_error_logs, get_performance_metrics
+from database.connection import get_pool_metrics
+from database.profiler import profiler
 from components.common import render_footer
+from config import config
 
 def render_system_logs():
     """渲染系统日志页面"""
@@ -39,7 +42,7 @@ def render_system_status():
     """渲染系统状态概览"""
     stats = get_system_stats()
     
-    col1, col2, col3, col4 = st.columns(4)
+    col1, col2, col3 = st.columns(3)
     with col1:
         status_color = "🟢" if stats.get('db_status') == '正常' else "🔴"
         st.metric(
@@ -51,16 +54,10 @@ def render_system_status():
         st.metric(
             label="🔄 采集服务",
             value=f"{stats.get('collection_delay', 0)}ms",
-            delta=f"{stats.get('delay_change', 0)}ms 较上小时"
+            delta=f"{stats.get('delay_change', 0)}ms 较上小时",
+            delta_color="inverse"
         )
     with col3:
-        alert_color = "🟡" if stats.get('error_count', 0) > 0 else "🟢"
-        st.metric(
-            label=f"{alert_color} 今日异常",
-            value=stats.get('error_count', 0),
-            delta=f"-{stats.get('resolved_errors', 0)} 已处理"
-        )
-    with col4:
         st.metric(
             label="📊 数据吞吐",
             value=f"{stats.get('data_throughput', 0)}/min",
@@ -139,17 +136,51 @@ def render_system_overview():
     
     # 数据库性能指标
     st.markdown("##### 数据库性能")
-    db_metrics = get_database_metrics()
-    if not db_metrics.empty:
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("查询响应时间", f"{db_metrics['avg_query_time'].iloc[0]:.2f}ms")
-        with col2:
-            st.metric("连接数", f"{db_metrics['active_connections'].iloc[0]}")
-        with col3:
-            st.metric("缓存命中率", f"{db_metrics['cache_hit_rate'].iloc[0]:.1f}%")
-        with col4:
-            st.metric("慢查询数", db_metrics['slow_queries'].iloc[0])
+    db_metrics = profiler.summary()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("查询响应时间", f"{db_metrics['avg_ms']:.2f}ms")
+    with col2:
+        st.metric("连接数", f"{get_pool_metrics().get('checked_out', 0)}")
+    with col3:
+        st.metric("查询成功率", f"{db_metrics['success_rate']:.1f}%")
+    with col4:
+        st.metric("慢查询数", db_metrics['slow'], help=f"耗时不低于 {config.SLOW_QUERY_THRESHOLD_MS}ms 的语句")
+    
+    # 连接池运行指标
+    render_pool_metrics()
+
+def render_pool_metrics():
+    """渲染数据库连接池指标"""
+    st.markdown("##### 连接池状态")
+    pool = get_pool_metrics()
+    if not pool:
+        st.info("暂无连接池指标")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("借出连接", f"{pool['checked_out']}/{pool['capacity']}", delta=f"峰值 {pool['peak_checked_out']}", delta_color="off")
+    with col2:
+        st.metric("溢出连接", f"{pool['overflow']}/{pool['max_overflow']}", delta=f"空闲 {pool['checked_in']}", delta_color="off")
+    with col3:
+        st.metric("等待时间 P95", f"{pool['wait_p95_ms']:.1f}ms", delta=f"最大 {pool['wait_max_ms']:.1f}ms", delta_color="off")
+    with col4:
+        st.metric("连接平均存活", f"{pool['lifetime_avg_s'] / 60:.1f}分钟", delta=f"新建 {pool['connects']} / 关闭 {pool['closes']}", delta_color="off")
+    
+    st.progress(min(pool['peak_saturation'], 100) / 100, text=f"峰值饱和度 {pool['peak_saturation']:.1f}%（当前 {pool['saturation']:.1f}%）")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        wait_df = pd.DataFrame(pool['wait_histogram'], columns=['bucket', 'count'])
+        fig_wait = px.bar(wait_df, x='bucket', y='count', title="连接获取等待时间分布", labels={'bucket': '等待时间', 'count': '次数'})
+        fig_wait.update_layout(height=300)
+        st.plotly_chart(fig_wait, use_container_width=True)
+    with col2:
+        lifetime_df = pd.DataFrame(pool['lifetime_histogram'], columns=['bucket', 'count'])
+        fig_life = px.bar(lifetime_df, x='bucket', y='count', title="连接存活时间分布", labels={'bucket': '存活时间', 'count': '连接数'})
+        fig_life.update_layout(height=300)
+        st.plotly_chart(fig_life, use_container_width=True)
 
 def render_runtime_logs():
     """渲染运行日志"""
@@ -302,28 +333,33 @@ def render_performance_analysis():
     with col2:
         st.metric("请求成功率", f"{perf_metrics.get('success_rate', 0):.1f}%")
     with col3:
-        st.metric("并发用户数", perf_metrics.get('concurrent_users', 0))
+        st.metric("累计查询数", perf_metrics.get('total_queries', 0))
     
     st.divider()
     
-    # 响应时间趋势
+    # 响应时间趋势（最近执行的语句）
     response_trend = get_response_time_trend()
     if not response_trend.empty:
-        fig_response = px.line(
+        fig_response = px.scatter(
             response_trend,
             x='timestamp',
-            y='response_time',
-            title="API响应时间趋势",
-            labels={'timestamp': '时间', 'response_time': '响应时间 (ms)'}
+            y='elapsed_ms',
+            color='page',
+            title="查询响应时间趋势",
+            labels={'timestamp': '时间', 'elapsed_ms': '响应时间 (ms)', 'page': '调用页面'}
         )
         fig_response.update_layout(height=350)
         st.plotly_chart(fig_response, use_container_width=True)
+    else:
+        st.info("暂无查询剖析数据")
+        return
     
     # 吞吐量分析
     throughput_data = get_throughput_analysis()
-    if not throughput_data.empty:
-        col1, col2 = st.columns(2)
-        with col1:
+    statement_performance = get_statement_performance()
+    col1, col2 = st.columns(2)
+    with col1:
+        if not throughput_data.empty:
             fig_throughput = px.bar(
                 throughput_data,
                 x='hour',
@@ -333,22 +369,78 @@ def render_performance_analysis():
             )
             fig_throughput.update_layout(height=300)
             st.plotly_chart(fig_throughput, use_container_width=True)
-        
-        with col2:
-            # API端点性能
-            endpoint_performance = get_endpoint_performance()
-            if not endpoint_performance.empty:
-                fig_endpoint = px.scatter(
-                    endpoint_performance,
-                    x='avg_response_time',
-                    y='request_count',
-                    size='error_rate',
-                    color='endpoint',
-                    title="API端点性能分析",
-                    labels={'avg_response_time': '平均响应时间', 'request_count': '请求数', 'error_rate': '错误率'}
-                )
-                fig_endpoint.update_layout(height=300)
-                st.plotly_chart(fig_endpoint, use_container_width=True)
+    
+    with col2:
+        # 语句性能：平均耗时 vs 调用次数，气泡大小为累计耗时
+        if not statement_performance.empty:
+            fig_statement = px.scatter(
+                statement_performance,
+                x='avg_ms',
+                y='calls',
+                size='total_ms',
+                color='kind',
+                hover_data=['statement', 'pages'],
+                title="SQL语句性能分析",
+                labels={'avg_ms': '平均耗时 (ms)', 'calls': '调用次数', 'total_ms': '累计耗时', 'kind': '类型'}
+            )
+            fig_statement.update_layout(height=300)
+            st.plotly_chart(fig_statement, use_container_width=True)
+    
+    # 累计耗时 Top 语句
+    st.markdown("##### 累计耗时 Top 语句")
+    st.dataframe(
+        statement_performance[['statement', 'calls', 'total_ms', 'avg_ms', 'max_ms', 'rows', 'bytes', 'errors', 'pages']],
+        column_config={
+            "statement": st.column_config.TextColumn("SQL语句", width="large"),
+            "calls": "调用次数",
+            "total_ms": st.column_config.NumberColumn("累计耗时(ms)", format="%.1f"),
+            "avg_ms": st.column_config.NumberColumn("平均耗时(ms)", format="%.1f"),
+            "max_ms": st.column_config.NumberColumn("最大耗时(ms)", format="%.1f"),
+            "rows": "返回行数",
+            "bytes": "数据量(字节)",
+            "errors": "失败次数",
+            "pages": "调用页面"
+        },
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    # 查询层返回的 DataFrame 内存
+    frame_memory = get_frame_memory()
+    if not frame_memory.empty:
+        st.markdown("##### 结果数据内存")
+        st.dataframe(
+            frame_memory,
+            column_config={
+                "name": "数据集",
+                "calls": "次数",
+                "rows": "累计行数",
+                "avg_bytes": st.column_config.NumberColumn("平均内存(字节)", format="%.0f"),
+                "max_bytes": "最大内存(字节)",
+                "bytes_per_row": st.column_config.NumberColumn("每行字节", format="%.1f"),
+                "pages": "调用页面"
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    # 最慢语句
+    st.markdown("##### 最慢语句")
+    slowest = get_slowest_queries()
+    st.dataframe(
+        slowest,
+        column_config={
+            "timestamp": st.column_config.DatetimeColumn("执行时间", format="MM-DD HH:mm:ss"),
+            "elapsed_ms": st.column_config.NumberColumn("耗时(ms)", format="%.1f"),
+            "rows": "返回行数",
+            "bytes": "数据量(字节)",
+            "page": "调用页面",
+            "statement": st.column_config.TextColumn("SQL语句", width="large"),
+            "error": "错误信息"
+        },
+        use_container_width=True,
+        hide_index=True
+    )
 
 def render_log_search():
     """渲染日志查询"""
@@ -441,21 +533,6 @@ def render_log_search():
                 st.warning("⚠️ 未找到符合条件的日志记录")
 
 # 辅助函数
-@st.cache_data(ttl=60)
-def get_system_stats():
-    """获取系统统计信息"""
-    return {
-        'db_status': '正常',
-        'db_pool_size': 8,
-        'db_pool_max': 20,
-        'collection_delay': 12,
-        'delay_change': -3,
-        'error_count': 5,
-        'resolved_errors': 8,
-        'data_throughput': 45,
-        'throughput_change': 12.5
-    }
-
 @st.cache_data(ttl=300)
 def get_service_status():
     """获取服务状态"""
@@ -474,17 +551,6 @@ def get_resource_usage():
     memory_usage = [45 + i*0.3 + (i%7)*1.5 for i in range(60)]
     return pd.DataFrame({'timestamp': times, 'cpu_usage': cpu_usage, 'memory_usage': memory_usage})
 
-@st.cache_data(ttl=300)
-def get_database_metrics():
-    """获取数据库性能指标"""
-    data = {
-        'avg_query_time': [2.5],
-        'active_connections': [15],
-        'cache_hit_rate': [94.2],
-        'slow_queries': [3]
-    }
-    return pd.DataFrame(data)
-
 @st.cache_data(ttl=300)
 def get_error_statistics():
     """获取异常统计"""
@@ -514,13 +580,12 @@ def get_error_types():
     }
     return pd.DataFrame(data)
 
-@st.cache_data(ttl=300)
 def get_response_time_trend():
-    """获取响应时间趋势"""
-    import pandas as pd
-    times = pd.date_range(end=datetime.now(), periods=24, freq='H')
-    response_times = [15 + i*0.2 + (i%4)*3 for i in range(24)]
-    return pd.DataFrame({'timestamp': times, 'response_time': response_times})
+    """获取最近语句的响应时间"""
+    recent = profiler.recent()
+    if not recent:
+        return pd.DataFrame()
+    return pd.DataFrame(recent)[['timestamp', 'elapsed_ms', 'page', 'statement']]
 
 @st.cache_data(ttl=300)
 def get_throughput_analysis():
@@ -532,16 +597,17 @@ def get_throughput_analysis():
     }
     return pd.DataFrame(data)
 
-@st.cache_data(ttl=300)
-def get_endpoint_performance():
-    """获取端点性能"""
-    data = {
-        'endpoint': ['/api/vitals', '/api/patients', '/api/devices', '/api/logs', '/api/mappings'],
-        'avg_response_time': [12, 18, 25, 15, 22],
-        'request_count': [1250, 890, 450, 320, 180],
-        'error_rate': [0.5, 1.2, 0.8, 0.3, 1.5]
-    }
-    return pd.DataFrame(data)
+def get_statement_performance():
+    """获取按累计耗时排序的语句统计"""
+    return pd.DataFrame(profiler.top_statements(), columns=['statement', 'kind', 'calls', 'errors', 'total_ms', 'avg_ms', 'max_ms', 'rows', 'bytes', 'pages'])
+
+def get_frame_memory():
+    """查询层结果 DataFrame 的内存统计"""
+    return pd.DataFrame(profiler.frames(), columns=['name', 'calls', 'rows', 'avg_bytes', 'max_bytes', 'bytes_per_row', 'pages'])
+
+def get_slowest_queries():
+    """获取耗时最长的语句"""
+    return pd.DataFrame(profiler.slowest(), columns=['timestamp', 'elapsed_ms', 'rows', 'bytes', 'page', 'statement', 'error'])
 
 def perform_advanced_log_search(start_time, end_time, levels, services, keyword, exclude, user, session, max_results):
     """执行高级日志搜索"""
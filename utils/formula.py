@@ -0,0 +1,216 @@
+"""
+转换公式引擎：将 cvsc_device_field_rel.conversion_formula（如 x*1.0、(x-32)*5/9、round(x, 1)）
+解析为受限语法树并编译为 numpy 向量化函数，按公式文本缓存，整批设备值一次计算。
+
+只允许：数值常量、变量 x、四则运算/取模/乘方、正负号、比较与 and/or/not（用于验证规则）、
+白名单函数；不允许属性访问、下标、其他变量名和任意函数调用，不执行 eval。
+"""
+import ast
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+
+MAX_FORMULA_LENGTH = 200
+MAX_FORMULA_NODES = 100
+VARIABLE = 'x'
+
+class FormulaError(ValueError):
+    """公式不合法或不在允许的语法范围内"""
+
+_BINARY = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide,
+    ast.Mod: np.mod,
+    ast.Pow: np.power,
+}
+
+_UNARY = {
+    ast.UAdd: np.positive,
+    ast.USub: np.negative,
+    ast.Not: np.logical_not,
+}
+
+_COMPARE = {
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+
+def _round(values, ndigits=0):
+    return np.round(values, int(ndigits))
+
+# round 允许的小数位数（float64 有效位数约 15 位）
+ROUND_MAX_NDIGITS = 15
+
+# 函数名 -> (实现, 最少参数, 最多参数)；round 的位数须为常量
+_FUNCTIONS = {
+    'round': (_round, 1, 2),
+    'abs': (np.abs, 1, 1),
+    'min': (np.minimum, 2, 2),
+    'max': (np.maximum, 2, 2),
+    'sqrt': (np.sqrt, 1, 1),
+    'exp': (np.exp, 1, 1),
+    'log': (np.log, 1, 1),
+    'log10': (np.log10, 1, 1),
+    'floor': (np.floor, 1, 1),
+    'ceil': (np.ceil, 1, 1),
+    'int': (np.trunc, 1, 1),
+    'float': (np.asarray, 1, 1),
+}
+
+def _compile_node(node):
+    """将语法树节点编译为 f(x) -> ndarray 闭包"""
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body)
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise FormulaError(f"不支持的常量: {node.value!r}")
+        # 常量统一为 float64，避免 Python 大整数运算（如 9**9**9）耗尽资源
+        value = np.float64(node.value)
+        return lambda x: value
+    if isinstance(node, ast.Name):
+        if node.id != VARIABLE:
+            raise FormulaError(f"未知变量: {node.id}（只能使用 {VARIABLE}）")
+        return lambda x: x
+    if isinstance(node, ast.BinOp):
+        op = _BINARY.get(type(node.op))
+        if op is None:
+            raise FormulaError(f"不支持的运算: {type(node.op).__name__}")
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return lambda x: op(left(x), right(x))
+    if isinstance(node, ast.UnaryOp):
+        op = _UNARY.get(type(node.op))
+        if op is None:
+            raise FormulaError(f"不支持的运算: {type(node.op).__name__}")
+        operand = _compile_node(node.operand)
+        return lambda x: op(operand(x))
+    if isinstance(node, ast.Compare):
+        ops = [_COMPARE.get(type(op)) for op in node.ops]
+        if None in ops:
+            raise FormulaError("不支持的比较运算")
+        operands = [_compile_node(node.left)] + [_compile_node(c) for c in node.comparators]
+        # 链式比较 a < x < b 等价于 (a < x) and (x < b)
+        def compare(x):
+            values = [operand(x) for operand in operands]
+            result = ops[0](values[0], values[1])
+            for i in range(1, len(ops)):
+                result = np.logical_and(result, ops[i](values[i], values[i + 1]))
+            return result
+        return compare
+    if isinstance(node, ast.BoolOp):
+        op = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        values = [_compile_node(v) for v in node.values]
+        def boolop(x):
+            result = values[0](x)
+            for value in values[1:]:
+                result = op(result, value(x))
+            return result
+        return boolop
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords:
+            raise FormulaError("只允许调用 " + "、".join(sorted(_FUNCTIONS)))
+        func, min_args, max_args = _FUNCTIONS[node.func.id]
+        if not min_args <= len(node.args) <= max_args:
+            raise FormulaError(f"{node.func.id} 参数个数错误")
+        if node.func.id == 'round' and len(node.args) == 2:
+            try:
+                ndigits = ast.literal_eval(node.args[1])
+            except (ValueError, TypeError, SyntaxError):
+                ndigits = None
+            if not isinstance(ndigits, int) or isinstance(ndigits, bool):
+                raise FormulaError("round 的小数位数必须为整数常量")
+            # 在编译时检查范围，避免超大位数在首次计算时才抛出 OverflowError
+            if not 0 <= ndigits <= ROUND_MAX_NDIGITS:
+                raise FormulaError(f"round 的小数位数必须在 0~{ROUND_MAX_NDIGITS} 之间")
+            arg = _compile_node(node.args[0])
+            return lambda x: func(arg(x), ndigits)
+        args = [_compile_node(a) for a in node.args]
+        return lambda x: func(*(a(x) for a in args))
+    raise FormulaError(f"不支持的语法: {type(node).__name__}")
+
+class CompiledFormula:
+    """编译后的转换公式，对整批数值向量化计算"""
+
+    def __init__(self, text, func):
+        self.text = text
+        self._func = func
+
+    def __call__(self, values):
+        """计算公式：输入标量或数组，返回 float64 数组（无法计算的位置为 NaN）"""
+        x = np.asarray(values, dtype=np.float64)
+        with np.errstate(all='ignore'):
+            result = np.asarray(self._func(x), dtype=np.float64)
+        result = np.broadcast_to(result, x.shape) if result.shape != x.shape else result
+        return np.where(np.isfinite(result), result, np.nan)
+
+    def __repr__(self):
+        return f"CompiledFormula({self.text!r})"
+
+@lru_cache(maxsize=1024)
+def compile_formula(text):
+    """解析并编译转换公式（按公式文本缓存），空公式视为原值"""
+    text = (text or '').strip() or VARIABLE
+    if len(text) > MAX_FORMULA_LENGTH:
+        raise FormulaError(f"公式过长（最多 {MAX_FORMULA_LENGTH} 个字符）")
+    try:
+        tree = ast.parse(text, mode='eval')
+    except SyntaxError as e:
+        raise FormulaError(f"公式语法错误: {e.msg}") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_FORMULA_NODES:
+        raise FormulaError("公式过于复杂")
+    return CompiledFormula(text, _compile_node(tree))
+
+def to_numeric(values):
+    """将原始设备值（文本/数值）转换为 float64 数组，无法解析的为 NaN"""
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'fiu':
+        return values.astype(np.float64, copy=False)
+    return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+
+def convert_values(formula, values):
+    """用转换公式整批转换原始设备值"""
+    return compile_formula(formula)(to_numeric(values))
+
+# 批量验证的逐行结果编码
+CHECK_MATCH = 0
+CHECK_MISMATCH = 1
+CHECK_FAILED = 2
+CHECK_INVALID = 3
+CHECK_UNMAPPED = 4
+CHECK_LABELS = ['一致', '不一致', '转换失败', '原值无效', '无映射']
+
+def check_conversions(formulas, field_ids, raw, stored, tolerance):
+    """按字段整批转换原始设备值并与已存标准值比较，返回 (结果编码 int8 数组, 转换值 float64 数组)
+
+    formulas 为 {standard_field_id: 公式文本}；供进程池调用，只依赖 numpy/pandas。
+    """
+    field_ids = np.asarray(field_ids)
+    values = to_numeric(raw)
+    expected = to_numeric(stored)
+    converted = np.full(len(values), np.nan)
+    codes = np.full(len(values), CHECK_UNMAPPED, dtype=np.int8)
+    for field_id, formula in formulas.items():
+        rows = np.flatnonzero(field_ids == field_id)
+        if len(rows):
+            converted[rows] = compile_formula(formula)(values[rows])
+            codes[rows] = CHECK_MATCH
+    mapped = codes == CHECK_MATCH
+    raw_missing = np.isnan(values)
+    expected_missing = np.isnan(expected)
+    with np.errstate(invalid='ignore'):
+        close = np.abs(converted - expected) <= tolerance
+    # 原值与标准值同为空视为一致；原值为空而标准值存在说明原值无法解析
+    codes[mapped & raw_missing & ~expected_missing] = CHECK_INVALID
+    codes[mapped & ~raw_missing & np.isnan(converted)] = CHECK_FAILED
+    codes[mapped & ~raw_missing & ~np.isnan(converted) & ~close] = CHECK_MISMATCH
+    return codes, converted
+
+def format_values(values, decimals=4):
+    """将转换值格式化为标准值文本（最多 decimals 位小数，去掉末尾的 0），NaN 为 None"""
+    values = np.round(np.asarray(values, dtype=np.float64), decimals)
+    return [None if np.isnan(v) else np.format_float_positional(v, trim='-') for v in values]
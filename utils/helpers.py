@@ -1,37 +1,109 @@
 import streamlit as st
+import tempfile
 import pandas as pd
+import numpy as np
+from collections import namedtuple
 from datetime import datetime, timedelta
 from functools import lru_cache
+from config import config
 
-def get_status_color(value, low_threshold, high_threshold):
-    """根据阈值判断状态颜色"""
-    if pd.notnull(high_threshold) and value > high_threshold: 
-        return "🔴 偏高"
-    if pd.notnull(low_threshold) and value < low_threshold: 
-        return "🟠 偏低"
-    return "🟢 正常"
-
-def highlight_status_row(row):
-    """根据状态高亮表格行"""
-    if "偏高" in row.get('status_label', ''): 
-        return ['background-color: #ffe6e6'] * len(row)
-    if "偏低" in row.get('status_label', ''): 
-        return ['background-color: #fff3cd'] * len(row)
-    return [''] * len(row)
-
-def calculate_time_range(range_name):
+# 状态码与标签、行样式一一对应（状态码即下标）
+STATUS_NORMAL, STATUS_LOW, STATUS_HIGH = 0, 1, 2
+STATUS_LABELS = ["🟢 正常", "🟠 偏低", "🔴 偏高"]
+STATUS_STYLES = np.array(['', 'background-color: #fff3cd', 'background-color: #ffe6e6'], dtype=object)
+
+def classify_status(values, low_thresholds, high_thresholds):
+    """向量化状态判定：整列数值与上下限比较，返回 int8 状态码数组（偏高优先，缺失阈值不参与判定）"""
+    values = np.asarray(values, dtype=np.float64)
+    low = np.asarray(low_thresholds, dtype=np.float64)
+    high = np.asarray(high_thresholds, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        return np.select([values > high, values < low], [STATUS_HIGH, STATUS_LOW], STATUS_NORMAL).astype(np.int8)
+
+def status_labels(codes):
+    """状态码转换为分类类型的状态标签"""
+    return pd.Categorical.from_codes(np.asarray(codes, dtype=np.int8), categories=STATUS_LABELS)
+
+def status_row_styles(frame, codes):
+    """按预先计算的状态码生成整表行样式，供 Styler.apply(axis=None) 使用"""
+    styles = STATUS_STYLES[np.asarray(codes, dtype=np.intp)]
+    return pd.DataFrame(np.repeat(styles[:, None], frame.shape[1], axis=1), index=frame.index, columns=frame.columns)
+
+def detect_abnormal(df, ranges, key='description', value='standard_field_value', time='collection_time'):
+    """向量化异常检测：按 key 合并正常范围 {key: {'min', 'max'}}，一次比较得到异常掩码，
+    并按采集时间统计各项的异常次数与连续异常段长度，返回 (掩码, 统计 DataFrame)"""
+    codes, uniques = pd.factorize(df[key])
+    # 末位补空值，使未匹配的编码 -1 取到空范围
+    lows = np.array([ranges[u]['min'] if u in ranges else np.nan for u in uniques] + [np.nan], dtype=np.float64)
+    highs = np.array([ranges[u]['max'] if u in ranges else np.nan for u in uniques] + [np.nan], dtype=np.float64)
+    values = df[value].to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(invalid='ignore'):
+        mask = (values < lows[codes]) | (values > highs[codes])
+
+    # 同一体征项按时间排序后，连续的异常读数为一个异常段
+    order = np.lexsort((df[time].to_numpy(), codes))
+    sorted_mask, sorted_codes = mask[order], codes[order]
+    starts = sorted_mask.copy()
+    starts[1:] &= ~sorted_mask[:-1] | (sorted_codes[1:] != sorted_codes[:-1])
+    run_ids = np.cumsum(starts) - 1
+    run_lengths = np.bincount(run_ids[sorted_mask], minlength=int(starts.sum()))
+    run_codes = sorted_codes[starts]
+
+    n = len(uniques)
+    valid = codes >= 0
+    max_runs = np.zeros(n, dtype=np.int64)
+    np.maximum.at(max_runs, run_codes[run_codes >= 0], run_lengths[run_codes >= 0])
+    summary = pd.DataFrame({
+        key: np.asarray(uniques, dtype=object),
+        'readings': np.bincount(codes[valid], minlength=n),
+        'abnormal_count': np.bincount(codes[mask & valid], minlength=n),
+        'runs': np.bincount(run_codes[run_codes >= 0], minlength=n),
+        'max_run': max_runs,
+    })
+    return mask, summary[summary['abnormal_count'] > 0].sort_values('abnormal_count', ascending=False, ignore_index=True)
+
+RELATIVE_RANGES = {
+    "最近12小时": timedelta(hours=12),
+    "最近24小时": timedelta(hours=24),
+    "最近3天": timedelta(days=3),
+    "最近7天": timedelta(days=7),
+}
+
+# 时间窗口：start~split 为已对齐的历史段（可缓存），split~end 为实时尾段
+TimeWindow = namedtuple('TimeWindow', ['start', 'split', 'end'])
+
+def calculate_time_range(range_name, now=None):
     """计算时间范围"""
-    now = datetime.now()
-    if range_name == "最近12小时":
-        return now - timedelta(hours=12)
-    elif range_name == "最近24小时":
-        return now - timedelta(hours=24)
-    elif range_name == "最近3天":
-        return now - timedelta(days=3)
-    elif range_name == "最近7天":
-        return now - timedelta(days=7)
-    else:
-        return now - timedelta(hours=24)
+    now = now or datetime.now()
+    return now - RELATIVE_RANGES.get(range_name, timedelta(hours=24))
+
+def floor_time(value, bucket_seconds):
+    """将时间向下取整到指定粒度"""
+    bucket = timedelta(seconds=bucket_seconds)
+    return datetime.min + (value - datetime.min) // bucket * bucket
+
+def relative_window(range_name, now=None):
+    """将相对时间范围对齐到固定粒度，同一粒度内的多次刷新、多个会话得到相同的历史段"""
+    now = now or datetime.now()
+    bucket_seconds = config.TIME_WINDOW_BUCKETS.get(range_name, config.DEFAULT_TIME_WINDOW_BUCKET)
+    split = floor_time(now, bucket_seconds)
+    start = floor_time(calculate_time_range(range_name, now), bucket_seconds)
+    return TimeWindow(start, split, now)
+
+def frames_to_csv_file(frames, columns=None):
+    """将分页 DataFrame 逐页编码后写入临时文件，内存中只保留当前一页；返回已回到开头的文件对象，由调用方关闭
+
+    无缓冲的临时文件是 st.download_button 可直接读取的文件类型。
+    """
+    file = tempfile.TemporaryFile(mode='w+b', buffering=0)
+    header = True
+    for frame in frames:
+        if columns:
+            frame = frame[columns]
+        file.write(frame.to_csv(index=False, header=header).encode('utf-8'))
+        header = False
+    file.seek(0)
+    return file
 
 @lru_cache(maxsize=128)
 def format_patient_display(patient_id, patient_name):
@@ -0,0 +1,77 @@
+import streamlit as st
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, CancelledError
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# 各会话、各面板最近一次提交的 (加载函数, future)，用于限制每个面板同时只有一个在途任务。
+# 按会话区分：任务在提交方会话的上下文中执行，其 st.error 等输出只能出现在该会话中
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+@st.cache_resource
+def get_panel_executor():
+    """创建面板数据加载线程池（进程内共享）"""
+    return ThreadPoolExecutor(max_workers=config.PANEL_LOADER_WORKERS, thread_name_prefix="panel_loader")
+
+def _run_with_ctx(ctx, func):
+    """在工作线程中挂载当前会话上下文后执行加载函数，使缓存和 st.error 正常工作"""
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+    return func()
+
+def _submit(executor, name, func, ctx):
+    """提交面板加载任务；本会话上一次的任务仍在执行时不重复提交：同一加载函数直接等待该任务，否则返回 None"""
+    key = (ctx.session_id if ctx is not None else None, name)
+    with _inflight_lock:
+        previous = _inflight.get(key)
+        if previous is not None and not previous[1].done():
+            return previous[1] if previous[0] is func else None
+        # 清理已完成的任务，已关闭会话的记录不会一直留在字典中
+        for done in [k for k, (_, f) in _inflight.items() if f.done()]:
+            del _inflight[done]
+        # 每个任务复制一份当前上下文，保证工作线程能读取到当前页面等上下文变量
+        future = executor.submit(contextvars.copy_context().run, _run_with_ctx, ctx, func)
+        _inflight[key] = (func, future)
+        return future
+
+def load_panels(loaders, timeouts=None):
+    """并发加载多个面板数据，返回 (结果字典, 错误字典)；超时或失败的面板结果为 None"""
+    timeouts = timeouts or {}
+    ctx = get_script_run_ctx()
+    executor = get_panel_executor()
+
+    started = time.monotonic()
+    futures = {name: _submit(executor, name, func, ctx) for name, func in loaders.items()}
+    deadlines = {name: started + timeouts.get(name, config.PANEL_TIMEOUT_SECONDS) for name in loaders}
+
+    results, errors = {}, {}
+    # 按截止时间先后等待，每个面板只受自己的超时限制
+    for name in sorted(futures, key=deadlines.get):
+        future = futures[name]
+        if future is None:
+            results[name] = None
+            errors[name] = "上一次加载仍在进行"
+            logger.warning(f"面板 {name} 上一次加载仍在进行，本次跳过")
+            continue
+        try:
+            results[name] = future.result(timeout=max(0, deadlines[name] - time.monotonic()))
+        except FutureTimeoutError:
+            # 仍在排队的任务直接取消；已开始执行的任务无法中断，完成前不会重复提交
+            future.cancel()
+            results[name] = None
+            errors[name] = "加载超时"
+            logger.warning(f"面板 {name} 加载超时")
+        except CancelledError:
+            results[name] = None
+            errors[name] = "加载超时"
+        except Exception as e:
+            results[name] = None
+            errors[name] = str(e)
+            logger.error(f"面板 {name} 加载失败: {e}")
+    return results, errors